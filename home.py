@@ -1,4 +1,5 @@
 import streamlit as st
+from real_estate.model_registry import warm_up
 
 # Set Streamlit Page Configuration
 st.set_page_config(
@@ -8,6 +9,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Start loading the price model in the background so the predictor page opens warm
+warm_up()
+
 # Modern CSS styling
 st.markdown("""
 <style>
@@ -5,10 +5,15 @@ import os
 import tempfile
 import base64
 import io
+import collections
 import numpy as np
 from groq import Groq
 from dotenv import load_dotenv
 from PIL import Image
+from real_estate import documents, pdf_text, workers
+from real_estate.llm_cache import ResponseCache
+from real_estate.llm_stream import StreamingChat, StreamRelay, metrics_caption
+from real_estate.retrieval import TOP_K, BM25Index
 
 # Import with fallback handling
 try:
@@ -158,29 +163,42 @@ def init_groq_client():
 
 client = init_groq_client()
 
+# Streaming chat completions with time-to-first-token and tokens/sec metrics
+@st.cache_resource
+def init_streaming_chat():
+    return StreamingChat(init_groq_client())
+
+chat = init_streaming_chat()
+
+# Persistent cache of document chunk summaries, keyed by chunk content
+@st.cache_resource
+def load_response_cache():
+    return ResponseCache()
+
+response_cache = load_response_cache()
+
+# Bump when the chunk summary prompt or its settings change so cached summaries are not reused
+CHUNK_PROMPT_VERSION = "chunk-summary-v1"
+
 # Function to encode image to base64
 def encode_image_to_base64(image_file):
-    """Encode image to base64 for API"""
+    """Encode image to base64 for API; returns (base64 text, error message)"""
     try:
-        return base64.b64encode(image_file.getvalue()).decode('utf-8')
+        return base64.b64encode(image_file.getvalue()).decode('utf-8'), None
     except Exception as e:
-        st.error(f"Error encoding image: {str(e)}")
-        return None
+        # Runs in a worker thread: the caller shows the error from the main thread
+        return None, f"Error encoding image: {str(e)}"
 
 # Function to extract text from PDF
 def extract_text_from_pdf(pdf_file):
-    """Extract text from PDF file"""
+    """Extract text from PDF file page by page, stopping at the document token budget; returns (text, stats)"""
     if PyPDF2 is None:
-        return "PyPDF2 not installed. Please run: pip install PyPDF2"
+        return "PyPDF2 not installed. Please run: pip install PyPDF2", None
     
     try:
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_file.getvalue()))
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        return pdf_text.extract_text(pdf_file.getvalue())
     except Exception as e:
-        return f"Error extracting PDF text: {str(e)}"
+        return f"Error extracting PDF text: {str(e)}", None
 
 # Function to extract text from DOCX
 def extract_text_from_docx(docx_file):
@@ -197,23 +215,30 @@ def extract_text_from_docx(docx_file):
     except Exception as e:
         return f"Error extracting DOCX text: {str(e)}"
 
+# Function to run a completion, streaming it to the page from a worker thread
+def complete_to(relay, **request):
+    """``chat.complete``, handing each delta to ``relay`` (if any) so the page can show it as it arrives"""
+    if relay is None:
+        return chat.complete(**request)
+    return relay.relay(chat.stream(**request))
+
 # Function to analyze image with Groq Vision
-def analyze_image_with_groq(image_file, user_question="Analyze this real estate related image in detail"):
-    """Analyze image using Groq's vision model"""
+def analyze_image_with_groq(base64_image, user_question="Analyze this real estate related image in detail", relay=None):
+    """Analyze a base64 encoded image using Groq's vision model"""
     try:
-        base64_image = encode_image_to_base64(image_file)
-        if not base64_image:
-            return "Failed to process image."
-        
-        response = client.chat.completions.create(
-            model="llama-3.2-11b-vision-preview",
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"""You are a senior real estate expert and analyst with 15+ years of experience. 
+        # Runs in a worker thread: the deltas go through ``relay`` to the main thread
+        with documents.LLM_CALLS:
+            return complete_to(
+                relay,
+                label="image",
+                model="llama-3.2-11b-vision-preview",
+                messages=[
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "text",
+                                "text": f"""You are a senior real estate expert and analyst with 15+ years of experience. 
                             
                             User Question: {user_question}
                             
@@ -225,36 +250,57 @@ def analyze_image_with_groq(image_file, user_question="Analyze this real estate
                             5. Any notable features or concerns
                             
                             Be specific, detailed, and actionable in your response."""
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/jpeg;base64,{base64_image}"
+                            },
+                            {
+                                "type": "image_url",
+                                "image_url": {
+                                    "url": f"data:image/jpeg;base64,{base64_image}"
+                                }
                             }
-                        }
-                    ]
-                }
-            ],
-            temperature=0.3,
-            max_tokens=1500
-        )
-        
-        return response.choices[0].message.content
+                        ]
+                    }
+                ],
+                temperature=0.3,
+                max_tokens=1500
+            )
         
     except Exception as e:
         return f"Error analyzing image: {str(e)}. Please try using a different image format or smaller file size."
 
+# Function to summarize one chunk of a long document (question-independent, so it can be cached)
+def summarize_document_chunk(chunk):
+    """Summarize a document chunk with Groq, reusing the cached summary of identical text"""
+    request = {"model": "llama-3.1-8b-instant", "temperature": 0.0, "max_tokens": 350}
+    
+    def ask_model():
+        return chat.complete(
+            label="document chunk",
+            messages=[
+                {"role": "system", "content": "You condense real estate documents for a senior analyst. Keep every figure, date, location, price, area and named party."},
+                {"role": "user", "content": f"Summarize this part of a document in at most 200 words:\n\n{chunk}"}
+            ],
+            **request
+        )
+    
+    return response_cache.get_or_compute("document_chunk", None, CHUNK_PROMPT_VERSION,
+                                         documents.content_hash(chunk), ask_model, params=request)
+
 # Function to analyze document with Groq
-def analyze_document_with_groq(text_content, user_question, file_type):
-    """Analyze document text using Groq"""
-    try:
+def analyze_document_with_groq(text_content, user_question, file_type, relay=None):
+    """Analyze document text using Groq; long documents are summarized in chunks first"""
+    def answer(content):
+        if content is text_content:
+            content_label = "Document content:"
+        else:
+            content_label = "Summaries of consecutive parts of the document (the full text was too long to send):"
+        
         prompt = f"""
         You are a senior real estate expert and analyst with 15+ years of experience. 
         
         A user has uploaded a {file_type} document and asked: "{user_question}"
         
-        Document content:
-        {text_content[:8000]}  # Limit content to prevent token overflow
+        {content_label}
+        {content}
         
         Please provide a comprehensive real estate analysis focusing on:
         1. Key insights and findings from the document
@@ -267,7 +313,10 @@ def analyze_document_with_groq(text_content, user_question, file_type):
         Be specific, data-driven, and actionable in your response.
         """
         
-        response = client.chat.completions.create(
+        # Runs in a worker thread: the deltas go through ``relay`` to the main thread
+        return complete_to(
+            relay,
+            label="document",
             model="llama-3.1-8b-instant",
             messages=[
                 {"role": "system", "content": "You are a senior real estate expert and market analyst with deep knowledge of property markets, investments, and industry trends."},
@@ -276,17 +325,19 @@ def analyze_document_with_groq(text_content, user_question, file_type):
             temperature=0.3,
             max_tokens=1500
         )
-        
-        return response.choices[0].message.content
+    
+    try:
+        return documents.map_reduce(text_content, summarize_document_chunk, answer)
         
     except Exception as e:
         return f"Error analyzing document: {str(e)}"
 
 # Function to get AI response for follow-up questions
 def get_ai_followup_response(question, context):
-    """Get AI response for follow-up questions with context"""
+    """Get AI response for follow-up questions with context, written out as it streams in"""
     try:
-        response = client.chat.completions.create(
+        response = chat.stream(
+            label="followup",
             model="llama-3.1-8b-instant",
             messages=[
                 {"role": "system", "content": """You are a senior real estate expert and investment advisor with 20+ years of experience. 
@@ -298,7 +349,7 @@ def get_ai_followup_response(question, context):
             max_tokens=1200
         )
         
-        return response.choices[0].message.content
+        return st.write_stream(response)
         
     except Exception as e:
         return f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question."
@@ -348,6 +399,8 @@ def create_sidebar_chat_history():
         else:
             st.info("🔍 No saved analyses yet. Upload and analyze files to start building your chat history!")
         
+        st.caption(metrics_caption(chat.metrics.summary()))
+        
         # Clear all history button
         if st.session_state.saved_analyses:
             if st.button("🗑️ Clear All History", type="secondary"):
@@ -440,97 +493,173 @@ def show_file_analysis_interface():
         elif not user_question:
             st.warning("🤔 Please enter a question about your files.")
 
-def analyze_files(uploaded_files, user_question):
-    """Analyze uploaded files and show results"""
-    
-    all_analyses = []
-    
-    for uploaded_file in uploaded_files:
-        with st.spinner(f"🤖 Analyzing {uploaded_file.name}..."):
+IMAGE_EXTENSIONS = ['png', 'jpg', 'jpeg', 'gif', 'bmp']
+
+def process_file(uploaded_file, user_question, relay=None):
+    """Extract and analyze one file; runs in a worker thread, so it returns what to show instead of drawing it"""
+    file_extension = uploaded_file.name.split('.')[-1].lower()
+    result = {"file_extension": file_extension, "preview_label": None, "preview": None, "text": None,
+              "extraction": None, "analysis": "", "error": None}
+    
+    # Handle different file types (same as before)
+    if file_extension in IMAGE_EXTENSIONS:
+        base64_image, result["error"] = encode_image_to_base64(uploaded_file)
+        if base64_image:
+            result["analysis"] = analyze_image_with_groq(base64_image, user_question, relay)
+        else:
+            result["analysis"] = "Failed to process image."
+        
+    elif file_extension == 'pdf':
+        text_content, result["extraction"] = extract_text_from_pdf(uploaded_file)
+        if text_content and not text_content.startswith("Error") and not text_content.startswith("PyPDF2"):
+            result["preview_label"], result["preview"] = "📄 Extracted Text Preview", text_content[:500] + "..."
+            result["text"] = text_content
+            result["analysis"] = analyze_document_with_groq(text_content, user_question, "PDF", relay)
+        else:
+            result["analysis"] = text_content or "Could not extract text from PDF file."
             
-            # Display file info
-            st.markdown(f"""
-            <div class="file-info-card">
-                <strong>📄 {uploaded_file.name}</strong> 
-                <span style="color: #666;">({uploaded_file.size:,} bytes, {uploaded_file.type})</span>
-            </div>
-            """, unsafe_allow_html=True)
+    elif file_extension == 'docx':
+        text_content = extract_text_from_docx(uploaded_file)
+        if text_content and not text_content.startswith("Error") and not text_content.startswith("python-docx"):
+            result["preview_label"], result["preview"] = "📝 Extracted Text Preview", text_content[:500] + "..."
+            result["text"] = text_content
+            result["analysis"] = analyze_document_with_groq(text_content, user_question, "Word Document", relay)
+        else:
+            result["analysis"] = text_content or "Could not extract text from Word document."
             
-            file_extension = uploaded_file.name.split('.')[-1].lower()
-            analysis_result = ""
+    elif file_extension == 'txt':
+        try:
+            text_content = str(uploaded_file.getvalue(), "utf-8")
+            result["preview_label"], result["preview"] = "📋 Text Content Preview", text_content[:500] + "..."
+            result["text"] = text_content
+            result["analysis"] = analyze_document_with_groq(text_content, user_question, "Text File", relay)
+        except Exception as e:
+            result["analysis"] = f"Error reading text file: {str(e)}"
+        
+    elif file_extension in ['csv', 'xlsx', 'xls']:
+        try:
+            data_file = io.BytesIO(uploaded_file.getvalue())
+            if file_extension == 'csv':
+                df = pd.read_csv(data_file)
+            else:
+                df = pd.read_excel(data_file)
             
-            # Handle different file types (same as before)
-            if file_extension in ['png', 'jpg', 'jpeg', 'gif', 'bmp']:
-                st.image(uploaded_file, caption=f"📷 {uploaded_file.name}", width=400)
-                analysis_result = analyze_image_with_groq(uploaded_file, user_question)
-                
-            elif file_extension == 'pdf':
-                text_content = extract_text_from_pdf(uploaded_file)
-                if text_content and not text_content.startswith("Error") and not text_content.startswith("PyPDF2"):
-                    st.text_area("📄 Extracted Text Preview", text_content[:500] + "...", height=100, disabled=True)
-                    analysis_result = analyze_document_with_groq(text_content, user_question, "PDF")
-                else:
-                    analysis_result = text_content or "Could not extract text from PDF file."
-                    
-            elif file_extension == 'docx':
-                text_content = extract_text_from_docx(uploaded_file)
-                if text_content and not text_content.startswith("Error") and not text_content.startswith("python-docx"):
-                    st.text_area("📝 Extracted Text Preview", text_content[:500] + "...", height=100, disabled=True)
-                    analysis_result = analyze_document_with_groq(text_content, user_question, "Word Document")
-                else:
-                    analysis_result = text_content or "Could not extract text from Word document."
-                    
-            elif file_extension == 'txt':
-                try:
-                    text_content = str(uploaded_file.getvalue(), "utf-8")
-                    st.text_area("📋 Text Content Preview", text_content[:500] + "...", height=100, disabled=True)
-                    analysis_result = analyze_document_with_groq(text_content, user_question, "Text File")
-                except Exception as e:
-                    analysis_result = f"Error reading text file: {str(e)}"
-                
-            elif file_extension in ['csv', 'xlsx', 'xls']:
-                try:
-                    if file_extension == 'csv':
-                        df = pd.read_csv(uploaded_file)
-                    else:
-                        df = pd.read_excel(uploaded_file)
-                    
-                    st.markdown("**📊 Data Preview:**")
-                    st.dataframe(df.head(10), use_container_width=True)
-                    
-                    data_summary = f"""
-                    Dataset Information:
-                    - Total Rows: {df.shape[0]:,}
-                    - Total Columns: {df.shape[1]}
-                    - Column Names: {', '.join(df.columns.tolist())}
-                    - Data Types: {df.dtypes.to_dict()}
-                    - Missing Values: {df.isnull().sum().to_dict()}
-                    - Sample Records: {df.head(5).to_string()}
-                    """
-                    
-                    numeric_df = df.select_dtypes(include=[np.number])
-                    if not numeric_df.empty:
-                        data_summary += f"\n- Numeric Statistics:\n{numeric_df.describe().to_string()}"
-                    
-                    analysis_result = analyze_document_with_groq(data_summary, user_question, f"{file_extension.upper()} Data File")
-                    
-                except Exception as e:
-                    analysis_result = f"Error reading data file: {str(e)}"
+            result["preview_label"], result["preview"] = "**📊 Data Preview:**", df.head(10)
+            
+            data_summary = f"""
+            Dataset Information:
+            - Total Rows: {df.shape[0]:,}
+            - Total Columns: {df.shape[1]}
+            - Column Names: {', '.join(df.columns.tolist())}
+            - Data Types: {df.dtypes.to_dict()}
+            - Missing Values: {df.isnull().sum().to_dict()}
+            - Sample Records: {df.head(5).to_string()}
+            """
+            
+            numeric_df = df.select_dtypes(include=[np.number])
+            if not numeric_df.empty:
+                data_summary += f"\n- Numeric Statistics:\n{numeric_df.describe().to_string()}"
             
-            # Store analysis for each file
-            if analysis_result:
-                all_analyses.append({
-                    "file_name": uploaded_file.name,
-                    "file_type": file_extension,
-                    "question": user_question,
-                    "analysis": analysis_result
-                })
+            result["text"] = data_summary
+            result["analysis"] = analyze_document_with_groq(data_summary, user_question, f"{file_extension.upper()} Data File", relay)
+            
+        except Exception as e:
+            result["analysis"] = f"Error reading data file: {str(e)}"
+    
+    return result
+
+def show_file_result(uploaded_file, result, seconds):
+    """Show a finished file's info card and preview"""
+    st.markdown(f"""
+    <div class="file-info-card">
+        <strong>📄 {uploaded_file.name}</strong> 
+        <span style="color: #666;">({uploaded_file.size:,} bytes, {uploaded_file.type}) · analyzed in {seconds:.1f}s</span>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    if result.get("error"):
+        st.error(result["error"])
+    
+    extraction = result.get("extraction")
+    if extraction:
+        note = f" · stopped at the token budget after {extraction['extracted']} of {extraction['pages']} pages" if extraction['truncated'] else ""
+        st.caption(f"📑 {extraction['extracted']} pages extracted in {extraction['seconds']:.2f}s "
+                   f"({extraction['pages_per_sec'] or 0:.0f} pages/s, {extraction['mode']}){note}")
+    
+    if result["file_extension"] in IMAGE_EXTENSIONS:
+        st.image(uploaded_file, caption=f"📷 {uploaded_file.name}", width=400)
+    elif isinstance(result["preview"], pd.DataFrame):
+        st.markdown(result["preview_label"])
+        st.dataframe(result["preview"], use_container_width=True)
+    elif result["preview"] is not None:
+        st.text_area(result["preview_label"], result["preview"], height=100, disabled=True,
+                     key=f"preview_{uploaded_file.file_id}")
+
+def analyze_files(uploaded_files, user_question):
+    """Analyze uploaded files concurrently and show each result as it completes"""
+    
+    results = {}
+    progress = st.progress(0.0, text=f"🤖 Analyzing {len(uploaded_files)} file(s)...")
+    # One slot per file, in upload order: the answer streams into it, then its result card replaces it
+    slots = [st.empty() for _ in uploaded_files]
+    relays = [StreamRelay() for _ in uploaded_files]
+    
+    def show_streamed_text():
+        for index, relay in enumerate(relays):
+            text = relay.drain()
+            if index not in results and text:
+                slots[index].markdown(f"**📄 {uploaded_files[index].name}**\n\n{text}▌")
+    
+    # Extraction and Groq calls run in a bounded thread pool; drawing stays on this thread
+    try:
+        for task in workers.as_completed(lambda index: process_file(uploaded_files[index], user_question, relays[index]),
+                                         range(len(uploaded_files)), on_wait=show_streamed_text):
+            uploaded_file = uploaded_files[task.index]
+            with slots[task.index].container():
+                if task.error is not None:
+                    if isinstance(task.error, TimeoutError):
+                        message = f"Analysis of {uploaded_file.name} timed out after {task.seconds:.0f} seconds. Please try again."
+                    else:
+                        message = f"Error analyzing {uploaded_file.name}: {str(task.error)}"
+                    st.error(f"❌ {message}")
+                    results[task.index] = {"file_extension": uploaded_file.name.split('.')[-1].lower(), "analysis": message}
+                else:
+                    show_file_result(uploaded_file, task.result, task.seconds)
+                    st.markdown(task.result["analysis"])
+                    results[task.index] = task.result
+            progress.progress(len(results) / len(uploaded_files),
+                              text=f"✅ {len(results)} of {len(uploaded_files)} file(s) analyzed")
+    finally:
+        # Stopped early (a rerun or an error): no one is left to read the answers still streaming
+        for relay in relays:
+            relay.cancel()
+    
+    # Store analysis for each file, in upload order
+    all_analyses = []
+    for index, uploaded_file in enumerate(uploaded_files):
+        if results[index]["analysis"]:
+            all_analyses.append({
+                "file_name": uploaded_file.name,
+                "file_type": results[index]["file_extension"],
+                "question": user_question,
+                "analysis": results[index]["analysis"]
+            })
+    
+    # Index the extracted text and the analyses so follow-ups only carry the relevant passages;
+    # uploads that share a name are told apart by their position, not overwritten
+    names = collections.Counter(uploaded_file.name for uploaded_file in uploaded_files)
+    indexed_text = {}
+    for index, uploaded_file in enumerate(uploaded_files):
+        source = uploaded_file.name if names[uploaded_file.name] == 1 else f"{uploaded_file.name} (file {index + 1})"
+        indexed_text[source] = results[index].get("text")
+        indexed_text[f"analysis of {source}"] = results[index]["analysis"]
     
     # Switch to combined view
     if all_analyses:
         # Store analysis and switch to chat mode
         combined_analysis = {
             "analyses": all_analyses,
+            "retrieval_index": BM25Index.from_documents(indexed_text),
             "chat_history": [
                 {"role": "user", "content": user_question},
                 {"role": "assistant", "content": "\n\n---\n\n".join([f"**Analysis of {a['file_name']}:**\n{a['analysis']}" for a in all_analyses])}
@@ -569,6 +698,7 @@ def show_combined_analysis_and_chat():
                     "file_type": analysis['file_type'],
                     "original_question": analysis['question'],
                     "initial_analysis": analysis['analysis'],
+                    "retrieval_index": st.session_state.current_analysis.get('retrieval_index'),
                     "chat_history": st.session_state.chat_history
                 }
                 st.session_state.saved_analyses.append(saved_analysis)
@@ -589,15 +719,23 @@ def show_combined_analysis_and_chat():
         # Add user message to chat history
         st.session_state.chat_history.append({"role": "user", "content": user_input})
         
-        # Get AI response
-        with st.spinner("🤖 Thinking..."):
-            # Create context from the initial analysis
-            context_parts = []
-            if 'analyses' in st.session_state.current_analysis:
-                for analysis in st.session_state.current_analysis['analyses']:
-                    context_parts.append(f"Analysis of {analysis['file_name']}: {analysis['analysis']}")
+        with st.chat_message("user"):
+            st.write(user_input)
+        
+        # Get AI response, streamed into the chat as it is generated
+        with st.chat_message("assistant"):
+            # Create context from the passages most relevant to the question
+            retrieval_index = st.session_state.current_analysis.get('retrieval_index')
+            context = retrieval_index.context(user_input, TOP_K) if retrieval_index is not None else ""
+            
+            # Nothing matched: fall back to the full initial analysis
+            if not context:
+                context_parts = []
+                if 'analyses' in st.session_state.current_analysis:
+                    for analysis in st.session_state.current_analysis['analyses']:
+                        context_parts.append(f"Analysis of {analysis['file_name']}: {analysis['analysis']}")
+                context = "\n\n".join(context_parts)
             
-            context = "\n\n".join(context_parts)
             ai_response = get_ai_followup_response(user_input, context)
             
             st.session_state.chat_history.append({"role": "assistant", "content": ai_response})
@@ -1,8 +1,12 @@
 import streamlit as st
-import pickle
 import pandas as pd
 import numpy as np
-import gzip
+import io
+import os
+from real_estate.batch import price_range, score_file
+from real_estate.lookup_table import GRID_PATH, PriceLookupTable
+from real_estate.model_registry import FEATURE_COLUMNS, format_stats, get_registry
+from real_estate.prediction_cache import PredictionCache
 
 # Page Configuration
 st.set_page_config(page_title="Real Estate Price Prediction", page_icon="🏠", layout="wide")
@@ -48,15 +52,33 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Load pre-trained models
-with open('datasets/df.pkl', 'rb') as file:
-    df = pickle.load(file)
-
-#with open('datasets/pipeline.pkl', 'rb') as file:
-#    pipeline = pickle.load(file)
-
-with gzip.open('pipeline1.pkl.gz', 'rb') as file:
-    pipeline = pickle.load(file)    
+# Load pre-trained models (once per process, shared by every session and rerun)
+@st.cache_resource
+def load_registry():
+    return get_registry().load()
+
+# Repeat queries are answered from a shared cache that resets when the model file changes
+@st.cache_resource
+def load_prediction_cache():
+    return PredictionCache()
+
+# What-if grid built offline by `python -m real_estate.lookup_table` (memory-mapped, optional)
+@st.cache_resource
+def load_lookup_table(model_hash):
+    if not os.path.exists(GRID_PATH):
+        return None
+    table = PriceLookupTable.load(GRID_PATH)
+    return table if table.model_hash == model_hash else None
+
+registry = load_registry().refresh()
+prediction_cache = load_prediction_cache()
+lookup_table = load_lookup_table(registry.model_hash)
+df = registry.df
+pipeline = registry.pipeline
+st.sidebar.caption(f"⚙️ {format_stats(registry.stats())}")
+cache_stats = prediction_cache.stats()
+st.sidebar.caption(f"⚡ Prediction cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                   f"({cache_stats['hit_rate']:.0%}), {cache_stats['evictions']} evicted")
 
 # Header
 st.header("🏠 **Real Estate Price Prediction**")
@@ -81,23 +103,39 @@ with input_columns[1]:
     luxury_category = st.selectbox('Luxury Category', sorted(df['luxury_category'].unique().tolist()))
     floor_category = st.selectbox('Floor Category', sorted(df['floor_category'].unique().tolist()))
 
+# Current inputs in the pipeline's column order
+data = [[property_type, sector, bedrooms, bathroom, balcony, property_age, built_up_area, servant_room, store_room, furnishing_type, luxury_category, floor_category]]
+input_row = dict(zip(FEATURE_COLUMNS, data[0]))
+
+def predict_one(canonical_row):
+    one_df = pd.DataFrame([canonical_row], columns=FEATURE_COLUMNS)
+    return float(pipeline.predict(one_df)[0])
+
+def predict_row(row):
+    # Cached log price, looked up once per distinct input in this session so reruns don't count as hits
+    key = (registry.model_hash, prediction_cache.key(prediction_cache.canonicalize(row)))
+    if st.session_state.get('last_prediction', (None, None))[0] != key:
+        st.session_state['last_prediction'] = (key, prediction_cache.get_or_compute(row, predict_one, registry.model_hash))
+    log_price = st.session_state['last_prediction'][1]
+    # Intervals are applied after the lookup, so they always match the loaded table
+    return tuple(float(values[0]) for values in price_range([log_price], [row['property_type']], [row['sector']], registry.intervals))
+
 # Predict Button with Enhancements
 if st.button('🔍 **Predict Price**'):
-    # Create a DataFrame from the inputs
-    data = [[property_type, sector, bedrooms, bathroom, balcony, property_age, built_up_area, servant_room, store_room, furnishing_type, luxury_category, floor_category]]
-    columns = ['property_type', 'sector', 'bedRoom', 'bathroom', 'balcony',
-               'agePossession', 'built_up_area', 'servant room', 'store room',
-               'furnishing_type', 'luxury_category', 'floor_category']
-    
-    one_df = pd.DataFrame(data, columns=columns)
-
-    # Predict price using the pipeline
-    base_price = np.expm1(pipeline.predict(one_df))[0]
-    low = base_price - 0.22
-    high = base_price + 0.22
+    # Predict price using the pipeline (skipped entirely on a cache hit)
+    base_price, low, high = predict_row(input_row)
 
     # Enhanced Prediction Text
     st.markdown(f"### 🏡 **The estimated price of the property is between ₹{low:,.2f} Cr and ₹{high:,.2f} Cr.**")
+    if registry.intervals is not None:
+        # Thin segments fall back to a coarser calibration level; say which one was used
+        level = registry.intervals.levels([property_type], [sector])[0]
+        calibrated_on = {
+            'segment': f"past errors for {property_type}s in {sector}",
+            'property_type': f"past errors for all {property_type}s ({sector} has too few to calibrate on its own)",
+            'global': "past errors across the whole market",
+        }[level]
+        st.caption(f"Range is a {registry.intervals.coverage:.0%} prediction interval calibrated on {calibrated_on}.")
 
     # Display Property Details in a Grid Layout
     st.markdown("#### 📋 **Property Details**")
@@ -124,3 +162,55 @@ if st.button('🔍 **Predict Price**'):
     st.markdown("---")
     st.info("Note: The price prediction is based on the provided features and is an estimation only.")
     st.info("Note: To get the most accurate results, please provide **reliable and precise input values**. This model performs best with accurate and detailed information.")
+
+# What-if Explorer (served from the precomputed price grid, no extra model calls)
+if lookup_table is not None:
+    st.markdown("---")
+    st.subheader("🔮 What-if Explorer")
+    st.markdown("See how the estimate for the details above changes when one factor changes.")
+    what_if_axes = {
+        'Sector': 'sector', 'Bedrooms': 'bedRoom', 'Property Age': 'agePossession',
+        'Furnishing Type': 'furnishing_type', 'Luxury Category': 'luxury_category',
+        'Floor Category': 'floor_category', 'Built-up Area': 'built_up_area',
+    }
+    what_if_label = st.selectbox('Vary', list(what_if_axes))
+    base_price = predict_row(input_row)[0]
+    what_if_axis = what_if_axes[what_if_label]
+    if what_if_axis == 'built_up_area':
+        low_area = max(built_up_area * 0.5, lookup_table.areas[0])
+        areas = np.linspace(low_area, max(built_up_area * 1.5, low_area * 2), 25)
+        curve = lookup_table.what_if(input_row, base_price, areas=areas)
+        st.line_chart(pd.DataFrame({'Estimated Price (Cr)': curve}, index=pd.Index(areas.round(), name='Built-up Area (sq.ft)')))
+    else:
+        comparison = lookup_table.what_if(input_row, base_price, axis=what_if_axis).rename('Estimated Price (Cr)')
+        st.bar_chart(comparison)
+        st.dataframe(comparison.round(2).sort_values(ascending=False), use_container_width=True)
+    st.caption("What-if estimates are interpolated from a precomputed grid and scaled to the model's estimate for your inputs.")
+
+# Batch Prediction
+st.markdown("---")
+st.subheader("📂 Batch Price Prediction")
+st.markdown("Upload a CSV or Parquet file with the columns below to price every listing at once.")
+st.caption(", ".join(FEATURE_COLUMNS))
+
+batch_file = st.file_uploader("Listings file", type=['csv', 'parquet'])
+if batch_file is not None and st.button('📊 **Predict Batch**'):
+    is_parquet = batch_file.name.lower().endswith('.parquet')
+    output = io.BytesIO() if is_parquet else io.StringIO()
+    progress_text = st.empty()
+    try:
+        rows, failed = score_file(batch_file, output, pipeline=pipeline, intervals=registry.intervals,
+                          output_format='parquet' if is_parquet else 'csv',
+                          progress=lambda n: progress_text.text(f"Scored {n:,} rows..."))
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        progress_text.success(f"Scored {rows:,} listings.")
+        if failed:
+            st.warning(f"{failed:,} listings could not be priced; their reason is in the 'error' column.")
+        st.download_button(
+            "⬇️ Download Predictions",
+            data=output.getvalue(),
+            file_name=f"priced_{batch_file.name}",
+            mime="application/octet-stream" if is_parquet else "text/csv",
+        )
@@ -1,10 +1,13 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import pickle
-import matplotlib.pyplot as plt
-import seaborn as sns
+from real_estate.analytics import AnalyticsData
+from real_estate.artifacts import ArtifactStore
+from real_estate import charts
+from real_estate.charts import ChartRegistry, box_figure
+from real_estate.density import group_distributions
+from real_estate.llm_cache import ResponseCache
+from real_estate.llm_stream import StreamingChat, metrics_caption
 import os
 from groq import Groq
 from dotenv import load_dotenv
@@ -27,6 +30,20 @@ def init_groq_client():
 
 client = init_groq_client()
 
+# Streaming chat completions with time-to-first-token and tokens/sec metrics
+@st.cache_resource
+def init_streaming_chat():
+    return StreamingChat(init_groq_client())
+
+chat = init_streaming_chat()
+
+# Persistent LLM response cache, shared by all sessions and restarts
+@st.cache_resource
+def load_response_cache():
+    return ResponseCache()
+
+response_cache = load_response_cache()
+
 # Function to transcribe audio using Groq Whisper
 def transcribe_audio(audio_file):
     """Transcribe audio using Groq's Whisper model"""
@@ -55,9 +72,12 @@ def transcribe_audio(audio_file):
     except Exception as e:
         return f"Transcription error: {str(e)}"
 
+# Bump when the insight prompts, model or generation settings change so cached answers are not reused
+PROMPT_VERSION = "insights-v1"
+
 # Function to get AI insights for graphs
-def get_ai_insights(graph_type, data_description, user_question=None):
-    """Generate AI insights for specific graphs"""
+def get_ai_insights(graph_type, data_description, user_question=None, stream=False):
+    """Generate AI insights for specific graphs (with ``stream``, written out token by token as they arrive)"""
     try:
         if user_question:
             # Detailed analysis when user asks a question
@@ -135,13 +155,20 @@ def get_ai_insights(graph_type, data_description, user_question=None):
             temperature = 0.7  # Original setting for brief insights
             max_tokens = 200   # Original token limit for brief responses
         
-        response = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=temperature,
-            max_tokens=max_tokens
+        request = {"model": "llama-3.1-8b-instant", "temperature": temperature, "max_tokens": max_tokens}
+        
+        def ask_model():
+            response = chat.stream(label=graph_type, messages=[{"role": "user", "content": prompt}], **request)
+            if not stream:
+                return response.collect()
+            st.write_stream(response)
+            return response.result()  # raises if the stream stopped early, so partial text isn't cached
+
+        # Same chart, question, data and model settings -> answered from the cache; failures are not cached
+        return response_cache.get_or_compute(
+            graph_type, user_question, PROMPT_VERSION, f"{data.version}:{data_description}", ask_model,
+            params=request
         )
-        return response.choices[0].message.content
     except Exception as e:
         return f"AI analysis temporarily unavailable. Please try again. Error: {str(e)}"
 
@@ -208,8 +235,8 @@ def create_graph_chat_with_voice(graph_id, graph_type, data_description):
                             st.session_state[chat_key].append({"role": "user", "content": f"🎤 {transcribed_text}"})
                             
                             # Get detailed AI response
-                            with st.spinner("🤖 Analyzing your question..."):
-                                ai_response = get_ai_insights(graph_type, data_description, transcribed_text)
+                            with st.chat_message("assistant", avatar="🤖"):
+                                ai_response = get_ai_insights(graph_type, data_description, transcribed_text, stream=True)
                                 st.session_state[chat_key].append({"role": "assistant", "content": ai_response})
                             
                             # Rerun to show new messages
@@ -228,7 +255,8 @@ def create_graph_chat_with_voice(graph_id, graph_type, data_description):
                 st.session_state[chat_key].append({"role": "user", "content": user_input})
                 
                 # Get detailed AI response
-                ai_response = get_ai_insights(graph_type, data_description, user_input)
+                with st.chat_message("assistant", avatar="🤖"):
+                    ai_response = get_ai_insights(graph_type, data_description, user_input, stream=True)
                 st.session_state[chat_key].append({"role": "assistant", "content": ai_response})
                 
                 # Rerun to show new messages
@@ -247,7 +275,8 @@ def create_graph_chat_with_voice(graph_id, graph_type, data_description):
                         st.session_state[chat_key].append({"role": "user", "content": suggestion})
                         
                         # Get detailed AI response
-                        ai_response = get_ai_insights(graph_type, data_description, suggestion)
+                        with st.chat_message("assistant", avatar="🤖"):
+                            ai_response = get_ai_insights(graph_type, data_description, suggestion, stream=True)
                         st.session_state[chat_key].append({"role": "assistant", "content": ai_response})
                         
                         # Rerun to show new messages
@@ -348,7 +377,8 @@ def create_global_voice_assistant():
                     
                     # Get comprehensive AI response
                     try:
-                        response = client.chat.completions.create(
+                        response = chat.stream(
+                            label="consultant",
                             model="llama-3.1-8b-instant",
                             messages=[
                                 {"role": "system", "content": """You are a senior real estate market analyst and investment advisor with 20+ years of experience. 
@@ -360,7 +390,8 @@ def create_global_voice_assistant():
                             temperature=0.2,
                             max_tokens=500
                         )
-                        ai_response = response.choices[0].message.content
+                        with st.sidebar:
+                            ai_response = st.write_stream(response)
                         st.session_state.global_chat.append({"role": "assistant", "content": ai_response})
                         st.rerun()
                     except Exception as e:
@@ -384,7 +415,8 @@ def create_global_voice_assistant():
         
         # Get comprehensive AI response
         try:
-            response = client.chat.completions.create(
+            response = chat.stream(
+                label="consultant",
                 model="llama-3.1-8b-instant",
                 messages=[
                     {"role": "system", "content": """You are a senior real estate market analyst and investment advisor with 20+ years of experience. 
@@ -396,7 +428,8 @@ def create_global_voice_assistant():
                 temperature=0.2,
                 max_tokens=500
             )
-            ai_response = response.choices[0].message.content
+            with st.sidebar:
+                ai_response = st.write_stream(response)
             st.session_state.global_chat.append({"role": "assistant", "content": ai_response})
             st.rerun()
         except Exception as e:
@@ -427,19 +460,161 @@ def create_global_voice_assistant():
 # Sidebar Navigation
 st.sidebar.header("🔍 Dashboard Navigation")
 section = st.sidebar.radio("Go to", ["🏡 Overview", "📊 Data Visualization", "🔍 Insights"])
+render_all_charts = st.sidebar.toggle("Render all charts", value=False,
+                                      help="Otherwise only the first chart of a section is drawn until you open the others")
+cache_stats = response_cache.stats()
+st.sidebar.caption(f"⚡ AI answer cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                   f"({cache_stats['hit_rate']:.0%}), {cache_stats['size']} stored")
+st.sidebar.caption(metrics_caption(chat.metrics.summary()))
+
+# Load Data once per process (typed, with precomputed aggregates, shared read-only)
+@st.cache_resource
+def load_analytics_data():
+    return AnalyticsData.load()
+
+@st.cache_resource
+def load_feature_text():
+    return ArtifactStore().read('feature_text')
 
-# Load Data
 try:
-    new_df = pd.read_csv('datasets/data_viz1.csv')
-    feature_text = pickle.load(open('datasets/feature_text.pkl', 'rb'))
-except FileNotFoundError as e:
+    data = load_analytics_data()
+    feature_text = load_feature_text()
+except (FileNotFoundError, KeyError) as e:
     st.error(f"Data file not found: {e}")
     st.stop()
 
-new_df['total_area'] = new_df['built_up_area']
+# Chart builders, shared by all sessions and memoized per dataset version
+@st.cache_resource
+def load_chart_registry():
+    return ChartRegistry()
+
+registry = load_chart_registry()
 
-# Group Data for Map Visualization
-group_df = new_df.groupby('sector').mean(numeric_only=True)[['price', 'price_per_sqft', 'built_up_area', 'latitude', 'longitude']]
+@registry.chart("geomap")
+def build_geomap(data):
+    group_df = data.sector_means
+    return px.scatter_mapbox(
+        group_df, lat="latitude", lon="longitude", color="price_per_sqft", size='built_up_area',
+        color_continuous_scale=px.colors.cyclical.IceFire, zoom=10,
+        mapbox_style="carto-positron", width=1100, height=600, hover_name=group_df.index
+    )
+
+@registry.chart("sector_bar")
+def build_sector_bar(data):
+    group_df = data.sector_means
+    return px.bar(group_df, x=group_df.index, y='price', color='price', title='Average Price per Sector',
+                  color_continuous_scale='Viridis')
+
+@registry.chart("3d_scatter")
+def build_3d_scatter(data):
+    fig_3d, info_3d = charts.scatter_3d(data.frame, x='built_up_area', y='price', z='bedRoom',
+                                        color='property_type', title="Price vs Built-up Area vs Bedrooms",
+                                        color_continuous_scale='Viridis')
+    fig_3d.update_layout(
+        scene=dict(
+            xaxis_title='Built-up Area (sq.ft)',
+            yaxis_title='Price (₹)',
+            zaxis_title='Bedrooms (BHK)'
+        ),
+        width=1000, height=700
+    )
+    return fig_3d, info_3d
+
+@registry.chart("price_trend")
+def build_price_trend(data):
+    return px.line(
+        data.price_trend, x="sector", y="price", color="sector",
+        animation_frame="month", title="📈 Sector-wise Property Price Trend Over Time",
+        labels={"price": "Avg Price (₹)", "sector": "Sector"},
+        markers=True
+    )
+
+@registry.chart("violin_plot")
+def build_violin_plot(data):
+    return charts.violin(data.frame, x='property_type', y='price', title="Property Price Distribution by Property Type")
+
+@registry.chart("heatmap")
+def build_heatmap(data):
+    price_heatmap_data = data.price_per_sqft_pivot
+    fig_heatmap = go.Figure(data=go.Heatmap(
+        z=price_heatmap_data.values,
+        x=price_heatmap_data.columns,
+        y=price_heatmap_data.index,
+        colorscale='Viridis',
+        colorbar=dict(title='Price per Sqft'),
+    ))
+    fig_heatmap.update_layout(
+        title="Price Distribution per Square Foot",
+        xaxis_title="Property Type",
+        yaxis_title="Sector",
+        height=600,
+        width=1000,
+    )
+    return fig_heatmap
+
+@registry.chart("box_plot")
+def build_box_plot(data):
+    return box_figure(data.sector_price_box, 'Price Distribution Across Sectors', yaxis_title='price', colored=True)
+
+@registry.chart("scatter_area")
+def build_scatter_area(data):
+    fig_scatter, info_scatter = charts.scatter(data.frame, x="built_up_area", y="price", color="property_type", title="Price vs Built-up Area")
+    charts.add_trendlines(fig_scatter, data.trendlines("built_up_area", "price"))
+    return fig_scatter, info_scatter
+
+@registry.chart("scatter_bhk")
+def build_scatter_bhk(data):
+    fig_bhk_scatter, info_bhk_scatter = charts.scatter(data.frame, x="bedRoom", y="price", color="property_type", title="Price vs Number of Bedrooms")
+    charts.add_trendlines(fig_bhk_scatter, data.trendlines("bedRoom", "price"))
+    return fig_bhk_scatter, info_bhk_scatter
+
+@registry.chart("location_scatter")
+def build_location_scatter(data):
+    return charts.scatter(data.frame, x="longitude", y="latitude", color="price_per_sqft", size='built_up_area', hover_name="sector",
+                          title="Price per Sqft vs Latitude/Longitude", color_continuous_scale=px.colors.cyclical.IceFire)
+
+@registry.chart("bhk_comparison")
+def build_bhk_comparison(data):
+    return box_figure(data.bhk_price_box, 'BHK Price Range', yaxis_title='price')
+
+@registry.chart("dist_plot")
+def build_dist_plot(data):
+    distributions = group_distributions(data.frame, 'price', 'property_type')
+    return charts.distribution_figure(distributions, {'house': ('House', 'blue'), 'flat': ('Flat', 'red')},
+                                      xaxis_title='price')
+
+@registry.chart("avg_bhk")
+def build_avg_bhk(data):
+    return px.bar(data.bhk_price, x='bedRoom', y='price', color='price', title='Average Price by BHK')
+
+@registry.chart("price_sqft_type")
+def build_price_sqft_type(data):
+    return box_figure(data.type_price_per_sqft_box, "Price per Sqft by Property Type", yaxis_title="price_per_sqft", colored=True)
+
+@registry.chart("cluster_analysis")
+def build_cluster_analysis(data):
+    fig_bubble, info_bubble = charts.scatter(
+        data.frame, x="built_up_area", y="price", size="price", color="sector",
+        hover_name="sector", title="Property Price Clusters: Built-up Area vs. Price",
+        labels={"built_up_area": "Built-up Area (sq.ft)", "price": "Price (₹)"},
+        opacity=0.7, size_max=40
+    )
+    fig_bubble.update_layout(
+        width=1000, height=600,
+        xaxis_title="Built-up Area (sq.ft)",
+        yaxis_title="Price (₹)",
+        legend_title="Sector"
+    )
+    return fig_bubble, info_bubble
+
+# Draw a chart only when its container is open; returns whether it was drawn
+def render_chart(chart_id, eager=False):
+    if not (eager or render_all_charts or st.toggle("📊 Show chart", key=f"show_{chart_id}")):
+        return False
+    spec, caption = registry.spec(chart_id, data)
+    st.plotly_chart(spec, use_container_width=True)
+    st.caption(caption)
+    return True
 
 # --- Overview Section ---
 if section == "🏡 Overview":
@@ -447,76 +622,41 @@ if section == "🏡 Overview":
     
     # Display Key Metrics
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("🏠 Total Properties", len(new_df))
-    col2.metric("📍 Unique Sectors", new_df['sector'].nunique())
-    col3.metric("💰 Avg Price (₹)", f"{new_df['price'].mean():,.0f}CR")
-    col4.metric("📏 Avg Built-up Area", f"{new_df['built_up_area'].mean():,.0f} sq.ft")
+    col1.metric("🏠 Total Properties", data.summary['properties'])
+    col2.metric("📍 Unique Sectors", data.summary['sectors'])
+    col3.metric("💰 Avg Price (₹)", f"{data.summary['mean_price']:,.0f}CR")
+    col4.metric("📏 Avg Built-up Area", f"{data.summary['mean_built_up_area']:,.0f} sq.ft")
     
     st.markdown("---")
     
     # Sector Price per Sqft Geomap
     st.subheader("🌍 Sector Price per Sqft Geomap")
-    fig_map = px.scatter_mapbox(
-        group_df, lat="latitude", lon="longitude", color="price_per_sqft", size='built_up_area',
-        color_continuous_scale=px.colors.cyclical.IceFire, zoom=10,
-        mapbox_style="carto-positron", width=1100, height=600, hover_name=group_df.index
-    )
-    st.plotly_chart(fig_map, use_container_width=True)
-    
-    # AI Chat with Voice for Map
-    create_graph_chat_with_voice("geomap", "geographical scatter plot", "price per square foot across different sectors with built-up area as bubble size")
+    if render_chart("geomap", eager=True):
+        # AI Chat with Voice for Map
+        create_graph_chat_with_voice("geomap", "geographical scatter plot", "price per square foot across different sectors with built-up area as bubble size")
     
     st.markdown("---")
     
     # Avg Price per Sector Bar Chart
     st.subheader("📊 Average Price per Sector")
-    fig_bar = px.bar(group_df, x=group_df.index, y='price', color='price', title='Average Price per Sector',
-                     color_continuous_scale='Viridis')
-    st.plotly_chart(fig_bar, use_container_width=True)
-    
-    # AI Chat with Voice for Bar Chart
-    create_graph_chat_with_voice("sector_bar", "bar chart", "average property prices across different sectors")
+    if render_chart("sector_bar"):
+        # AI Chat with Voice for Bar Chart
+        create_graph_chat_with_voice("sector_bar", "bar chart", "average property prices across different sectors")
     
     st.markdown("---")
 
     # 3D Scatter Plot
     st.subheader("🔍 3D Scatter Plot: Price, Built-up Area & Bedrooms")
-    fig_3d = px.scatter_3d(new_df, x='built_up_area', y='price', z='bedRoom',
-                           color='property_type', title="Price vs Built-up Area vs Bedrooms",
-                           color_continuous_scale='Viridis')
-    
-    fig_3d.update_layout(
-        scene=dict(
-            xaxis_title='Built-up Area (sq.ft)',
-            yaxis_title='Price (₹)',
-            zaxis_title='Bedrooms (BHK)'
-        ),
-        width=1000, height=700
-    )
-    
-    st.plotly_chart(fig_3d, use_container_width=True)
-    
-    # AI Chat with Voice for 3D Plot
-    create_graph_chat_with_voice("3d_scatter", "3D scatter plot", "relationship between property price, built-up area, and number of bedrooms, colored by property type")
+    if render_chart("3d_scatter"):
+        # AI Chat with Voice for 3D Plot
+        create_graph_chat_with_voice("3d_scatter", "3D scatter plot", "relationship between property price, built-up area, and number of bedrooms, colored by property type")
     
     st.markdown("---")
 
     st.subheader("📈 Sector-wise Property Price Trend Over Time")
-    new_df['month'] = (new_df.index % 12) + 1
-
-    price_trend = new_df.groupby(['sector', 'month'], as_index=False)['price'].mean()
-
-    fig_animated = px.line(
-        price_trend, x="sector", y="price", color="sector",
-        animation_frame="month", title="📈 Sector-wise Property Price Trend Over Time",
-        labels={"price": "Avg Price (₹)", "sector": "Sector"},
-        markers=True
-    )
-
-    st.plotly_chart(fig_animated, use_container_width=True)
-    
-    # AI Chat with Voice for Animated Line Chart
-    create_graph_chat_with_voice("price_trend", "animated line chart", "sector-wise property price trends over months showing market dynamics")
+    if render_chart("price_trend"):
+        # AI Chat with Voice for Animated Line Chart
+        create_graph_chat_with_voice("price_trend", "animated line chart", "sector-wise property price trends over months showing market dynamics")
 
 # --- Data Visualization Section ---
 elif section == "📊 Data Visualization":
@@ -526,78 +666,48 @@ elif section == "📊 Data Visualization":
     
     # Property Price Distribution by Property Type (Violin Plot)
     st.subheader("🏡 Property Price Distribution by Property Type")
-    fig_violin = px.violin(new_df, x='property_type', y='price', box=True, points="all", title="Property Price Distribution by Property Type")
-    st.plotly_chart(fig_violin, use_container_width=True)
-    
-    # AI Chat with Voice for Violin Plot
-    create_graph_chat_with_voice("violin_plot", "violin plot", "property price distribution comparing houses vs flats with quartiles and data density")
+    if render_chart("violin_plot", eager=True):
+        # AI Chat with Voice for Violin Plot
+        create_graph_chat_with_voice("violin_plot", "violin plot", "property price distribution comparing houses vs flats with quartiles and data density")
     
     st.markdown("---")
     
     st.subheader("🏡 Price Distribution per Square Foot (Heatmap)")
-
-    price_heatmap_data = new_df.pivot_table(values="price_per_sqft", index="sector", columns="property_type", aggfunc="mean")
-
-    fig_heatmap = go.Figure(data=go.Heatmap(
-        z=price_heatmap_data.values,
-        x=price_heatmap_data.columns,
-        y=price_heatmap_data.index,
-        colorscale='Viridis',
-        colorbar=dict(title='Price per Sqft'),
-    ))
-
-    fig_heatmap.update_layout(
-        title="Price Distribution per Square Foot",
-        xaxis_title="Property Type",
-        yaxis_title="Sector",
-        height=600,
-        width=1000,
-    )
-    st.plotly_chart(fig_heatmap, use_container_width=True)
-    
-    # AI Chat with Voice for Heatmap
-    create_graph_chat_with_voice("heatmap", "heatmap", "price per square foot across sectors and property types showing market heat zones")
+    if render_chart("heatmap"):
+        # AI Chat with Voice for Heatmap
+        create_graph_chat_with_voice("heatmap", "heatmap", "price per square foot across sectors and property types showing market heat zones")
     
     st.markdown("---")
     
     # Property Price Distribution by Sector
     st.subheader("📊 Price Distribution by Sector")
-    fig_box = px.box(new_df, x='sector', y='price', color='sector', title='Price Distribution Across Sectors')
-    st.plotly_chart(fig_box, use_container_width=True)
-    
-    # AI Chat with Voice for Box Plot
-    create_graph_chat_with_voice("box_plot", "box plot", "price distribution across sectors showing medians, quartiles, and outliers")
+    if render_chart("box_plot"):
+        # AI Chat with Voice for Box Plot
+        create_graph_chat_with_voice("box_plot", "box plot", "price distribution across sectors showing medians, quartiles, and outliers")
 
     st.markdown("---")
     
     # Price vs Built-up Area Scatter Plot
     st.subheader("📉 Price vs Built-up Area")
-    fig_scatter = px.scatter(new_df, x="built_up_area", y="price", color="property_type", title="Price vs Built-up Area", trendline="ols")
-    st.plotly_chart(fig_scatter, use_container_width=True)
-    
-    # AI Chat with Voice for Scatter Plot
-    create_graph_chat_with_voice("scatter_area", "scatter plot", "correlation between property price and built-up area with trend lines by property type")
+    if render_chart("scatter_area"):
+        # AI Chat with Voice for Scatter Plot
+        create_graph_chat_with_voice("scatter_area", "scatter plot", "correlation between property price and built-up area with trend lines by property type")
     
     st.markdown("---")
     
     # Price vs Number of Bedrooms (BHK)
     st.subheader("🛏️ Price vs Number of Bedrooms")
-    fig_bhk_scatter = px.scatter(new_df, x="bedRoom", y="price", color="property_type", title="Price vs Number of Bedrooms", trendline="ols")
-    st.plotly_chart(fig_bhk_scatter, use_container_width=True)
-    
-    # AI Chat with Voice for BHK Scatter
-    create_graph_chat_with_voice("scatter_bhk", "scatter plot", "relationship between property price and number of bedrooms with trend analysis")
+    if render_chart("scatter_bhk"):
+        # AI Chat with Voice for BHK Scatter
+        create_graph_chat_with_voice("scatter_bhk", "scatter plot", "relationship between property price and number of bedrooms with trend analysis")
     
     st.markdown("---")
     
     # Price per Sqft vs Latitude/Longitude (Location Scatter)
     st.subheader("📍 Price per Sqft vs Location")
-    fig_loc_scatter = px.scatter(new_df, x="longitude", y="latitude", color="price_per_sqft", size='built_up_area', hover_name="sector",
-                                 title="Price per Sqft vs Latitude/Longitude", color_continuous_scale=px.colors.cyclical.IceFire)
-    st.plotly_chart(fig_loc_scatter, use_container_width=True)
-    
-    # AI Chat with Voice for Location Scatter
-    create_graph_chat_with_voice("location_scatter", "location scatter plot", "geographical distribution of price per square foot showing location-based pricing patterns")
+    if render_chart("location_scatter"):
+        # AI Chat with Voice for Location Scatter
+        create_graph_chat_with_voice("location_scatter", "location scatter plot", "geographical distribution of price per square foot showing location-based pricing patterns")
 
 # --- Insights Section ---
 elif section == "🔍 Insights":
@@ -605,68 +715,40 @@ elif section == "🔍 Insights":
     
     # BHK Price Comparison Box Plot
     st.subheader("💰 BHK Price Comparison")
-    fig_bhk_price = px.box(new_df[new_df['bedRoom'] <= 4], x='bedRoom', y='price', title='BHK Price Range')
-    st.plotly_chart(fig_bhk_price, use_container_width=True)
-    
-    # AI Chat with Voice for BHK Comparison
-    create_graph_chat_with_voice("bhk_comparison", "box plot", "price comparison across different BHK configurations (1-4 bedrooms)")
+    if render_chart("bhk_comparison", eager=True):
+        # AI Chat with Voice for BHK Comparison
+        create_graph_chat_with_voice("bhk_comparison", "box plot", "price comparison across different BHK configurations (1-4 bedrooms)")
     
     st.markdown("---")
     
     # Side by Side Property Type Price Distribution
     st.subheader("📈 Property Type Price Distribution")
-    fig_distplot, ax = plt.subplots(figsize=(10, 4))
-    sns.histplot(new_df[new_df['property_type'] == 'house']['price'], label='House', kde=True, color='blue', ax=ax)
-    sns.histplot(new_df[new_df['property_type'] == 'flat']['price'], label='Flat', kde=True, color='red', ax=ax)
-    ax.legend()
-    st.pyplot(fig_distplot)
-    
-    # AI Chat with Voice for Distribution Plot
-    create_graph_chat_with_voice("dist_plot", "distribution histogram", "price distribution comparison between houses and flats with density curves")
+    if render_chart("dist_plot"):
+        # AI Chat with Voice for Distribution Plot
+        create_graph_chat_with_voice("dist_plot", "distribution histogram", "price distribution comparison between houses and flats with density curves")
     
     st.markdown("---")
     
     # Average Price by Bedroom Count
     st.subheader("🏠 Average Price by BHK")
-    avg_price_bhk = new_df.groupby('bedRoom')['price'].mean().reset_index()
-    fig_avg_bhk = px.bar(avg_price_bhk, x='bedRoom', y='price', color='price', title='Average Price by BHK')
-    st.plotly_chart(fig_avg_bhk, use_container_width=True)
-    
-    # AI Chat with Voice for Average Price BHK
-    create_graph_chat_with_voice("avg_bhk", "bar chart", "average property prices by bedroom count showing pricing tiers")
+    if render_chart("avg_bhk"):
+        # AI Chat with Voice for Average Price BHK
+        create_graph_chat_with_voice("avg_bhk", "bar chart", "average property prices by bedroom count showing pricing tiers")
     
     st.markdown("---")
     
     # Price per Sqft by Property Type
     st.subheader("🏡 Price per Sqft by Property Type")
-    fig_price_sqft = px.box(new_df, x="property_type", y="price_per_sqft", color="property_type", title="Price per Sqft by Property Type")
-    st.plotly_chart(fig_price_sqft, use_container_width=True)
-    
-    # AI Chat with Voice for Price per Sqft
-    create_graph_chat_with_voice("price_sqft_type", "box plot", "price per square foot comparison between property types")
+    if render_chart("price_sqft_type"):
+        # AI Chat with Voice for Price per Sqft
+        create_graph_chat_with_voice("price_sqft_type", "box plot", "price per square foot comparison between property types")
     
     st.markdown("---")
 
     st.subheader("💡 Cluster Analysis: Price vs. Built-up Area across Sectors")
-
-    fig_bubble = px.scatter(
-        new_df, x="built_up_area", y="price", size="price", color="sector",
-        hover_name="sector", title="Property Price Clusters: Built-up Area vs. Price",
-        labels={"built_up_area": "Built-up Area (sq.ft)", "price": "Price (₹)"},
-        opacity=0.7, size_max=40
-    )
-
-    fig_bubble.update_layout(
-        width=1000, height=600,
-        xaxis_title="Built-up Area (sq.ft)",
-        yaxis_title="Price (₹)",
-        legend_title="Sector"
-    )
-
-    st.plotly_chart(fig_bubble, use_container_width=True)
-    
-    # AI Chat with Voice for Cluster Analysis
-    create_graph_chat_with_voice("cluster_analysis", "bubble chart", "property price clusters showing relationship between built-up area and price across different sectors")
+    if render_chart("cluster_analysis"):
+        # AI Chat with Voice for Cluster Analysis
+        create_graph_chat_with_voice("cluster_analysis", "bubble chart", "property price clusters showing relationship between built-up area and price across different sectors")
 
 # Enhanced Global AI Assistant with Voice Support
 create_global_voice_assistant()
@@ -1,30 +1,50 @@
 import streamlit as st
-import pickle
+import os
 import pandas as pd
-import numpy as np
+from real_estate.ann import ANN_PATH, load_or_build
+from real_estate.embeddings import load_embeddings
+from real_estate.geo import LandmarkDistances, SpatialIndex, load_coordinates, unlocated_projects
+from real_estate.recommender import Recommender
 
 # Set Streamlit page config
 st.set_page_config(page_title="🏡 Apartment Recommender", page_icon="🏠", layout="wide")
 
 # Load Data
 property_data = pd.read_csv("datasets/appartments.csv")  # Load CSV with all property details
-location_df = pickle.load(open('datasets/location_df_merge.pkl', 'rb'))
-cosine_sim1 = pickle.load(open('datasets/cosine_sim1.pkl', 'rb'))
-cosine_sim2 = pickle.load(open('datasets/cosine_sim2.pkl', 'rb'))
-cosine_sim3 = pickle.load(open('datasets/cosine_sim3.pkl', 'rb'))
+
+# Facilities, pricing and location similarity views, computed on demand from
+# compact embeddings (shared across sessions). An ANN index built offline with
+# `python -m real_estate.ann` is used when present (rebuilt if the embeddings changed).
+@st.cache_resource
+def load_recommender():
+    names, views = load_embeddings()
+    index = load_or_build(views) if os.path.exists(ANN_PATH) else None
+    return Recommender(names, views, index)
+
+recommender = load_recommender()
+
+# Ball tree over apartment coordinates for searches around any point
+@st.cache_resource
+def load_spatial_index():
+    return SpatialIndex.from_frame(load_coordinates())
+
+spatial_index = load_spatial_index()
+unlocated = unlocated_projects()
+
+# Apartment x landmark distances, built per landmark on demand
+@st.cache_resource
+def load_landmark_distances():
+    return LandmarkDistances.load()
+
+landmark_distances = load_landmark_distances()
 
 # 🎯 Function to Recommend Properties
 def recommend_properties(property_name, w1=0.5, w2=0.8, w3=1, top_n=5):
-    cosine_sim_matrix = w1 * cosine_sim1 + w2 * cosine_sim2 + w3 * cosine_sim3
-    sim_scores = list(enumerate(cosine_sim_matrix[location_df.index.get_loc(property_name)]))
-    sorted_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-    
-    top_indices = [i[0] for i in sorted_scores[1:top_n + 1]]
-    top_scores = [round(i[1], 3) for i in sorted_scores[1:top_n + 1]]  # Round scores
-    top_properties = location_df.index[top_indices].tolist()
-    links = property_data.set_index("PropertyName").loc[top_properties]["Link"].tolist()
-    
-    return pd.DataFrame({'Property Name': top_properties, 'Similarity Score': top_scores, 'Link': links})
+    recommendations = recommender.recommend([property_name], (w1, w2, w3), top_n)[0]
+    recommendations['Similarity Score'] = recommendations['Similarity Score'].round(3)  # Round scores
+    links = property_data.drop_duplicates("PropertyName").set_index("PropertyName")["Link"]
+    recommendations['Link'] = links.reindex(recommendations['Property Name']).tolist()
+    return recommendations
 
 # 🔷 Sidebar
 with st.sidebar:
@@ -38,20 +58,47 @@ with st.sidebar:
 st.markdown("## 📍 Find Nearby Apartments")
 col1, col2 = st.columns(2)
 with col1:
-    selected_location = st.selectbox('🔍 Select Location:', sorted(location_df.columns.to_list()), help="Start typing to search")
+    selected_location = st.selectbox('🔍 Select Location:', sorted(landmark_distances.landmarks.to_list()), help="Start typing to search")
 with col2:
     radius = st.slider('📏 Radius (in Kms)', 1, 50, 5, 1)
 
 if st.button('🔎 Search Apartments'):
-    result_ser = location_df[location_df[selected_location] < radius * 1000][selected_location].sort_values()
+    result_ser = landmark_distances.within(selected_location, radius * 1000)
     st.success(f"Found **{len(result_ser)}** apartments within {radius} km of **{selected_location}**")
     for key, value in result_ser.items():
         st.markdown(f"🏠 **{key}** - {round(value / 1000, 2)} km")
 
+# 🗺️ Search around any coordinates
+with st.expander("🗺️ Search around a map location"):
+    st.caption(f"Apartment positions are approximated by their sector centre, so projects in one sector "
+               f"share a point and tie. {len(unlocated)} projects have no known sector centre and are "
+               f"left out of this search.")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        latitude = st.number_input('Latitude', value=28.4595, format="%.4f")
+    with col2:
+        longitude = st.number_input('Longitude', value=77.0266, format="%.4f")
+    with col3:
+        nearest_k = st.number_input('Nearest if none in radius', 1, 20, 5)
+
+    if st.button('📌 Search Around Point'):
+        result_ser = spatial_index.within(latitude, longitude, radius * 1000)
+        if result_ser.empty:
+            result_ser = spatial_index.nearest(latitude, longitude, nearest_k)
+            st.info(f"No apartments within {radius} km, showing the {len(result_ser)} nearest")
+        else:
+            st.success(f"Found **{len(result_ser)}** apartments within {radius} km")
+        st.caption(f"📍 Distances are to sector centres, not to the buildings. Not searched "
+                   f"({len(unlocated)} projects without a sector centre): {', '.join(unlocated)}")
+        for key, value in result_ser.items():
+            shared = spatial_index.sharing[key] - 1
+            note = f" · same sector centre as {shared} other project{'s' if shared > 1 else ''}" if shared else ""
+            st.markdown(f"🏠 **{key}** - {round(value / 1000, 2)} km{note}")
+
 # 🏡 Section: Apartment Recommendation
 st.markdown("---")
 st.markdown("## 🏡 Get Similar Apartment Recommendations")
-selected_apartment = st.selectbox('🏠 Select an Apartment:', sorted(location_df.index.to_list()), help="Start typing to search")
+selected_apartment = st.selectbox('🏠 Select an Apartment:', sorted(recommender.names.to_list()), help="Start typing to search")
 
 # 🎛️ Adjust Similarity Weights
 st.markdown("### ⚖️ Adjust Similarity Weights")
@@ -0,0 +1 @@
+"""Shared building blocks for the Gurgaon Real Estate Analytics Streamlit pages."""
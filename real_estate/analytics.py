@@ -0,0 +1,149 @@
+"""Shared, read-only data layer for the Analysis App.
+
+``pages/3_Analysis App.py`` used to re-read ``data_viz1.csv`` on every rerun,
+add its derived columns in place and redo the group-bys behind the charts.
+``AnalyticsData`` parses and types the dataset once per process (categorical
+``sector`` and ``property_type``), precomputes those aggregates, and hands out
+shallow copies backed by read-only arrays: a session can add columns to its
+copy, but writing into shared values raises instead of leaking into other
+sessions.
+
+Chart aggregates are rolled up from an ``AggregateCube`` (``real_estate.cube``),
+loaded from ``datasets/analytics_cube.npz`` when it was built from the same
+data file and built in memory otherwise. Trendline fits (``real_estate.trendlines``)
+are computed on first use and kept for the life of the dataset version.
+"""
+import os
+import threading
+
+import pandas as pd
+
+from real_estate.compiled_model import file_sha256
+from real_estate.cube import CUBE_PATH, AggregateCube
+from real_estate.trendlines import Trendlines
+
+DATA_VIZ_PATH = 'datasets/data_viz1.csv'
+CATEGORICAL_COLUMNS = ['sector', 'property_type']
+SECTOR_COLUMNS = ['price', 'price_per_sqft', 'built_up_area', 'latitude', 'longitude']
+
+
+def read_only(frame):
+    """A copy of ``frame`` whose column arrays reject in-place writes"""
+    columns = {}
+    for name, column in frame.items():
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy().copy()
+            codes.flags.writeable = False
+            columns[name] = pd.Categorical.from_codes(codes, dtype=column.dtype)
+        else:
+            values = column.to_numpy().copy()
+            values.flags.writeable = False
+            columns[name] = values
+    return pd.DataFrame(columns, index=frame.index, copy=False)
+
+
+def _plain_labels(frame):
+    """Aggregates keep string labels so charts see the same axes as before"""
+    if isinstance(frame.index, pd.CategoricalIndex):
+        frame.index = frame.index.astype(str)
+    if isinstance(frame.columns, pd.CategoricalIndex):
+        frame.columns = frame.columns.astype(str)
+    for name, column in frame.items():
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            frame[name] = column.astype(str)
+    return frame
+
+
+class AnalyticsData:
+    """The typed dataset and every aggregate the dashboard draws, built once"""
+
+    def __init__(self, frame, version=None, cube=None):
+        frame = frame.copy()
+        for column in CATEGORICAL_COLUMNS:
+            frame[column] = frame[column].astype('category')
+        frame['total_area'] = frame['built_up_area']
+        frame['month'] = (frame.index % 12) + 1
+
+        self.version = version
+        self._frame = read_only(frame)
+        self._trendlines = {}
+        self._trendlines_lock = threading.Lock()
+        if cube is None or cube.version is None or cube.version != version:
+            cube = AggregateCube.build(frame, version=version)
+        self.cube = cube
+
+        def small_bhk(cells):
+            return cells['bedRoom'] <= 4
+
+        self._tables = {
+            'sector_means': cube.means(['sector'], SECTOR_COLUMNS),
+            'price_trend': cube.means(['sector', 'month'], ['price']).reset_index(),
+            'price_per_sqft_pivot': cube.means(['sector', 'property_type'], ['price_per_sqft'])['price_per_sqft'].unstack(),
+            'bhk_price': cube.means(['bedRoom'], ['price']).reset_index(),
+            'sector_price_box': cube.box_stats(['sector'], 'price'),
+            'bhk_price_box': cube.box_stats(['bedRoom'], 'price', where=small_bhk),
+            'type_price_per_sqft_box': cube.box_stats(['property_type'], 'price_per_sqft'),
+        }
+        self._tables = {name: read_only(_plain_labels(table)) for name, table in self._tables.items()}
+        price, area = cube.stats(None, 'price'), cube.stats(None, 'built_up_area')
+        self.summary = {
+            'properties': int(price['count'].iloc[0]),
+            'sectors': int(cube.cells['sector'].nunique()),
+            'mean_price': float(price['mean'].iloc[0]),
+            'mean_built_up_area': float(area['mean'].iloc[0]),
+        }
+
+    @classmethod
+    def load(cls, path=DATA_VIZ_PATH, cube_path=CUBE_PATH):
+        cube = AggregateCube.load(cube_path) if os.path.exists(cube_path) else None
+        return cls(pd.read_csv(path), version=file_sha256(path), cube=cube)
+
+    @property
+    def frame(self):
+        return self._frame.copy(deep=False)
+
+    def table(self, name):
+        return self._tables[name].copy(deep=False)
+
+    def trendlines(self, x, y, by='property_type'):
+        """OLS fits and confidence bands of ``y`` on ``x`` per ``by`` group, fitted once"""
+        key = (x, y, by)
+        with self._trendlines_lock:
+            if key not in self._trendlines:
+                self._trendlines[key] = Trendlines(self._frame, x, y, by, self.version)
+            return self._trendlines[key]
+
+    @property
+    def sector_means(self):
+        """Mean price, price/sqft, area and position per sector (map and bar chart)"""
+        return self.table('sector_means')
+
+    @property
+    def price_trend(self):
+        """Mean price per sector and month (animated line chart)"""
+        return self.table('price_trend')
+
+    @property
+    def price_per_sqft_pivot(self):
+        """Mean price per sqft, sector x property type (heatmap)"""
+        return self.table('price_per_sqft_pivot')
+
+    @property
+    def bhk_price(self):
+        """Mean price per bedroom count"""
+        return self.table('bhk_price')
+
+    @property
+    def sector_price_box(self):
+        """Price quartiles and fences per sector"""
+        return self.table('sector_price_box')
+
+    @property
+    def bhk_price_box(self):
+        """Price quartiles and fences for 1-4 BHK"""
+        return self.table('bhk_price_box')
+
+    @property
+    def type_price_per_sqft_box(self):
+        """Price per sqft quartiles and fences per property type"""
+        return self.table('type_price_per_sqft_box')
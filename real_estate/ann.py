@@ -0,0 +1,277 @@
+"""Approximate nearest-neighbour search for the apartment recommender.
+
+The weighted score ``w1*s1 + w2*s2 + w3*s3`` over the three cosine views equals
+the inner product between an item's concatenated view vectors and the query's
+concatenated vectors scaled per view by the weights. That lets one index over
+the concatenated item vectors serve every weight setting:
+
+* ``ExactIndex`` - brute-force inner products (the reference)
+* ``IVFIndex``   - inverted file: spherical k-means lists, only ``n_probe`` lists
+  are scored per query (pure NumPy)
+* ``FaissIndex`` - the same IVF idea through faiss, when it is installed
+
+A saved ``IVFIndex`` records the sha256 of the embeddings file it was built
+from; ``load_or_build`` rebuilds it in memory when the embeddings have changed.
+
+Usage::
+
+    python -m real_estate.ann --lists 16 --probe 4 --benchmark --synthetic 50000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from real_estate.compiled_model import file_sha256
+from real_estate.embeddings import EMBEDDINGS_PATH, low_rank_basis
+from real_estate.recommender import top_k
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+ANN_PATH = 'datasets/recommender_ann.npz'
+KMEANS_ITERATIONS = 20
+
+
+def item_matrix(views, max_dim=None):
+    """Concatenated float32 item vectors and the width of each view's block
+
+    ``max_dim`` truncates wide views to their leading singular directions, which
+    makes scores approximate as well as the search.
+    """
+    blocks = []
+    for view in views:
+        vectors = view.vectors.toarray() if hasattr(view.vectors, 'toarray') else np.asarray(view.vectors)
+        if max_dim is not None and vectors.shape[1] > max_dim:
+            vectors = low_rank_basis(vectors.astype(np.float64), max_dim)
+        blocks.append(vectors.astype(np.float32))
+    return np.hstack(blocks), [block.shape[1] for block in blocks]
+
+
+def weighted_queries(items, view_dims, query_positions, weights):
+    """Query vectors whose inner product with ``items`` is the weighted similarity"""
+    scale = np.repeat(np.asarray(weights, dtype=np.float32), view_dims)
+    return items[np.atleast_1d(query_positions)] * scale
+
+
+def _exclude_self(positions, scores, query_positions, k):
+    keep = positions != np.asarray(query_positions)[:, None]
+    out_positions = np.empty((positions.shape[0], k), dtype=np.intp)
+    out_scores = np.empty((positions.shape[0], k))
+    for q in range(positions.shape[0]):
+        out_positions[q] = positions[q][keep[q]][:k]
+        out_scores[q] = scores[q][keep[q]][:k]
+    return out_positions, out_scores
+
+
+class ExactIndex:
+    """Brute-force inner product search over all items"""
+
+    def __init__(self, items, view_dims):
+        self.items = items
+        self.view_dims = view_dims
+
+    def search(self, query_positions, weights, k=5):
+        """Top-k (positions, scores) per query position, excluding the query itself"""
+        query_positions = np.atleast_1d(query_positions)
+        queries = weighted_queries(self.items, self.view_dims, query_positions, weights)
+        positions, scores = top_k(queries @ self.items.T, k + 1)
+        return _exclude_self(positions, scores, query_positions, k)
+
+
+class IVFIndex:
+    """Inverted-file index: items bucketed by their nearest k-means centroid"""
+
+    def __init__(self, items, view_dims, centroids, list_offsets, list_items, n_probe=4, source_sha256=None):
+        self.items = items
+        self.view_dims = view_dims
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_items = list_items
+        self.n_probe = n_probe
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def build(cls, items, view_dims, n_lists=16, n_probe=4, seed=0):
+        """Spherical k-means over the item vectors, then one inverted list per centroid"""
+        rng = np.random.default_rng(seed)
+        n_lists = min(n_lists, items.shape[0])
+        norms = np.linalg.norm(items, axis=1, keepdims=True)
+        unit = items / np.where(norms == 0, 1, norms)
+        centroids = unit[rng.choice(items.shape[0], n_lists, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = np.argmax(unit @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, unit)
+            lengths = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Keep the previous centroid for lists that went empty
+            centroids = np.where(lengths > 0, sums / np.where(lengths == 0, 1, lengths), centroids)
+        assignment = np.argmax(unit @ centroids.T, axis=1)
+        order = np.argsort(assignment, kind='stable')
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        return cls(items, view_dims, centroids.astype(np.float32), list_offsets, order, n_probe)
+
+    def search(self, query_positions, weights, k=5, n_probe=None):
+        """Approximate top-k (positions, scores) per query, excluding the query itself
+
+        Probing widens past ``n_probe`` lists until they hold ``k`` candidates, so
+        results are only padded (position -1, score -inf) when the whole index
+        has fewer than ``k + 1`` items.
+        """
+        query_positions = np.atleast_1d(query_positions)
+        n_lists = self.centroids.shape[0]
+        n_probe = min(n_probe or self.n_probe, n_lists)
+        queries = weighted_queries(self.items, self.view_dims, query_positions, weights)
+        ranked, _ = top_k(queries @ self.centroids.T, n_lists)
+        list_sizes = np.diff(self.list_offsets)
+
+        positions = np.full((query_positions.size, k), -1, dtype=np.intp)
+        scores = np.full((query_positions.size, k), -np.inf)
+        for q, lists in enumerate(ranked):
+            # The query itself may sit in a probed list, hence k + 1
+            enough = np.searchsorted(np.cumsum(list_sizes[lists]), k + 1) + 1
+            lists = lists[:max(n_probe, enough)]
+            candidates = np.concatenate([
+                self.list_items[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists
+            ])
+            candidates = np.sort(candidates[candidates != query_positions[q]])
+            if candidates.size == 0:
+                continue
+            best, best_scores = top_k(self.items[candidates] @ queries[q], k)
+            positions[q, :best.shape[1]] = candidates[best[0]]
+            scores[q, :best.shape[1]] = best_scores[0]
+        return positions, scores
+
+    def save(self, path=ANN_PATH):
+        np.savez_compressed(path, items=self.items, view_dims=np.asarray(self.view_dims),
+                            centroids=self.centroids, list_offsets=self.list_offsets,
+                            list_items=self.list_items, n_probe=self.n_probe,
+                            source_sha256=np.asarray(self.source_sha256 or ''))
+
+    @classmethod
+    def load(cls, path=ANN_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            source_sha256 = str(data['source_sha256']) if 'source_sha256' in data.files else None
+            return cls(data['items'], data['view_dims'].tolist(), data['centroids'],
+                       data['list_offsets'], data['list_items'], int(data['n_probe']), source_sha256 or None)
+
+
+def load_or_build(views, path=ANN_PATH, embeddings_path=EMBEDDINGS_PATH):
+    """The saved IVF index if it was built from the current embeddings file, else a fresh one"""
+    source_sha256 = file_sha256(embeddings_path)
+    if os.path.exists(path):
+        index = IVFIndex.load(path)
+        if index.source_sha256 == source_sha256:
+            return index
+        index = build_index(views, n_lists=index.centroids.shape[0], n_probe=index.n_probe)
+    else:
+        index = build_index(views)
+    index.source_sha256 = source_sha256
+    return index
+
+
+class FaissIndex:
+    """IVF search through faiss (optional dependency)"""
+
+    def __init__(self, items, view_dims, n_lists=16, n_probe=4):
+        if faiss is None:
+            raise ImportError("faiss is not installed. Please run: pip install faiss-cpu")
+        self.items = np.ascontiguousarray(items, dtype=np.float32)
+        self.view_dims = view_dims
+        quantizer = faiss.IndexFlatIP(items.shape[1])
+        self.index = faiss.IndexIVFFlat(quantizer, items.shape[1], min(n_lists, items.shape[0]),
+                                        faiss.METRIC_INNER_PRODUCT)
+        self.index.train(self.items)
+        self.index.add(self.items)
+        self.index.nprobe = n_probe
+
+    def search(self, query_positions, weights, k=5):
+        query_positions = np.atleast_1d(query_positions)
+        queries = np.ascontiguousarray(weighted_queries(self.items, self.view_dims, query_positions, weights))
+        scores, positions = self.index.search(queries, k + 1)
+        return _exclude_self(positions.astype(np.intp), scores.astype(np.float64), query_positions, k)
+
+
+def build_index(views, backend='ivf', n_lists=16, n_probe=4, max_dim=None):
+    items, view_dims = item_matrix(views, max_dim)
+    if backend == 'exact':
+        return ExactIndex(items, view_dims)
+    if backend == 'faiss':
+        return FaissIndex(items, view_dims, n_lists, n_probe)
+    return IVFIndex.build(items, view_dims, n_lists, n_probe)
+
+
+def benchmark(index, exact, query_positions, weights, k=5):
+    """Recall@k of ``index`` against ``exact`` and mean per-query latency of both"""
+    results = {}
+    for name, searcher in (('exact', exact), ('ann', index)):
+        start = time.perf_counter()
+        positions = [searcher.search(q, weights, k)[0][0] for q in query_positions]
+        results[name] = (positions, (time.perf_counter() - start) / len(query_positions))
+    hits = sum(len(set(a) & set(b)) for a, b in zip(results['exact'][0], results['ann'][0]))
+    return {
+        'recall_at_k': hits / (k * len(query_positions)),
+        'exact_ms': results['exact'][1] * 1000,
+        'ann_ms': results['ann'][1] * 1000,
+    }
+
+
+class _Vectors:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+
+def synthetic_views(views, n_items, noise=0.05, seed=0):
+    """A larger catalogue made of jittered copies of the real items (for benchmarks)"""
+    rng = np.random.default_rng(seed)
+    source = rng.integers(0, len(views[0]), n_items)
+    synthetic = []
+    for view in views:
+        vectors = view.vectors.toarray() if hasattr(view.vectors, 'toarray') else np.asarray(view.vectors)
+        vectors = vectors[source] + rng.normal(0, noise, (n_items, vectors.shape[1])).astype(np.float32)
+        synthetic.append(_Vectors(vectors / np.linalg.norm(vectors, axis=1, keepdims=True)))
+    return synthetic
+
+
+def main(argv=None):
+    from real_estate.embeddings import load_embeddings
+
+    parser = argparse.ArgumentParser(description="Build and benchmark the recommender's ANN index")
+    parser.add_argument('--embeddings', default=EMBEDDINGS_PATH)
+    parser.add_argument('--output', default=ANN_PATH)
+    parser.add_argument('--backend', choices=['ivf', 'faiss'], default='ivf')
+    parser.add_argument('--lists', type=int, default=16, help="Number of inverted lists")
+    parser.add_argument('--probe', type=int, default=4, help="Lists scored per query")
+    parser.add_argument('--max-dim', type=int, default=None, help="Max dimensions per view")
+    parser.add_argument('--benchmark', action='store_true', help="Report recall@k and latency vs exact search")
+    parser.add_argument('--synthetic', type=int, default=0, help="Benchmark on a jittered catalogue of this size")
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    _, views = load_embeddings(args.embeddings)
+    if args.synthetic:
+        views = synthetic_views(views, args.synthetic)
+    index = build_index(views, args.backend, args.lists, args.probe, args.max_dim)
+    if not args.synthetic and isinstance(index, IVFIndex):
+        index.source_sha256 = file_sha256(args.embeddings)
+        index.save(args.output)
+        print(f"Wrote {args.output}")
+
+    if args.benchmark:
+        exact = ExactIndex(index.items, index.view_dims)
+        queries = np.random.default_rng(1).choice(index.items.shape[0], min(200, index.items.shape[0]), replace=False)
+        for probe in sorted({1, args.probe, args.probe * 2, args.lists}):
+            if isinstance(index, IVFIndex):
+                index.n_probe = probe
+            elif isinstance(index, FaissIndex):
+                index.index.nprobe = probe
+            result = benchmark(index, exact, queries, (0.5, 0.8, 1.0), args.k)
+            print(f"n_probe={probe:>3}: recall@{args.k} {result['recall_at_k']:.3f}  "
+                  f"exact {result['exact_ms']:.2f} ms/query  ann {result['ann_ms']:.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
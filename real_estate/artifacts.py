@@ -0,0 +1,131 @@
+"""Columnar, memory-mapped storage for the app's data artifacts.
+
+Pickles have to be fully deserialized (and copied) by every process that loads
+them. The store keeps each artifact in a format the OS can page in lazily:
+
+* frames - Arrow IPC files, opened with ``pyarrow.memory_map``; numeric columns
+  without nulls reach pandas without a copy
+* arrays - ``.npy`` files opened with ``np.load(mmap_mode='r')``
+* text   - UTF-8 files
+
+Memory-mapped pages live in the OS page cache, so several Streamlit worker
+processes reading the same file share one copy. ``manifest.json`` records each
+artifact's file, shape, dtypes and SHA-256 so ``verify`` can detect drift.
+
+Usage::
+
+    python -m real_estate.artifacts --verify
+
+The store was converted once from the notebooks' pickles (``df.pkl`` and
+``feature_text.pkl``), which were then removed from the tree; the manifest's
+``source`` fields record where each artifact came from. A new artifact is added
+with ``ArtifactStore.write`` and ``save_manifest``; never edit ``manifest.json``
+by hand. The recommender's dense similarity matrices are not stored at all
+(see ``real_estate.embeddings``).
+"""
+import argparse
+import json
+import os
+import pickle
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc
+
+from real_estate.compiled_model import file_sha256
+
+ARTIFACTS_DIR = 'datasets/artifacts'
+MANIFEST_NAME = 'manifest.json'
+
+EXTENSIONS = {'table': '.arrow', 'array': '.npy', 'text': '.txt'}
+
+
+def read_frame(path):
+    """DataFrame from a memory-mapped Arrow file (or, for older trees, a pickle)"""
+    if path.endswith('.pkl'):
+        with open(path, 'rb') as file:
+            return pickle.load(file)
+    with pa.memory_map(path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+class ArtifactStore:
+    """A directory of artifacts described by a manifest"""
+
+    def __init__(self, root=ARTIFACTS_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_NAME)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as file:
+                self.manifest = json.load(file)
+
+    def __contains__(self, name):
+        return name in self.manifest
+
+    def path(self, name):
+        return os.path.join(self.root, self.manifest[name]['file'])
+
+    def _record(self, name, kind, source, **details):
+        file_name = name + EXTENSIONS[kind]
+        self.manifest[name] = {
+            'file': file_name,
+            'kind': kind,
+            'source': source,
+            'sha256': file_sha256(os.path.join(self.root, file_name)),
+            **details,
+        }
+
+    def write(self, name, value, source=None):
+        """Store a DataFrame, ndarray or str under ``name`` and record it in the manifest"""
+        os.makedirs(self.root, exist_ok=True)
+        if isinstance(value, str):
+            with open(os.path.join(self.root, name + '.txt'), 'w', encoding='utf-8') as file:
+                file.write(value)
+            self._record(name, 'text', source, length=len(value))
+        elif isinstance(value, np.ndarray):
+            np.save(os.path.join(self.root, name + '.npy'), np.ascontiguousarray(value))
+            self._record(name, 'array', source, shape=list(value.shape), dtype=str(value.dtype))
+        else:
+            table = pa.Table.from_pandas(value, preserve_index=False)
+            with pa.OSFile(os.path.join(self.root, name + '.arrow'), 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            self._record(name, 'table', source, shape=list(value.shape),
+                         dtypes={column: str(dtype) for column, dtype in value.dtypes.items()})
+
+    def save_manifest(self):
+        with open(self.manifest_path, 'w') as file:
+            json.dump(self.manifest, file, indent=2, sort_keys=True)
+            file.write('\n')
+
+    def read(self, name):
+        """The artifact as a DataFrame, read-only memory-mapped ndarray or str"""
+        kind = self.manifest[name]['kind']
+        if kind == 'table':
+            return read_frame(self.path(name))
+        if kind == 'array':
+            return np.load(self.path(name), mmap_mode='r')
+        with open(self.path(name), encoding='utf-8') as file:
+            return file.read()
+
+    def verify(self):
+        """Names whose file no longer matches the manifest hash"""
+        return [name for name in self.manifest if file_sha256(self.path(name)) != self.manifest[name]['sha256']]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Verify the columnar artifact store")
+    parser.add_argument('--root', default=ARTIFACTS_DIR)
+    parser.add_argument('--verify', action='store_true', help="Check every file against its manifest hash")
+    args = parser.parse_args(argv)
+
+    store = ArtifactStore(args.root)
+    if args.verify:
+        stale = store.verify()
+        print("All artifacts match the manifest" if not stale else f"Changed since build: {stale}")
+
+
+if __name__ == "__main__":
+    main()
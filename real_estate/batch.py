@@ -0,0 +1,226 @@
+"""Batch price prediction for whole CSV/Parquet files.
+
+Files are streamed through the pipeline in fixed size chunks and the results are
+written out chunk by chunk, so memory stays bounded by the chunk size rather than
+the file size. A chunk that fails to score (an unseen category, an unparseable
+number) is retried row by row: the bad rows get NaN prices and a message in the
+``error`` column instead of aborting the file half-written. Usage::
+
+    python -m real_estate.batch listings.csv priced.csv --chunksize 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from real_estate.model_registry import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, NUMERIC_COLUMNS, ModelRegistry, get_registry
+
+# Half-width of the price range shown to users (in crores)
+PRICE_BAND = 0.22
+
+DEFAULT_CHUNKSIZE = 50_000
+PRICE_COLUMNS = ['predicted_price', 'price_low', 'price_high']
+
+
+def price_range(log_price, property_types, sectors, intervals=None):
+    """Return (price, low, high) arrays in crores for the model's log1p predictions
+
+    ``intervals`` is an optional IntervalTable; without it the range is the fixed
+    ``PRICE_BAND`` either side of the estimate.
+    """
+    log_price = np.asarray(log_price, dtype=float)
+    price = np.expm1(log_price)
+    if intervals is None:
+        return price, price - PRICE_BAND, price + PRICE_BAND
+    low, high = intervals.bounds(log_price, property_types, sectors)
+    return price, low, high
+
+
+def predict_prices(pipeline, frame, intervals=None):
+    """Return (price, low, high) arrays in crores for every row of ``frame``"""
+    log_price = pipeline.predict(frame[FEATURE_COLUMNS])
+    return price_range(log_price, frame['property_type'], frame['sector'], intervals)
+
+
+def prepare_features(frame):
+    """Validate and coerce a raw chunk to the 12-column training schema"""
+    missing = [c for c in FEATURE_COLUMNS if c not in frame.columns]
+    if missing:
+        raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+    features = frame[FEATURE_COLUMNS].copy()
+    features[NUMERIC_COLUMNS] = features[NUMERIC_COLUMNS].astype(float)
+    for column in CATEGORICAL_COLUMNS:
+        features[column] = features[column].astype(str)
+    return features
+
+
+def _file_format(source):
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '')
+    return 'parquet' if str(name).lower().endswith(('.parquet', '.pq')) else 'csv'
+
+
+def iter_chunks(source, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrame chunks from a CSV or Parquet path / file object"""
+    if _file_format(source) == 'parquet':
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        dtypes = {c: str for c in CATEGORICAL_COLUMNS}
+        yield from pd.read_csv(source, chunksize=chunksize, dtype=dtypes)
+
+
+def _output_schema(frame):
+    """Parquet schema for scored chunks shaped like ``frame``
+
+    Fixed up front rather than inferred per chunk: a later chunk with a missing
+    value in an integer column, or an all-empty first chunk, must not change a
+    column's type mid-file.
+    """
+    import pyarrow as pa
+
+    fields = []
+    for field in pa.Schema.from_pandas(frame, preserve_index=False):
+        if field.name in CATEGORICAL_COLUMNS or field.name == 'error' or pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        elif field.name in NUMERIC_COLUMNS or field.name in PRICE_COLUMNS or pa.types.is_integer(field.type):
+            field = field.with_type(pa.float64())
+        fields.append(field)
+    return pa.schema(fields)
+
+
+class _ChunkWriter:
+    """Append scored chunks to a CSV or Parquet destination"""
+
+    def __init__(self, destination, file_format):
+        self.destination = destination
+        self.file_format = file_format
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, frame):
+        if self.file_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.destination, _output_schema(frame))
+            schema = self._parquet_writer.schema
+            frame = frame[schema.names].copy()
+            for name in schema.names:
+                # An unparseable number is already explained by the row's error
+                if pa.types.is_floating(schema.field(name).type):
+                    frame[name] = pd.to_numeric(frame[name], errors='coerce')
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            self._parquet_writer.write_table(table.cast(schema))
+        else:
+            frame.to_csv(self.destination, mode='a' if self._wrote_header else 'w',
+                         header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+def _score_rows(pipeline, chunk, intervals, error):
+    """``(price, low, high, error)`` for each row of a ``chunk`` that failed as a whole with ``error``
+
+    The failing range is halved and each half scored, recursively, so a bad row
+    costs O(log n) extra predictions instead of one per row of the chunk.
+    """
+    results = np.full((len(chunk), 3), np.nan)
+    errors = np.full(len(chunk), None, dtype=object)
+
+    def bisect(start, stop, error):
+        if stop - start == 1:
+            errors[start] = str(error) or type(error).__name__
+            return
+        middle = (start + stop) // 2
+        for low, high in ((start, middle), (middle, stop)):
+            try:
+                results[low:high] = np.column_stack(
+                    predict_prices(pipeline, prepare_features(chunk.iloc[low:high]), intervals))
+            except Exception as e:
+                bisect(low, high, e)
+
+    bisect(0, len(chunk), error)
+    return results[:, 0], results[:, 1], results[:, 2], errors
+
+
+def score_chunks(chunks, pipeline, intervals=None):
+    """Score an iterable of raw chunks, yielding each chunk with price and error columns appended
+
+    ``error`` is empty for scored rows; rows that could not be scored have NaN prices.
+    """
+    for chunk in chunks:
+        missing = [c for c in FEATURE_COLUMNS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"Input is missing required columns: {', '.join(missing)}")
+        try:
+            price, low, high = predict_prices(pipeline, prepare_features(chunk), intervals)
+            errors = np.full(len(chunk), None, dtype=object)
+        except Exception as e:
+            # One bad row must not fail the file: find it by bisecting the chunk
+            price, low, high, errors = _score_rows(pipeline, chunk, intervals, e)
+        chunk = chunk.copy()
+        chunk['predicted_price'] = price
+        chunk['price_low'] = low
+        chunk['price_high'] = high
+        chunk['error'] = errors
+        yield chunk
+
+
+def score_file(source, destination, chunksize=DEFAULT_CHUNKSIZE, pipeline=None, progress=None,
+               output_format=None, intervals=None):
+    """Stream ``source`` through the pipeline into ``destination``; returns ``(rows, failed rows)``
+
+    ``output_format`` ('csv' or 'parquet') defaults to the destination's suffix and
+    must be given for in-memory buffers. ``progress`` is an optional callback
+    receiving the running row count after each chunk.
+    """
+    if pipeline is None:
+        registry = get_registry()
+        pipeline, intervals = registry.pipeline, registry.intervals
+    writer = _ChunkWriter(destination, output_format or _file_format(destination))
+    rows = failed = 0
+    try:
+        for scored in score_chunks(iter_chunks(source, chunksize), pipeline, intervals):
+            writer.write(scored)
+            rows += len(scored)
+            failed += int(scored['error'].notna().sum())
+            if progress is not None:
+                progress(rows)
+    finally:
+        writer.close()
+    return rows, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of listings with the price pipeline")
+    parser.add_argument('input', help="CSV or Parquet file with the 12 feature columns")
+    parser.add_argument('output', help="Destination file (.csv or .parquet)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="Rows scored per chunk")
+    args = parser.parse_args(argv)
+
+    # Bulk scoring is faster through sklearn's compiled tree traversal than the
+    # NumPy export, which is tuned for low-latency single listings
+    registry = ModelRegistry(compiled_path=None).load()
+
+    start = time.perf_counter()
+    rows, failed = score_file(args.input, args.output, chunksize=args.chunksize,
+                      pipeline=registry.pipeline, intervals=registry.intervals,
+                      progress=lambda n: print(f"\rScored {n:,} rows", end='', file=sys.stderr))
+    elapsed = time.perf_counter() - start
+    print(f"\nScored {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)", file=sys.stderr)
+    if failed:
+        print(f"{failed:,} rows could not be scored; see the 'error' column", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Plotly figures drawn from precomputed aggregates or a bounded number of rows.
+
+Row-level charts (scatter, 3D scatter, violin, bubble) pick a rendering mode
+from the row count so the Plotly JSON sent to the browser stays bounded:
+
+* ``full``    - every row, WebGL traces above ``ROW_LIMITS['webgl']``
+* ``sampled`` - a stratified sample (per colour group) of ``ROW_LIMITS['points']``
+* ``density`` - above ``ROW_LIMITS['density']``, a server-side 2D histogram
+
+Limits can be overridden with the ``CHART_WEBGL_ROWS``, ``CHART_MAX_POINTS`` and
+``CHART_DENSITY_ROWS`` environment variables. ``chart_caption`` reports what
+was plotted and the payload size.
+
+``ChartRegistry`` holds one builder per chart and memoizes the built figure
+spec per dataset version, so a chart is built the first time any session shows
+it and never again until the data changes.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from real_estate.cube import MAX_OUTLIERS
+
+ROW_LIMITS = {
+    'webgl': int(os.getenv('CHART_WEBGL_ROWS', 2_000)),
+    'points': int(os.getenv('CHART_MAX_POINTS', 5_000)),
+    'density': int(os.getenv('CHART_DENSITY_ROWS', 50_000)),
+}
+DENSITY_BINS = 60
+
+
+def box_figure(stats, title, xaxis_title=None, yaxis_title=None, colored=False):
+    """Box plot from ``AggregateCube.box_stats`` output (one box per index label); returns (fig, info)
+
+    With ``colored`` every group gets its own trace and colour, as ``px.box`` does
+    with ``color`` set to the x column. The ``outliers`` column, when present, is
+    drawn as points outside the whiskers.
+    """
+    labels = [str(label) for label in stats.index]
+    outliers = [list(values) for values in stats['outliers']] if 'outliers' in stats else None
+    fig = go.Figure()
+    if colored:
+        palette = px.colors.qualitative.Plotly
+        for i, (label, row) in enumerate(zip(labels, stats.itertuples())):
+            fig.add_trace(go.Box(
+                x=[label], q1=[row.q1], median=[row.median], q3=[row.q3],
+                lowerfence=[row.lowerfence], upperfence=[row.upperfence], mean=[row.mean],
+                y=None if outliers is None else [outliers[i]], boxpoints='outliers',
+                name=label, marker_color=palette[i % len(palette)],
+            ))
+    else:
+        fig.add_trace(go.Box(
+            x=labels, q1=stats['q1'], median=stats['median'], q3=stats['q3'],
+            lowerfence=stats['lowerfence'], upperfence=stats['upperfence'], mean=stats['mean'],
+            y=outliers, boxpoints='outliers', name='', showlegend=False,
+        ))
+    fig.update_layout(title=title, xaxis_title=xaxis_title or stats.index.name,
+                      yaxis_title=yaxis_title, legend_title=stats.index.name if colored else None)
+    return fig, {'mode': 'box', 'outliers': sum(map(len, outliers)) if outliers is not None else None}
+
+
+def distribution_figure(distributions, styles, title=None, xaxis_title=None):
+    """Overlaid histograms with KDE curves from ``density.group_distributions``
+
+    ``styles`` maps group -> (label, colour) and sets the drawing order; groups
+    without a distribution (e.g. no rows in the filtered data) are skipped.
+    """
+    fig = go.Figure()
+    for group, (label, color) in styles.items():
+        distribution = distributions.get(group)
+        if distribution is None:
+            continue
+        edges = distribution['edges']
+        fig.add_trace(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2, y=distribution['counts'], width=edges[1] - edges[0],
+            name=label, marker_color=color, opacity=0.4, legendgroup=label,
+        ))
+        if distribution['kde'] is None:  # no spread, no curve
+            continue
+        fig.add_trace(go.Scatter(
+            x=distribution['kde']['x'], y=distribution['kde']['count'], mode='lines',
+            line=dict(color=color), name=f"{label} KDE", legendgroup=label, showlegend=False,
+        ))
+    fig.update_layout(barmode='overlay', bargap=0, title=title, xaxis_title=xaxis_title, yaxis_title='Count')
+    return fig
+
+
+def stratified_sample(frame, by, n, seed=0):
+    """About ``n`` rows keeping each ``by`` group's share (at least one row per group)"""
+    if len(frame) <= n:
+        return frame
+    if by is None:
+        return frame.sample(n, random_state=seed)
+    shuffled = frame.sample(frac=1, random_state=seed)
+    groups = shuffled.groupby(by, observed=True, sort=False)[by]
+    quota = np.maximum(1, np.ceil(groups.transform('size') * n / len(frame)))
+    return shuffled[groups.cumcount() < quota].sort_index()
+
+
+def _plan(frame, color, limits):
+    rows = len(frame)
+    if rows > limits['density']:
+        return 'density', frame
+    if rows > limits['points']:
+        by = color if color is not None and not pd.api.types.is_numeric_dtype(frame[color]) else None
+        return 'sampled', stratified_sample(frame, by, limits['points'])
+    return 'full', frame
+
+
+def density_heatmap(frame, x, y, z=None, bins=DENSITY_BINS, title=None):
+    """2D histogram binned here (counts, or the mean of ``z`` per bin)"""
+    counts, x_edges, y_edges = np.histogram2d(frame[x], frame[y], bins=bins)
+    if z is not None:
+        sums, _, _ = np.histogram2d(frame[x], frame[y], bins=[x_edges, y_edges], weights=frame[z])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(counts > 0, sums / counts, np.nan)
+    else:
+        values = np.where(counts > 0, counts, np.nan)
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2, z=values.T,
+        colorscale='Viridis', colorbar=dict(title=z or 'count'),
+    ))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y)
+    return fig
+
+
+def scatter(frame, x, y, color=None, size=None, limits=ROW_LIMITS, **kwargs):
+    """``px.scatter`` with automatic WebGL/sampling/density; returns (fig, info)"""
+    mode, plotted = _plan(frame, color, limits)
+    if mode == 'density':
+        numeric_color = color if color is not None and pd.api.types.is_numeric_dtype(frame[color]) else None
+        fig = density_heatmap(frame, x, y, z=numeric_color, title=kwargs.get('title'))
+    else:
+        render_mode = 'webgl' if len(plotted) > limits['webgl'] else 'auto'
+        fig = px.scatter(plotted, x=x, y=y, color=color, size=size, render_mode=render_mode, **kwargs)
+    return fig, {'rows': len(frame), 'plotted': len(plotted) if mode != 'density' else 0, 'mode': mode}
+
+
+def scatter_3d(frame, x, y, z, color=None, limits=ROW_LIMITS, **kwargs):
+    """``px.scatter_3d`` on at most ``limits['points']`` rows; returns (fig, info)"""
+    mode, plotted = _plan(frame, color, {**limits, 'density': float('inf')})
+    fig = px.scatter_3d(plotted, x=x, y=y, z=z, color=color, **kwargs)
+    return fig, {'rows': len(frame), 'plotted': len(plotted), 'mode': mode}
+
+
+def violin(frame, x, y, limits=ROW_LIMITS, **kwargs):
+    """``px.violin`` with every point, or a stratified sample and outliers only above the limit"""
+    mode, plotted = _plan(frame, x, {**limits, 'density': float('inf')})
+    points = 'all' if mode == 'full' else 'outliers'
+    fig = px.violin(plotted, x=x, y=y, box=True, points=points, **kwargs)
+    return fig, {'rows': len(frame), 'plotted': len(plotted), 'mode': mode}
+
+
+def add_trendlines(fig, trendlines):
+    """Overlay precomputed OLS lines and confidence bands, coloured like their group's points"""
+    colors = {trace.name: getattr(trace.marker, 'color', None) for trace in fig.data if trace.name}
+    for group, band in trendlines.bands.groupby('group', sort=False):
+        fit = trendlines.fits.loc[group]
+        color = colors.get(group) if isinstance(colors.get(group), str) else None
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([band['x'], band['x'][::-1]]), y=np.concatenate([band['high'], band['low'][::-1]]),
+            fill='toself', line=dict(width=0), fillcolor=color, opacity=0.2,
+            hoverinfo='skip', showlegend=False, legendgroup=group,
+        ))
+        fig.add_trace(go.Scatter(
+            x=band['x'], y=band['y'], mode='lines', line=dict(color=color), legendgroup=group,
+            name=f"{group} trend", showlegend=False,
+            hovertemplate=(f"<b>OLS trendline</b><br>{trendlines.y} = {fit['slope']:.6g} * {trendlines.x} "
+                           f"+ {fit['intercept']:.6g}<br>R<sup>2</sup>={fit['r2']:.6f}<extra>{group}</extra>"),
+        ))
+    return fig
+
+
+def payload_bytes(fig):
+    """Size of the figure's Plotly JSON, i.e. what the browser downloads"""
+    return len(fig.to_json().encode('utf-8'))
+
+
+def chart_caption(fig, info=None):
+    size = f"{payload_bytes(fig) / 1024:,.0f} KB payload"
+    if info is None:
+        return f"Precomputed aggregate · {size}"
+    if info['mode'] == 'density':
+        return f"{info['rows']:,} rows binned server-side · {size}"
+    if info['mode'] == 'box':
+        if info['outliers'] is None:
+            return f"Precomputed quartiles, outliers not drawn · {size}"
+        return (f"Precomputed quartiles · {info['outliers']:,} outlier points, at most the "
+                f"{MAX_OUTLIERS} most extreme per group · {size}")
+    return f"Plotted {info['plotted']:,} of {info['rows']:,} rows ({info['mode']}) · {size}"
+
+
+class ChartRegistry:
+    """Chart builders by id; each figure is built at most once per dataset version
+
+    A builder takes the ``AnalyticsData`` and returns a Plotly figure, or
+    ``(figure, info)`` for row-level charts. Each (chart, version) has its own
+    build lock, so a slow chart does not hold up the others, and specs of
+    older dataset versions are dropped once a newer version is requested.
+    """
+
+    def __init__(self):
+        self._builders = {}
+        self._specs = {}
+        self._building = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def chart(self, chart_id):
+        """Decorator registering ``builder`` under ``chart_id``"""
+        def register(builder):
+            self._builders[chart_id] = builder
+            return builder
+        return register
+
+    def spec(self, chart_id, data):
+        """(figure spec, caption) for ``chart_id``, building it on first request"""
+        key = (chart_id, data.version)
+        with self._lock:
+            if data.version != self._version:
+                self._specs = {k: v for k, v in self._specs.items() if k[1] == data.version}
+                self._version = data.version
+            if key in self._specs:
+                return self._specs[key]
+            build_lock = self._building.setdefault(key, threading.Lock())
+        with build_lock:
+            with self._lock:
+                if key in self._specs:  # built by another session while this one waited
+                    return self._specs[key]
+            built = self._builders[chart_id](data)
+            fig, info = built if isinstance(built, tuple) else (built, None)
+            spec = (fig.to_dict(), chart_caption(fig, info))
+            with self._lock:
+                if self._version == data.version:
+                    self._specs[key] = spec
+                self._building.pop(key, None)
+            return spec
+
+    def built(self, version):
+        """Ids of the charts already built for ``version``"""
+        with self._lock:
+            return [chart_id for chart_id, v in self._specs if v == version]
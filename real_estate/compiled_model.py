@@ -0,0 +1,316 @@
+"""Compile the fitted sklearn price pipeline into a NumPy-only scorer.
+
+The export step walks the fitted ColumnTransformer (StandardScaler,
+OrdinalEncoder, OneHotEncoder, passthrough) and the final regressor (linear
+models or decision-tree ensembles) and stores everything as plain arrays in one
+``.npz`` file. ``CompiledScorer.predict`` then reproduces ``pipeline.predict``
+with vectorized NumPy only, so loading it needs neither pickle nor sklearn.
+That includes the edge cases: encoders keep their ``handle_unknown`` policy
+and trees send missing values to the child sklearn would. Usage::
+
+    python -m real_estate.compiled_model pipeline1.pkl.gz pipeline1_compiled.npz
+"""
+import argparse
+import hashlib
+import json
+import time
+
+import numpy as np
+
+COMPILED_PATH = 'pipeline1_compiled.npz'
+FORMAT_VERSION = 3
+
+# Rows traversed through the tree ensemble at a time (bounds the rows x trees work arrays)
+TREE_BLOCK_ROWS = 2048
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _unknown_policy(encoder, kind, name):
+    """The encoder's ``handle_unknown`` if it can be compiled; raises TypeError otherwise"""
+    policy = encoder.handle_unknown
+    if getattr(encoder, '_infrequent_enabled', False):
+        raise TypeError(f"Cannot compile {kind} with infrequent categories ({name})")
+    if policy == 'infrequent_if_exist':
+        policy = 'ignore'  # no infrequent categories, so unknowns are simply ignored
+    supported = {'OneHotEncoder': ('error', 'ignore'), 'OrdinalEncoder': ('error', 'use_encoded_value')}[kind]
+    if policy not in supported:
+        raise TypeError(f"Cannot compile {kind} with handle_unknown={policy!r} ({name})")
+    return policy
+
+
+def _compile_preprocessor(column_transformer, arrays):
+    steps = []
+    input_columns = list(getattr(column_transformer, 'feature_names_in_', []))
+    for name, transformer, columns in column_transformer.transformers_:
+        if isinstance(transformer, str) and transformer == 'drop' or len(columns) == 0:
+            continue
+        # The remainder may list positional indices instead of names
+        columns = [input_columns[c] if isinstance(c, (int, np.integer)) else str(c) for c in columns]
+        if isinstance(transformer, str) and transformer == 'passthrough':
+            kind = 'passthrough'
+        elif type(transformer).__name__ == 'FunctionTransformer' and transformer.func is None:
+            # Fitted 'passthrough' steps are stored as identity FunctionTransformers
+            kind = 'passthrough'
+        else:
+            kind = type(transformer).__name__
+        step = {'kind': kind, 'columns': columns}
+        if kind == 'StandardScaler':
+            arrays[f'{name}__mean'] = (transformer.mean_ if transformer.with_mean
+                                       else np.zeros(len(columns)))
+            arrays[f'{name}__scale'] = (transformer.scale_ if transformer.with_std
+                                        else np.ones(len(columns)))
+        elif kind in ('OrdinalEncoder', 'OneHotEncoder'):
+            step['handle_unknown'] = _unknown_policy(transformer, kind, name)
+            if step['handle_unknown'] == 'use_encoded_value':
+                step['unknown_value'] = float(transformer.unknown_value)
+            for i, categories in enumerate(transformer.categories_):
+                arrays[f'{name}__categories_{i}'] = np.asarray([str(c) for c in categories])
+            if kind == 'OneHotEncoder':
+                drop_idx = transformer.drop_idx_
+                arrays[f'{name}__drop'] = (np.full(len(columns), -1) if drop_idx is None
+                                           else np.array([-1 if d is None else d for d in drop_idx]))
+        elif kind != 'passthrough':
+            raise TypeError(f"Cannot compile transformer {kind!r} ({name})")
+        step['name'] = name
+        steps.append(step)
+    return steps
+
+
+def _compile_regressor(regressor, arrays):
+    kind = type(regressor).__name__
+    if hasattr(regressor, 'coef_') and hasattr(regressor, 'intercept_') and not hasattr(regressor, 'estimators_'):
+        arrays['coef'] = np.ravel(regressor.coef_).astype(np.float64)
+        arrays['intercept'] = np.atleast_1d(regressor.intercept_).astype(np.float64)
+        return {'kind': 'linear', 'source': kind}
+
+    if kind in ('RandomForestRegressor', 'ExtraTreesRegressor'):
+        trees = [estimator.tree_ for estimator in regressor.estimators_]
+    elif kind in ('DecisionTreeRegressor', 'ExtraTreeRegressor'):
+        trees = [regressor.tree_]
+    else:
+        raise TypeError(f"Cannot compile regressor {kind!r}")
+
+    # Concatenate every tree into flat node arrays with global child indices. Leaves
+    # point at themselves with an always-true split, so traversal needs no leaf test.
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    feature = np.concatenate([tree.feature for tree in trees]).astype(np.int32)
+    threshold = np.concatenate([tree.threshold for tree in trees])
+    children = np.column_stack([
+        np.concatenate([c + offset for c, offset in zip(
+            [getattr(tree, f'children_{side}') for tree in trees], offsets[:-1])])
+        for side in ('left', 'right')
+    ])
+    leaves = np.concatenate([tree.children_left == -1 for tree in trees])
+    # Where a NaN goes at each split. Trees from before sklearn 1.3 do not record it;
+    # like newer ones that saw no NaN in training, they send it to the bigger child
+    missing_left = np.concatenate([
+        tree.missing_go_to_left.astype(bool) if hasattr(tree, 'missing_go_to_left') else
+        tree.n_node_samples[tree.children_left] >= tree.n_node_samples[tree.children_right]
+        for tree in trees
+    ])
+    node_ids = np.arange(offsets[-1])
+    children[leaves] = node_ids[leaves, None]
+    feature[leaves] = 0
+    threshold[leaves] = np.inf
+    missing_left[leaves] = True
+    arrays['tree_roots'] = offsets[:-1].astype(np.int32)
+    arrays['tree_feature'] = feature
+    arrays['tree_threshold'] = threshold
+    arrays['tree_children'] = children.astype(np.int32)
+    arrays['tree_missing_left'] = missing_left
+    arrays['tree_value'] = np.concatenate([tree.value[:, 0, 0] for tree in trees])
+    return {'kind': 'trees', 'source': kind, 'max_depth': int(max(tree.max_depth for tree in trees))}
+
+
+def compile_pipeline(pipeline, source_sha256=None):
+    """Convert a fitted Pipeline(preprocessor, regressor) into a CompiledScorer"""
+    preprocessor, regressor = pipeline.steps[0][1], pipeline.steps[-1][1]
+    arrays = {}
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'preprocessor': _compile_preprocessor(preprocessor, arrays),
+        'regressor': _compile_regressor(regressor, arrays),
+        'source_sha256': source_sha256,
+    }
+    return CompiledScorer(meta, arrays)
+
+
+class CompiledScorer:
+    """Array-backed drop-in for ``pipeline.predict`` on the 12-column input"""
+
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.arrays = arrays
+        self._steps = [self._prepare_step(step) for step in meta['preprocessor']]
+
+    def _prepare_step(self, step):
+        name, kind = step['name'], step['kind']
+        step = dict(step)
+        if kind in ('OrdinalEncoder', 'OneHotEncoder'):
+            # Sorted copies plus the permutation back to training order, for searchsorted lookups
+            step['lookups'] = []
+            for i in range(len(step['columns'])):
+                categories = self.arrays[f'{name}__categories_{i}']
+                order = np.argsort(categories, kind='stable')
+                step['lookups'].append((categories, categories[order], order))
+        return step
+
+    @property
+    def source_sha256(self):
+        return self.meta.get('source_sha256')
+
+    @staticmethod
+    def _encode(values, lookup, column, handle_unknown='error'):
+        """``(codes, unknown mask)``; unknown categories raise unless ``handle_unknown`` allows them"""
+        categories, sorted_categories, order = lookup
+        values = np.asarray(values).astype(str)
+        positions = np.searchsorted(sorted_categories, values)
+        positions = np.clip(positions, 0, len(sorted_categories) - 1)
+        unknown = sorted_categories[positions] != values
+        if unknown.any() and handle_unknown == 'error':
+            raise ValueError(f"Found unknown categories {sorted(set(values[unknown]))} in column {column!r}")
+        return order[positions], unknown
+
+    def transform(self, frame):
+        """Apply the compiled preprocessing; ``frame`` maps column name -> 1-d values"""
+        blocks = []
+        for step in self._steps:
+            name, kind, columns = step['name'], step['kind'], step['columns']
+            if kind == 'StandardScaler':
+                values = np.column_stack([np.asarray(frame[c], dtype=np.float64) for c in columns])
+                blocks.append((values - self.arrays[f'{name}__mean']) / self.arrays[f'{name}__scale'])
+            elif kind == 'OrdinalEncoder':
+                encoded = []
+                for c, lookup in zip(columns, step['lookups']):
+                    codes, unknown = self._encode(frame[c], lookup, c, step.get('handle_unknown', 'error'))
+                    encoded.append(np.where(unknown, step.get('unknown_value', np.nan), codes))
+                blocks.append(np.column_stack(encoded))
+            elif kind == 'OneHotEncoder':
+                drop = self.arrays[f'{name}__drop']
+                for i, (c, lookup) in enumerate(zip(columns, step['lookups'])):
+                    codes, unknown = self._encode(frame[c], lookup, c, step.get('handle_unknown', 'error'))
+                    onehot = np.zeros((codes.size, len(lookup[0])))
+                    onehot[np.arange(codes.size), codes] = 1.0
+                    onehot[unknown] = 0.0  # handle_unknown='ignore': all zeros
+                    if drop[i] >= 0:
+                        onehot = np.delete(onehot, drop[i], axis=1)
+                    blocks.append(onehot)
+            else:
+                blocks.append(np.column_stack([np.asarray(frame[c], dtype=np.float64) for c in columns]))
+        return np.hstack(blocks)
+
+    def _predict_trees(self, X):
+        a = self.arrays
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = X.astype(np.float32).astype(np.float64)
+        roots, feature, threshold = a['tree_roots'], a['tree_feature'], a['tree_threshold']
+        children, value, missing_left = a['tree_children'], a['tree_value'], a['tree_missing_left']
+        out = np.empty(X.shape[0])
+        for start in range(0, X.shape[0], TREE_BLOCK_ROWS):
+            block = X[start:start + TREE_BLOCK_ROWS]
+            rows = np.arange(block.shape[0])[:, None]
+            nodes = np.broadcast_to(roots, (block.shape[0], roots.size))
+            for _ in range(self.meta['regressor']['max_depth']):
+                x = block[rows, feature[nodes]]
+                go_right = np.where(np.isnan(x), ~missing_left[nodes], x > threshold[nodes])
+                nodes, previous = children[nodes, go_right.view(np.int8)], nodes
+                if np.array_equal(nodes, previous):
+                    break
+            out[start:start + TREE_BLOCK_ROWS] = value[nodes].mean(axis=1)
+        return out
+
+    def predict(self, frame):
+        """Return the model output (log1p price) for every row"""
+        X = self.transform(frame)
+        if self.meta['regressor']['kind'] == 'linear':
+            return X @ self.arrays['coef'] + self.arrays['intercept'][0]
+        return self._predict_trees(X)
+
+    def save(self, path=COMPILED_PATH):
+        np.savez_compressed(path, __meta__=np.asarray(json.dumps(self.meta)), **self.arrays)
+
+    @classmethod
+    def load(cls, path=COMPILED_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['__meta__']))
+            arrays = {key: data[key] for key in data.files if key != '__meta__'}
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compiled model format {meta.get('format_version')}")
+        return cls(meta, arrays)
+
+
+def edge_rows(scorer, frame):
+    """Copies of the first row of ``frame`` with one missing number or one unknown category each"""
+    rows = []
+    for step in scorer.meta['preprocessor']:
+        for column in step['columns']:
+            row = frame.iloc[[0]].copy()
+            if step['kind'] in ('OrdinalEncoder', 'OneHotEncoder'):
+                row[column] = row[column].astype(object)
+                row.loc[:, column] = '__unknown__'
+            else:
+                row[column] = np.nan
+            rows.append(row)
+    return rows
+
+
+def verify(pipeline, scorer, frame, atol=1e-6):
+    """Max absolute difference between the two models on ``frame``; raises if above ``atol``
+
+    Also checks ``edge_rows``: both models must give the same prediction for
+    a missing value or an unknown category, or both must reject it.
+    """
+    diff = float(np.max(np.abs(pipeline.predict(frame) - scorer.predict(frame))))
+    for row in edge_rows(scorer, frame):
+        outcomes = []
+        for model in (pipeline, scorer):
+            try:
+                outcomes.append(model.predict(row))
+            except ValueError:
+                outcomes.append(None)
+        if (outcomes[0] is None) != (outcomes[1] is None):
+            rejected = 'pipeline' if outcomes[0] is None else 'compiled model'
+            raise AssertionError(f"Only the {rejected} rejects {row.iloc[0].to_dict()}")
+        if outcomes[0] is not None:
+            diff = max(diff, float(np.max(np.abs(outcomes[0] - outcomes[1]))))
+    if diff > atol:
+        raise AssertionError(f"Compiled model differs from the pipeline by {diff:.3g} (> {atol:g})")
+    return diff
+
+
+def main(argv=None):
+    import gzip
+    import pickle
+
+    from real_estate.artifacts import read_frame
+    from real_estate.model_registry import DF_PATH, PIPELINE_PATH
+
+    parser = argparse.ArgumentParser(description="Export the fitted price pipeline as a NumPy-only scorer")
+    parser.add_argument('input', nargs='?', default=PIPELINE_PATH, help="Gzipped pipeline pickle")
+    parser.add_argument('output', nargs='?', default=COMPILED_PATH, help="Destination .npz file")
+    parser.add_argument('--reference', default=DF_PATH, help="Reference frame used to verify the export")
+    parser.add_argument('--atol', type=float, default=1e-6, help="Largest allowed prediction difference")
+    args = parser.parse_args(argv)
+
+    with gzip.open(args.input, 'rb') as file:
+        pipeline = pickle.load(file)
+    scorer = compile_pipeline(pipeline, source_sha256=file_sha256(args.input))
+    reference = read_frame(args.reference)
+    diff = verify(pipeline, scorer, reference, atol=args.atol)
+    scorer.save(args.output)
+
+    start = time.perf_counter()
+    CompiledScorer.load(args.output).predict(reference.iloc[:1])
+    print(f"Wrote {args.output}: max |diff| {diff:.2e} on {len(reference):,} rows, "
+          f"load + first prediction {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Aggregate cube behind the Analysis App charts.
+
+One row per non-empty (sector, property_type, bedRoom, month) cell holds the
+count and the sum, sum of squares, min and max of each measure. Price and
+price/sqft also keep a log-bucket quantile sketch per cell (DDSketch style:
+bucket ``i`` covers ``(gamma**(i-1), gamma**i]`` with ``gamma = (1+a)/(1-a)``,
+so any quantile comes back within relative error ``a``). Sketches merge by
+adding counts, which is what makes roll-ups to any coarser grouping exact for
+counts/means/std and ``a``-accurate for quantiles.
+
+Sketches lose the individual values a box plot draws as outliers, so each cell
+also keeps its ``EXTREME_VALUES`` lowest and highest values of the sketched
+measures. A group's outliers are taken from the extremes of its cells: exact
+unless one cell holds more than ``EXTREME_VALUES`` outliers on one side, and
+capped at ``MAX_OUTLIERS`` (the most extreme) per group.
+
+Every roll-up costs O(cells), not O(rows), so dashboard render time stops
+growing with the listing count.
+
+Usage::
+
+    python -m real_estate.cube      # write datasets/analytics_cube.npz
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+CUBE_PATH = 'datasets/analytics_cube.npz'
+DIMENSIONS = ['sector', 'property_type', 'bedRoom', 'month']
+MEASURES = ['price', 'price_per_sqft', 'built_up_area', 'latitude', 'longitude']
+SKETCHED_MEASURES = ['price', 'price_per_sqft']
+DEFAULT_ALPHA = 0.01
+EXTREME_VALUES = 3
+MAX_OUTLIERS = 30
+
+
+class AggregateCube:
+    """Count/sum/sum-of-squares cells plus mergeable quantile sketches"""
+
+    def __init__(self, cells, sketches, alpha=DEFAULT_ALPHA, version=None, extremes=None):
+        self.cells = cells
+        self.sketches = sketches
+        self.extremes = extremes or {}
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.version = version
+
+    @classmethod
+    def build(cls, frame, alpha=DEFAULT_ALPHA, version=None):
+        keys = frame[DIMENSIONS].astype({'sector': str, 'property_type': str})
+        cell_ids = keys.groupby(DIMENSIONS, sort=True).ngroup().to_numpy()
+        values = frame[MEASURES]
+        squares = values.pow(2).add_suffix('_sumsq')
+        grouped = pd.concat([keys, values.add_suffix('_sum'), squares,
+                             values.add_suffix('_min'), values.add_suffix('_max')], axis=1).groupby(cell_ids)
+        cells = grouped[DIMENSIONS].first()
+        cells['count'] = grouped.size()
+        for measure in MEASURES:
+            cells[f'{measure}_sum'] = grouped[f'{measure}_sum'].sum()
+            cells[f'{measure}_sumsq'] = grouped[f'{measure}_sumsq'].sum()
+            cells[f'{measure}_min'] = grouped[f'{measure}_min'].min()
+            cells[f'{measure}_max'] = grouped[f'{measure}_max'].max()
+        cells = cells.reset_index(drop=True)
+
+        gamma = (1 + alpha) / (1 - alpha)
+        sketches, extremes = {}, {}
+        for measure in SKETCHED_MEASURES:
+            buckets = np.ceil(np.log(frame[measure].to_numpy()) / np.log(gamma)).astype(np.int32)
+            counts = pd.Series(1, index=pd.MultiIndex.from_arrays([cell_ids, buckets])).groupby(level=[0, 1]).sum()
+            sketches[measure] = pd.DataFrame({
+                'cell': counts.index.get_level_values(0).to_numpy(np.int32),
+                'bucket': counts.index.get_level_values(1).to_numpy(np.int32),
+                'count': counts.to_numpy(np.int32),
+            })
+            values = pd.DataFrame({'cell': cell_ids.astype(np.int32), 'value': frame[measure].to_numpy(np.float64)})
+            values = values.sort_values(['cell', 'value'], kind='stable')
+            rank = values.groupby('cell').cumcount()
+            from_top = values.groupby('cell')['value'].transform('size') - 1 - rank
+            extremes[measure] = values[(rank < EXTREME_VALUES) | (from_top < EXTREME_VALUES)].reset_index(drop=True)
+        return cls(cells, sketches, alpha, version, extremes)
+
+    def _grouped(self, by, where):
+        cells = self.cells if where is None else self.cells[where(self.cells)]
+        if not by:
+            return cells, pd.Series(0, index=cells.index)
+        return cells, cells.groupby(list(by), sort=True).ngroup()
+
+    def _index(self, cells, by):
+        if not by:
+            return pd.Index(['all'])
+        return pd.MultiIndex.from_frame(cells[list(by)].drop_duplicates().sort_values(list(by))) \
+            if len(by) > 1 else pd.Index(np.sort(cells[by[0]].unique()), name=by[0])
+
+    def stats(self, by, measure, where=None):
+        """count, mean, std, min and max of ``measure`` per group of ``by``
+
+        ``where`` is an optional function of the cells frame returning a mask,
+        e.g. ``lambda cells: cells['bedRoom'] <= 4``.
+        """
+        cells, groups = self._grouped(by, where)
+        sums = cells.groupby(groups.to_numpy()).agg(
+            count=('count', 'sum'), total=(f'{measure}_sum', 'sum'), squares=(f'{measure}_sumsq', 'sum'),
+            min=(f'{measure}_min', 'min'), max=(f'{measure}_max', 'max'))
+        mean = sums['total'] / sums['count']
+        variance = (sums['squares'] - sums['count'] * mean ** 2) / (sums['count'] - 1)
+        result = pd.DataFrame({
+            'count': sums['count'], 'mean': mean, 'std': np.sqrt(variance.clip(lower=0)),
+            'min': sums['min'], 'max': sums['max'],
+        })
+        result.index = self._index(cells, by)
+        return result
+
+    def means(self, by, measures, where=None):
+        """Per-group means of several measures, like ``groupby(by)[measures].mean()``"""
+        return pd.DataFrame({measure: self.stats(by, measure, where)['mean'] for measure in measures})
+
+    def quantiles(self, by, measure, qs, where=None):
+        """Per-group quantiles of a sketched measure, within relative error ``alpha``
+
+        Like pandas' default (linear) method, a quantile between two ranks is
+        interpolated between the values at the floor and ceil ranks.
+        """
+        cells, groups = self._grouped(by, where)
+        sketch = self.sketches[measure]
+        sketch = sketch[sketch['cell'].isin(cells.index)]
+        merged = sketch.groupby([groups.reindex(sketch['cell']).to_numpy(), sketch['bucket'].to_numpy()])['count'].sum()
+        result = np.empty((groups.nunique() if len(cells) else 0, len(qs)))
+        for g, counts in merged.groupby(level=0):
+            buckets = counts.index.get_level_values(1).to_numpy()
+            cumulative = np.cumsum(counts.to_numpy())
+            ranks = np.asarray(qs) * (cumulative[-1] - 1)
+            low, high = np.floor(ranks), np.ceil(ranks)
+            values = [2 * self.gamma ** buckets[np.searchsorted(cumulative, rank, side='right')] / (self.gamma + 1)
+                      for rank in (low, high)]
+            result[g] = values[0] + (ranks - low) * (values[1] - values[0])
+        return pd.DataFrame(result, index=self._index(cells, by), columns=list(qs))
+
+    def outliers(self, by, measure, low, high, where=None, limit=MAX_OUTLIERS):
+        """Per group, stored extreme values below ``low`` or above ``high`` (arrays indexed by group)
+
+        At most ``limit`` per group are kept, furthest outside the range first.
+        """
+        cells, groups = self._grouped(by, where)
+        extremes = self.extremes[measure]
+        extremes = extremes[extremes['cell'].isin(cells.index)]
+        group = groups.reindex(extremes['cell']).to_numpy()
+        values = extremes['value'].to_numpy()
+        low, high = np.asarray(low, dtype=np.float64), np.asarray(high, dtype=np.float64)
+        distance = np.maximum(low[group] - values, values - high[group])
+        result = []
+        for g in range(len(low)):
+            outside = (group == g) & (distance > 0)
+            picked = values[outside][np.argsort(-distance[outside], kind='stable')[:limit]]
+            result.append(np.sort(picked))
+        return result
+
+    def box_stats(self, by, measure, where=None):
+        """Quartiles, Tukey fences, mean and an outlier sample per group, ready for a precomputed box plot"""
+        quartiles = self.quantiles(by, measure, (0.25, 0.5, 0.75), where)
+        stats = self.stats(by, measure, where)
+        q1, median, q3 = (quartiles[q] for q in (0.25, 0.5, 0.75))
+        iqr = q3 - q1
+        box = pd.DataFrame({
+            'q1': q1, 'median': median, 'q3': q3,
+            'lowerfence': np.maximum(stats['min'], q1 - 1.5 * iqr),
+            'upperfence': np.minimum(stats['max'], q3 + 1.5 * iqr),
+            'mean': stats['mean'], 'count': stats['count'],
+        })
+        if measure in self.extremes:
+            box['outliers'] = self.outliers(by, measure, q1 - 1.5 * iqr, q3 + 1.5 * iqr, where)
+        return box
+
+    def save(self, path=CUBE_PATH):
+        arrays = {
+            f'cells_{column}': values.to_numpy(str) if values.dtype == object else values.to_numpy()
+            for column, values in self.cells.items()
+        }
+        for measure, sketch in self.sketches.items():
+            arrays.update({f'sketch_{measure}_{column}': sketch[column].to_numpy() for column in sketch.columns})
+        for measure, extremes in self.extremes.items():
+            arrays.update({f'extremes_{measure}_{column}': extremes[column].to_numpy() for column in extremes.columns})
+        meta = {'alpha': self.alpha, 'version': self.version, 'columns': list(self.cells.columns),
+                'sketched': list(self.sketches), 'extremes': list(self.extremes)}
+        np.savez_compressed(path, meta=np.array(json.dumps(meta)), **arrays)
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            cells = pd.DataFrame({column: data[f'cells_{column}'] for column in meta['columns']})
+            sketches = {
+                measure: pd.DataFrame({column: data[f'sketch_{measure}_{column}'] for column in ('cell', 'bucket', 'count')})
+                for measure in meta['sketched']
+            }
+            extremes = {
+                measure: pd.DataFrame({column: data[f'extremes_{measure}_{column}'] for column in ('cell', 'value')})
+                for measure in meta.get('extremes', [])
+            }
+        for column in ('sector', 'property_type'):
+            cells[column] = cells[column].astype(object)
+        return cls(cells, sketches, meta['alpha'], meta['version'], extremes)
+
+
+def main(argv=None):
+    from real_estate.analytics import AnalyticsData
+
+    parser = argparse.ArgumentParser(description="Build the Analysis App aggregate cube")
+    parser.add_argument('--output', default=CUBE_PATH)
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA, help="Quantile sketch relative error")
+    args = parser.parse_args(argv)
+
+    data = AnalyticsData.load()
+    cube = AggregateCube.build(data.frame, args.alpha, data.version)
+    cube.save(args.output)
+    print(f"Wrote {args.output}: {len(cube.cells):,} cells from {len(data.frame):,} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Token-budgeted chunking and map-reduce analysis of long documents.
+
+``analyze_document_with_groq`` used to send ``text_content[:8000]``, silently
+dropping everything past the first few pages. ``map_reduce`` keeps short
+documents on that single-call path and, for longer ones, splits the text into
+chunks of at most ``CHUNK_TOKENS``, summarizes the chunks concurrently and
+answers from the joined summaries, summarizing those again if they are still
+over ``REDUCE_TOKENS``. Text past ``DOCUMENT_TOKEN_BUDGET`` is cut off
+before chunking, whatever extracted it, and the answer says so.
+
+Several files are analyzed at once, each with its own chunk workers, so the
+model calls themselves are bounded by one process-wide semaphore,
+``LLM_CALLS``: at most ``MAX_LLM_CALLS`` run at a time however many files and
+chunks are in flight.
+
+Token counts are estimated at ``CHARS_PER_TOKEN`` characters per token, which
+is close for English prose with the Llama tokenizer and needs no extra
+dependency. ``content_hash`` keys the chunk summaries in the response cache,
+so a document that is analyzed again - with a different question, in another
+session - only pays for the final answer.
+"""
+import hashlib
+import os
+import threading
+
+from real_estate import workers
+
+CHARS_PER_TOKEN = 4
+CHUNK_TOKENS = int(os.getenv('DOCUMENT_CHUNK_TOKENS', 2_000))  # 8,000 characters, the old cut-off
+REDUCE_TOKENS = int(os.getenv('DOCUMENT_REDUCE_TOKENS', 4_000))
+MAP_WORKERS = int(os.getenv('DOCUMENT_MAP_WORKERS', 4))
+MAX_LLM_CALLS = int(os.getenv('DOCUMENT_MAX_LLM_CALLS', 4))
+# Held for the duration of every model call made while analyzing documents
+LLM_CALLS = threading.BoundedSemaphore(MAX_LLM_CALLS)
+# Most text one document may feed into map_reduce (~50 chunk summaries); the PDF extractor stops here too
+DOCUMENT_TOKEN_BUDGET = int(os.getenv('DOCUMENT_TOKEN_BUDGET', 100_000))
+SEPARATORS = ['\n\n', '\n', ' ']
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _split(text, limit, separators):
+    """Pieces of at most ``limit`` characters, cut at the coarsest separator that works"""
+    if len(text) <= limit:
+        return [text]
+    if not separators:
+        return [text[start:start + limit] for start in range(0, len(text), limit)]
+    separator, finer = separators[0], separators[1:]
+    pieces, current = [], ''
+    for part in text.split(separator):
+        candidate = f"{current}{separator}{part}" if current else part
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        if len(part) <= limit:
+            current = part
+        else:
+            pieces.extend(_split(part, limit, finer))
+            current = ''
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_chunks(text, max_tokens=CHUNK_TOKENS):
+    """Non-empty chunks of roughly ``max_tokens``, split at paragraph, line or word boundaries"""
+    pieces = _split(text, max_tokens * CHARS_PER_TOKEN, SEPARATORS)
+    return [piece.strip() for piece in pieces if piece.strip()]
+
+
+def _limited(func):
+    def call(*args):
+        with LLM_CALLS:
+            return func(*args)
+    return call
+
+
+def summarize_all(chunks, summarize, max_workers=MAP_WORKERS):
+    """``summarize(chunk)`` for every chunk, concurrently, in document order"""
+    summaries = [None] * len(chunks)
+    for task in workers.as_completed(_limited(summarize), chunks, max_workers=max_workers):
+        if task.error is not None:
+            raise task.error
+        summaries[task.index] = task.result
+    return summaries
+
+
+def truncation_note(kept, total, budget=DOCUMENT_TOKEN_BUDGET):
+    """Line prepended to an answer that only saw the first ``kept`` of ``total`` characters"""
+    return (f"_Only the first {kept:,} of {total:,} characters ({kept / total:.0%}) of this document "
+            f"were analyzed; the rest is over the {budget:,}-token budget._\n\n")
+
+
+def map_reduce(text, summarize, answer, max_tokens=CHUNK_TOKENS, reduce_tokens=REDUCE_TOKENS,
+               max_workers=MAP_WORKERS, budget=DOCUMENT_TOKEN_BUDGET):
+    """``answer(content)``, where ``content`` is ``text`` itself or its chunk summaries
+
+    ``text`` past ``budget`` tokens is dropped and the answer starts with a
+    ``truncation_note``. ``summarize`` must not depend on the question, so its
+    results can be cached and reused. Both run holding a ``LLM_CALLS`` slot, so
+    they must not take one themselves.
+    """
+    answer = _limited(answer)
+    note = ''
+    if estimate_tokens(text) > budget:
+        note = truncation_note(budget * CHARS_PER_TOKEN, len(text), budget)
+        text = text[:budget * CHARS_PER_TOKEN]
+    if estimate_tokens(text) <= max_tokens:
+        return note + answer(text)
+    chunks = split_chunks(text, max_tokens)
+    while True:
+        summaries = summarize_all(chunks, summarize, max_workers)
+        combined = "\n\n".join(f"[Part {i + 1} of {len(summaries)}]\n{summary}"
+                               for i, summary in enumerate(summaries))
+        if estimate_tokens(combined) <= reduce_tokens or len(chunks) == 1:
+            return note + answer(combined)
+        chunks = split_chunks(combined, max_tokens)
@@ -0,0 +1,225 @@
+"""Compact per-property feature vectors for on-demand cosine similarity.
+
+Replaces the dense N x N ``cosine_sim*`` matrices with the
+L2-normalized feature vectors they were computed from (see
+``recommender system/recommender-system.ipynb``):
+
+1. facilities - TF-IDF (unigrams + bigrams) of ``TopFacilities``, kept sparse
+2. pricing    - standardized BHK area/price ranges from ``PriceDetails``
+3. location   - standardized distances to every landmark in ``LocationAdvantages``
+
+Dense views are stored in an exact low-rank float32 basis, so similarity rows for
+a query cost O(N * d) and storage grows with N * d instead of N^2. Usage::
+
+    python -m real_estate.embeddings            # writes datasets/recommender_embeddings.npz
+    python -m real_estate.embeddings --verify   # also compares with the notebook's dense matrices
+
+``--verify`` recomputes the notebook's dense ``cosine_similarity`` matrices
+from the full-rank features, so they are never stored.
+"""
+import argparse
+import ast
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+APARTMENTS_CSV = 'datasets/appartments.csv'
+EMBEDDINGS_PATH = 'datasets/recommender_embeddings.npz'
+VIEW_NAMES = ['facilities', 'pricing', 'location']
+
+CONFIGURATIONS = ['1 BHK', '2 BHK', '3 BHK', '4 BHK', '5 BHK', '6 BHK', '1 RK', 'Land']
+# Distance used for landmarks a listing does not mention (just beyond the 50 km radius)
+MISSING_DISTANCE = 54000
+
+
+def load_apartments(path=APARTMENTS_CSV):
+    apartments = pd.read_csv(path)
+    # The CSV repeats its header as a data row (row 22 when the similarity matrices were built)
+    return apartments[apartments['PropertyName'] != 'PropertyName']
+
+
+def facilities_features(apartments):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    facilities = apartments['TopFacilities'].apply(lambda s: ' '.join(re.findall(r"'(.*?)'", s)))
+    return TfidfVectorizer(stop_words='english', ngram_range=(1, 2)).fit_transform(facilities)
+
+
+def _parse_range(text, suffixes):
+    for suffix in suffixes:
+        text = text.replace(suffix, '')
+    return float(text.replace(',', '').strip())
+
+
+def _parse_price_details(detail_str):
+    try:
+        details = json.loads(detail_str.replace("'", "\""))
+    except ValueError:
+        return {}
+    extracted = {}
+    for bhk, detail in details.items():
+        extracted[f'building type_{bhk}'] = detail.get('building_type')
+        area_parts = detail.get('area', '').split('-')
+        try:
+            low = _parse_range(area_parts[0], [' sq.ft.'])
+            high = _parse_range(area_parts[1], [' sq.ft.']) if len(area_parts) == 2 else low
+        except (ValueError, IndexError):
+            low = high = None
+        if len(area_parts) in (1, 2):
+            extracted[f'area low {bhk}'], extracted[f'area high {bhk}'] = low, high
+        price_parts = detail.get('price-range', '').split('-')
+        if len(price_parts) == 2:
+            try:
+                prices = [_parse_range(part, ['₹', ' Cr', ' L']) / (100 if 'L' in part else 1)
+                          for part in price_parts]
+            except ValueError:
+                prices = [None, None]
+            extracted[f'price low {bhk}'], extracted[f'price high {bhk}'] = prices
+    return extracted
+
+
+def pricing_features(apartments):
+    from sklearn.preprocessing import StandardScaler
+
+    rows = []
+    for detail_str in apartments['PriceDetails']:
+        features = _parse_price_details(detail_str)
+        row = {}
+        for config in CONFIGURATIONS:
+            for field in (f'building type_{config}', f'area low {config}', f'area high {config}',
+                          f'price low {config}', f'price high {config}'):
+                row[field] = features.get(field)
+        rows.append(row)
+    frame = pd.DataFrame(rows, index=apartments['PropertyName'])
+    frame['building type_Land'] = frame['building type_Land'].replace({'': 'Land'})
+    categorical = frame.select_dtypes(include=['object']).columns.tolist()
+    encoded = pd.get_dummies(frame, columns=categorical, drop_first=True).fillna(0)
+    return StandardScaler().fit_transform(encoded)
+
+
+def distance_to_meters(distance_str):
+    try:
+        if 'Km' in distance_str or 'KM' in distance_str:
+            return float(distance_str.split()[0]) * 1000
+        if 'Meter' in distance_str or 'meter' in distance_str:
+            return float(distance_str.split()[0])
+    except ValueError:
+        pass
+    return None
+
+
+def location_distances(apartments):
+    """Apartment x landmark distance table in meters (NaN where not listed)"""
+    distances = {
+        name: {place: distance_to_meters(d) for place, d in ast.literal_eval(advantages).items()}
+        for name, advantages in zip(apartments['PropertyName'], apartments['LocationAdvantages'])
+    }
+    return pd.DataFrame.from_dict(distances, orient='index')
+
+
+def location_features(apartments):
+    from sklearn.preprocessing import StandardScaler
+
+    return StandardScaler().fit_transform(location_distances(apartments).fillna(MISSING_DISTANCE))
+
+
+def normalize_rows(vectors):
+    """L2-normalize rows (sparse or dense); all-zero rows stay zero, as in cosine_similarity"""
+    if hasattr(vectors, 'multiply'):
+        norms = np.sqrt(np.asarray(vectors.multiply(vectors).sum(axis=1))).ravel()
+        norms[norms == 0] = 1
+        return vectors.multiply(1 / norms[:, None]).tocsr()
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+def low_rank_basis(vectors, max_dim=None, tol=1e-7):
+    """Rows ``B`` with ``B @ B.T == vectors @ vectors.T`` using at most rank(vectors) columns
+
+    ``max_dim`` truncates further (approximate similarities) for very wide views.
+    """
+    u, s, _ = np.linalg.svd(vectors, full_matrices=False)
+    rank = int(np.sum(s > tol * s[0])) if s.size and s[0] > 0 else 0
+    if max_dim is not None:
+        rank = min(rank, max_dim)
+    return u[:, :rank] * s[:rank]
+
+
+class EmbeddingSimilarity:
+    """Cosine similarity rows computed on demand from normalized vectors"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self._transposed = vectors.T.tocsr() if hasattr(vectors, 'tocsr') else np.ascontiguousarray(vectors.T)
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def rows(self, indices):
+        block = self.vectors[indices] @ self._transposed
+        block = block.toarray() if hasattr(block, 'toarray') else block
+        return np.asarray(block, dtype=np.float64)
+
+
+def dense_baseline(apartments):
+    """The notebook's N x N ``cosine_sim1..3``, computed from the full-rank features"""
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    return [cosine_similarity(features) for features in
+            (facilities_features(apartments), pricing_features(apartments), location_features(apartments))]
+
+
+def build_embeddings(apartments, max_dim=None):
+    """Normalized, compacted vectors for the three views"""
+    facilities = normalize_rows(facilities_features(apartments)).astype(np.float32)
+    dense = [normalize_rows(pricing_features(apartments)), normalize_rows(location_features(apartments))]
+    return [facilities] + [low_rank_basis(v, max_dim).astype(np.float32) for v in dense]
+
+
+def save_embeddings(names, views, path=EMBEDDINGS_PATH):
+    facilities, pricing, location = views
+    np.savez_compressed(
+        path, names=np.asarray(names, dtype=str),
+        facilities_data=facilities.data, facilities_indices=facilities.indices,
+        facilities_indptr=facilities.indptr, facilities_shape=np.asarray(facilities.shape),
+        pricing=pricing, location=location,
+    )
+
+
+def load_embeddings(path=EMBEDDINGS_PATH):
+    """(property names, [facilities, pricing, location] EmbeddingSimilarity views)"""
+    from scipy.sparse import csr_matrix
+
+    with np.load(path, allow_pickle=False) as data:
+        facilities = csr_matrix((data['facilities_data'], data['facilities_indices'], data['facilities_indptr']),
+                                shape=tuple(data['facilities_shape']))
+        views = [facilities, data['pricing'], data['location']]
+        names = data['names'].tolist()
+    return names, [EmbeddingSimilarity(v) for v in views]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the recommender's compact similarity embeddings")
+    parser.add_argument('--input', default=APARTMENTS_CSV)
+    parser.add_argument('--output', default=EMBEDDINGS_PATH)
+    parser.add_argument('--max-dim', type=int, default=None, help="Truncate dense views to this many dimensions")
+    parser.add_argument('--verify', action='store_true', help="Compare against the dense cosine_sim* matrices")
+    args = parser.parse_args(argv)
+
+    apartments = load_apartments(args.input)
+    save_embeddings(apartments['PropertyName'], build_embeddings(apartments, args.max_dim), args.output)
+    names, views = load_embeddings(args.output)
+    print(f"Wrote {args.output}: {len(names)} properties, dims "
+          f"{[view.vectors.shape[1] for view in views]}")
+
+    if args.verify:
+        positions = np.arange(len(names))
+        for i, (view_name, view, dense) in enumerate(zip(VIEW_NAMES, views, dense_baseline(apartments)), start=1):
+            print(f"  {view_name}: max |diff| vs cosine_sim{i} {np.abs(view.rows(positions) - dense).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
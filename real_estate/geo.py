@@ -0,0 +1,205 @@
+"""Apartment coordinates and a haversine spatial index.
+
+The radius search on the recommender page used to be limited to landmarks with
+a precomputed apartment x landmark distance column. ``SpatialIndex`` keeps a
+ball tree over apartment coordinates instead, so radius and k-nearest queries
+work for any latitude/longitude in O(log n + matches).
+
+The repo has no geocoded apartment addresses, so ``build_apartment_coordinates``
+places each project at its sector centroid from ``data_viz1.csv`` (matched on
+the sector in ``PropertySubName``). Projects whose locality has no centroid are
+left without coordinates. Replace the CSV with geocoded positions when they
+become available; nothing else has to change.
+
+``LandmarkDistances`` replaces the dense apartment x landmark pickles (about
+2 MB each, 99% NaN) with the same measured distances re-encoded in long form,
+one row per (apartment, landmark) pair; ``landmark_distances.csv`` is now
+their source. Landmarks and apartments without a single measured distance (and
+one landmark with an empty name) had only NaN cells and are not carried over.
+A landmark's column is built on demand and the hottest ones are cached.
+
+Usage::
+
+    python -m real_estate.geo --build
+    python -m real_estate.geo --benchmark --synthetic 100000
+"""
+import argparse
+import functools
+import re
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+APARTMENTS_PATH = 'datasets/appartments.csv'
+SECTORS_PATH = 'datasets/data_viz1.csv'
+COORDINATES_PATH = 'datasets/apartment_coordinates.csv'
+LANDMARK_DISTANCES_PATH = 'datasets/landmark_distances.csv'
+EARTH_RADIUS_M = 6_371_000.0
+
+
+def haversine(lat, lon, lats, lons):
+    """Great-circle distance in meters; arguments in degrees and broadcast"""
+    lat, lon, lats, lons = (np.radians(np.asarray(x, dtype=np.float64)) for x in (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def sector_key(locality):
+    """Normalize a locality like 'Sector-37C' or 'sector 89 a' to 'sector 37' / 'sector 89'"""
+    locality = str(locality).strip().lower()
+    match = re.match(r'sector[\s-]*(\d+)', locality)
+    return f"sector {match.group(1)}" if match else locality
+
+
+def build_apartment_coordinates(apartments, sectors):
+    """One row per project with sector-centroid latitude/longitude (NaN when unknown)"""
+    centroids = sectors.groupby(sectors['sector'].map(sector_key))[['latitude', 'longitude']].mean()
+    # appartments.csv repeats its header row once
+    apartments = apartments[apartments['PropertyName'] != 'PropertyName'].drop_duplicates('PropertyName')
+    locality = apartments['PropertySubName'].str.extract(r' in (.*?),? Gurgaon', expand=False)
+    exact = locality.str.lower().str.strip()
+    key = exact.where(exact.isin(centroids.index), locality.map(sector_key))
+    coordinates = centroids.reindex(key)
+    coordinates.index = apartments['PropertyName'].values
+    coordinates.index.name = 'PropertyName'
+    coordinates['source'] = np.where(coordinates['latitude'].notna(), 'sector centroid', None)
+    return coordinates
+
+
+def load_coordinates(path=COORDINATES_PATH):
+    """Apartment coordinates indexed by PropertyName, rows without a position dropped"""
+    return pd.read_csv(path, index_col='PropertyName').dropna(subset=['latitude', 'longitude'])
+
+
+def unlocated_projects(path=COORDINATES_PATH):
+    """Sorted names of the projects ``load_coordinates`` drops, so searches can say who is left out"""
+    coordinates = pd.read_csv(path, index_col='PropertyName')
+    return sorted(coordinates.index[coordinates['latitude'].isna() | coordinates['longitude'].isna()])
+
+
+class SpatialIndex:
+    """Ball tree with the haversine metric over named points"""
+
+    def __init__(self, names, latitudes, longitudes):
+        self.names = pd.Index(names)
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.tree = BallTree(np.radians(np.column_stack([self.latitudes, self.longitudes])), metric='haversine')
+        # Sector centroids put whole sectors on one point; those points tie in every search
+        positions = pd.DataFrame({'latitude': self.latitudes, 'longitude': self.longitudes})
+        self.sharing = pd.Series(positions.groupby(['latitude', 'longitude'])['latitude'].transform('size').values,
+                                 index=self.names)
+
+    @classmethod
+    def from_frame(cls, coordinates):
+        return cls(coordinates.index, coordinates['latitude'], coordinates['longitude'])
+
+    def __len__(self):
+        return len(self.names)
+
+    def _series(self, indices, distances):
+        order = np.lexsort((indices, distances))
+        return pd.Series(distances[order] * EARTH_RADIUS_M, index=self.names[indices[order]])
+
+    def within(self, lat, lon, radius_m):
+        """Distances in meters of every point within ``radius_m``, nearest first"""
+        indices, distances = self.tree.query_radius(
+            np.radians([[lat, lon]]), r=radius_m / EARTH_RADIUS_M, return_distance=True)
+        return self._series(indices[0], distances[0])
+
+    def nearest(self, lat, lon, k=5):
+        """Distances in meters of the ``k`` nearest points, nearest first"""
+        distances, indices = self.tree.query(np.radians([[lat, lon]]), k=min(k, len(self)))
+        return self._series(indices[0], distances[0])
+
+
+class LandmarkDistances:
+    """Apartment x landmark distances (meters) assembled one column at a time"""
+
+    def __init__(self, measured, cache_size=64):
+        measured = measured.sort_values('landmark', kind='stable')
+        self._measured_landmarks = measured['landmark'].to_numpy()
+        self._measured = measured
+        self.apartments = pd.Index(measured['PropertyName'].unique())
+        self.landmarks = pd.Index(pd.unique(self._measured_landmarks))
+        self.column = functools.lru_cache(maxsize=cache_size)(self._column)
+
+    @classmethod
+    def load(cls, path=LANDMARK_DISTANCES_PATH, cache_size=64):
+        return cls(pd.read_csv(path), cache_size)
+
+    def _column(self, landmark):
+        if landmark not in self.landmarks:
+            raise KeyError(landmark)
+        start = np.searchsorted(self._measured_landmarks, landmark, side='left')
+        stop = np.searchsorted(self._measured_landmarks, landmark, side='right')
+        measured = self._measured.iloc[start:stop]
+        column = pd.Series(np.nan, index=self.apartments)
+        column.loc[measured['PropertyName'].values] = measured['distance_m'].values
+        return column
+
+    def within(self, landmark, radius_m):
+        """Distances of apartments closer than ``radius_m`` to ``landmark``, nearest first"""
+        column = self.column(landmark)
+        return column[column < radius_m].sort_values()
+
+    def cache_info(self):
+        return self.column.cache_info()
+
+
+def mask_and_sort(index, lat, lon, radius_m):
+    """Reference radius search: distance to every point, boolean mask, sort"""
+    distances = pd.Series(haversine(lat, lon, index.latitudes, index.longitudes), index=index.names)
+    return distances[distances < radius_m].sort_values()
+
+
+def benchmark(index, queries, radius_m, repeat=1):
+    """Mean per-query latency (ms) of the index vs mask-and-sort, and whether results agree"""
+    timings = {}
+    results = {}
+    for name, search in (('mask_and_sort', lambda q: mask_and_sort(index, *q, radius_m)),
+                         ('index', lambda q: index.within(*q, radius_m))):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            results[name] = [search(q) for q in queries]
+        timings[name] = (time.perf_counter() - start) * 1000 / (repeat * len(queries))
+    agree = all(set(a.index) == set(b.index) for a, b in zip(results['mask_and_sort'], results['index']))
+    return {'mask_and_sort_ms': timings['mask_and_sort'], 'index_ms': timings['index'], 'agree': agree}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build apartment coordinates and benchmark the spatial index")
+    parser.add_argument('--build', action='store_true', help=f"Write {COORDINATES_PATH} from sector centroids")
+    parser.add_argument('--benchmark', action='store_true', help="Compare radius search with mask-and-sort")
+    parser.add_argument('--synthetic', type=int, default=0, help="Benchmark on this many jittered points")
+    parser.add_argument('--radius-km', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    if args.build:
+        coordinates = build_apartment_coordinates(pd.read_csv(APARTMENTS_PATH), pd.read_csv(SECTORS_PATH))
+        coordinates.to_csv(COORDINATES_PATH, float_format='%.6f')
+        located = coordinates['latitude'].notna().sum()
+        print(f"Wrote {COORDINATES_PATH}: {located} of {len(coordinates)} projects located")
+
+    if args.benchmark:
+        coordinates = load_coordinates()
+        rng = np.random.default_rng(0)
+        if args.synthetic:
+            # ~2 km of jitter around real project positions
+            source = coordinates.iloc[rng.integers(0, len(coordinates), args.synthetic)]
+            coordinates = pd.DataFrame({
+                'latitude': source['latitude'].values + rng.normal(0, 0.02, args.synthetic),
+                'longitude': source['longitude'].values + rng.normal(0, 0.02, args.synthetic),
+            }, index=[f"p{i}" for i in range(args.synthetic)])
+        index = SpatialIndex.from_frame(coordinates)
+        queries = list(zip(coordinates['latitude'].sample(100, replace=True, random_state=1) + 0.01,
+                           coordinates['longitude'].sample(100, replace=True, random_state=2)))
+        result = benchmark(index, queries, args.radius_km * 1000)
+        print(f"{len(index)} points, radius {args.radius_km} km: mask-and-sort {result['mask_and_sort_ms']:.3f} ms/query, "
+              f"index {result['index_ms']:.3f} ms/query, results agree: {result['agree']}")
+
+
+if __name__ == "__main__":
+    main()
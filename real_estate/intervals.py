@@ -0,0 +1,161 @@
+"""Calibrated price intervals from cross-validated (conformal) residual quantiles.
+
+The pipeline predicts ``log1p(price)``, so residuals are computed in log space and
+the resulting intervals are multiplicative: wider in crores for expensive
+segments, tighter for cheap ones. Residual quantiles are computed per
+(property_type, sector) with fallbacks to property_type and to the whole market
+for thin segments, and stored as a small JSON table so that producing an
+interval is a lookup, not extra model calls. Usage::
+
+    python -m real_estate.intervals --alpha 0.1     # writes datasets/price_intervals.json
+"""
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+INTERVALS_PATH = 'datasets/price_intervals.json'
+TRAINING_CSV = 'feature selection/gurgaon_properties_post_feature_selection_v2.csv'
+
+DEFAULT_ALPHA = 0.1
+DEFAULT_FOLDS = 5
+# Segments with fewer calibration rows fall back to the coarser level
+MIN_GROUP_SIZE = 30
+
+
+def load_training_data(path=TRAINING_CSV):
+    """Training frame and log1p target, prepared as in model-selection.ipynb"""
+    df = pd.read_csv(path, dtype={'balcony': str})
+    df['furnishing_type'] = df['furnishing_type'].replace({0.0: 'unfurnished', 1.0: 'semifurnished', 2.0: 'furnished'})
+    return df.drop(columns=['price']), np.log1p(df['price'])
+
+
+def cross_val_residuals(pipeline, X, y, folds=DEFAULT_FOLDS, random_state=42):
+    """Out-of-fold log residuals ``y - prediction`` from refitted clones of ``pipeline``"""
+    from sklearn.base import clone
+    from sklearn.model_selection import KFold
+
+    residuals = np.empty(len(y))
+    for train, test in KFold(n_splits=folds, shuffle=True, random_state=random_state).split(X):
+        model = clone(pipeline).fit(X.iloc[train], y.iloc[train])
+        residuals[test] = y.iloc[test].to_numpy() - model.predict(X.iloc[test])
+    return residuals
+
+
+def _conformal_bounds(residuals, alpha):
+    # Finite-sample corrected quantile levels for a two-sided (1 - alpha) interval
+    n = residuals.size
+    upper_level = min(math.ceil((n + 1) * (1 - alpha / 2)) / n, 1.0)
+    lower_level = max(math.floor((n + 1) * (alpha / 2)) / n, 0.0)
+    return float(np.quantile(residuals, lower_level)), float(np.quantile(residuals, upper_level))
+
+
+def calibrate(residuals, property_types, sectors, alpha=DEFAULT_ALPHA, min_group_size=MIN_GROUP_SIZE,
+              model_hash=None):
+    """Build an IntervalTable from calibration residuals"""
+    frame = pd.DataFrame({'residual': residuals, 'property_type': np.asarray(property_types),
+                          'sector': np.asarray(sectors)})
+    groups = []
+    for (property_type, sector), group in frame.groupby(['property_type', 'sector']):
+        if len(group) >= min_group_size:
+            groups.append([property_type, sector, *_conformal_bounds(group['residual'].to_numpy(), alpha), len(group)])
+    by_type = {
+        property_type: [*_conformal_bounds(group['residual'].to_numpy(), alpha), len(group)]
+        for property_type, group in frame.groupby('property_type')
+    }
+    table = {
+        'alpha': alpha,
+        'model_hash': model_hash,
+        'built_at': time.time(),
+        'groups': groups,
+        'property_type': by_type,
+        'global': [*_conformal_bounds(frame['residual'].to_numpy(), alpha), len(frame)],
+    }
+    return IntervalTable(table)
+
+
+class IntervalTable:
+    """Indexed residual quantiles; ``bounds`` turns log predictions into price intervals"""
+
+    def __init__(self, table):
+        self.table = table
+        self.alpha = table['alpha']
+        groups = pd.DataFrame(table['groups'], columns=['property_type', 'sector', 'q_low', 'q_high', 'n'])
+        self._by_group = groups.set_index(['property_type', 'sector'])[['q_low', 'q_high']]
+        self._by_type = pd.DataFrame.from_dict(table['property_type'], orient='index',
+                                               columns=['q_low', 'q_high', 'n'])[['q_low', 'q_high']]
+        self._global = np.asarray(table['global'][:2])
+
+    @property
+    def model_hash(self):
+        return self.table.get('model_hash')
+
+    @property
+    def coverage(self):
+        return 1 - self.alpha
+
+    def _lookup(self, property_types, sectors):
+        keys = pd.MultiIndex.from_arrays([np.asarray(property_types), np.asarray(sectors)])
+        q = self._by_group.reindex(keys).to_numpy()
+        levels = np.full(len(q), 'segment', dtype=object)
+        missing = np.isnan(q[:, 0])
+        if missing.any():
+            q[missing] = self._by_type.reindex(np.asarray(property_types)[missing]).to_numpy()
+            levels[missing] = 'property_type'
+            missing = np.isnan(q[:, 0])
+            q[missing] = self._global
+            levels[missing] = 'global'
+        return q, levels
+
+    def quantiles(self, property_types, sectors):
+        """(n, 2) array of [q_low, q_high] log residual quantiles per row"""
+        return self._lookup(property_types, sectors)[0]
+
+    def levels(self, property_types, sectors):
+        """Calibration level each row's interval comes from: 'segment', 'property_type' or 'global'"""
+        return self._lookup(property_types, sectors)[1]
+
+    def bounds(self, log_prediction, property_types, sectors):
+        """(low, high) price arrays in crores for log1p predictions"""
+        q = self.quantiles(property_types, sectors)
+        log_prediction = np.asarray(log_prediction, dtype=float)
+        return np.expm1(log_prediction + q[:, 0]), np.expm1(log_prediction + q[:, 1])
+
+    def save(self, path=INTERVALS_PATH):
+        with open(path, 'w') as file:
+            json.dump(self.table, file)
+
+    @classmethod
+    def load(cls, path=INTERVALS_PATH):
+        with open(path) as file:
+            return cls(json.load(file))
+
+
+def main(argv=None):
+    from real_estate.model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Calibrate per-segment price intervals")
+    parser.add_argument('--data', default=TRAINING_CSV, help="Training CSV with a price column")
+    parser.add_argument('--output', default=INTERVALS_PATH, help="Destination JSON table")
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA, help="Miscoverage rate (0.1 -> 90%% intervals)")
+    parser.add_argument('--folds', type=int, default=DEFAULT_FOLDS, help="Cross-validation folds")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(compiled_path=None, intervals_path=None).load()
+    X, y = load_training_data(args.data)
+    residuals = cross_val_residuals(registry.pipeline, X, y, folds=args.folds)
+    table = calibrate(residuals, X['property_type'], X['sector'], alpha=args.alpha,
+                      model_hash=registry.model_hash)
+    table.save(args.output)
+
+    q = table.quantiles(X['property_type'], X['sector'])
+    covered = np.mean((residuals >= q[:, 0]) & (residuals <= q[:, 1]))
+    print(f"Wrote {args.output}: {len(table.table['groups'])} sector segments, "
+          f"in-sample coverage {covered:.1%} (target {table.coverage:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Persistent cache of LLM responses for chart insights.
+
+Many users open the same charts and click the same suggested questions, and
+each click used to be a fresh Groq call. Responses are stored in SQLite keyed
+on the chart type, the normalized question, the prompt template version, a
+fingerprint of the data the chart shows and the request parameters (model,
+temperature, max tokens), so a repeat question is answered from
+disk - across sessions, processes and restarts - until its TTL runs out or the
+data or prompt changes. The table is bounded: the least recently used rows go
+first.
+
+Usage::
+
+    python -m real_estate.llm_cache            # size, hit counts, most reused questions
+    python -m real_estate.llm_cache --clear
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', '.cache/llm_responses.sqlite3')
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+
+def normalize_question(question):
+    """Case, whitespace and trailing punctuation do not change the answer"""
+    if not question:
+        return ''
+    question = re.sub(r'\s+', ' ', question.replace('🎤', '')).strip().lower()
+    return question.rstrip('?!. ')
+
+
+class ResponseCache:
+    """SQLite-backed TTL + LRU cache with hit/miss/eviction counters for this process"""
+
+    def __init__(self, path=LLM_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    graph_type TEXT,
+                    question TEXT,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )""")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def key(self, graph_type, question, template_version, data_fingerprint, params=None):
+        parts = [graph_type, normalize_question(question), template_version, data_fingerprint, params or {}]
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached response or None"""
+        now = time.time()
+        with self._lock, self._connect() as db:
+            row = db.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            response, created_at = row
+            if created_at + self.ttl < now:
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return None
+            db.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.hits += 1
+            return response
+
+    def put(self, key, response, graph_type=None, question=None):
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, 0)",
+                       (key, graph_type, normalize_question(question), response, now, now))
+            overflow = db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                db.execute("DELETE FROM responses WHERE key IN "
+                           "(SELECT key FROM responses ORDER BY last_used LIMIT ?)", (overflow,))
+                self.evictions += overflow
+
+    def get_or_compute(self, graph_type, question, template_version, data_fingerprint, compute, params=None):
+        """Cached response, or ``compute()`` stored on success (exceptions are not cached)
+
+        ``params`` are the model request settings (a JSON-serializable dict);
+        a different model or temperature is a different answer.
+        """
+        key = self.key(graph_type, question, template_version, data_fingerprint, params)
+        response = self.get(key)
+        if response is None:
+            response = compute()
+            self.put(key, response, graph_type, question)
+        return response
+
+    def clear(self):
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock, self._connect() as db:
+            size = db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            popular = db.execute("SELECT graph_type, question, hits FROM responses WHERE hits > 0 "
+                                 "ORDER BY hits DESC LIMIT 5").fetchall()
+            lookups = self.hits + self.misses
+            return {
+                'size': size,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'popular': popular,
+            }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or clear the LLM response cache")
+    parser.add_argument('--path', default=LLM_CACHE_PATH)
+    parser.add_argument('--clear', action='store_true', help='drop every cached response')
+    args = parser.parse_args(argv)
+
+    cache = ResponseCache(args.path)
+    if args.clear:
+        cache.clear()
+    stats = cache.stats()
+    print(f"{stats['size']} responses stored (max {stats['max_entries']})")
+    for graph_type, question, hits in stats['popular']:
+        print(f"  {hits:>5} hits  {graph_type}: {question or '(overview)'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""Streaming wrapper around Groq chat completions, with latency metrics.
+
+Every page used to call ``client.chat.completions.create`` and wait for the
+whole answer, so nothing appeared until the last of up to 1500 tokens was
+generated. ``StreamingChat.stream`` requests the same completion with
+``stream=True`` and returns a ``ChatStream``: iterate it (or hand it to
+``st.write_stream``) to get text as it is generated. Each stream records
+time to first token, total time and tokens per second into a shared
+``StreamMetrics``.
+
+A stream stops early when ``cancel()`` is called from any thread, when the
+worker task it runs in times out (``real_estate.workers.cancelled``), or when
+its reader stops iterating it - which is what happens when Streamlit stops or
+reruns the script mid-answer. In every case the HTTP response is closed, so
+the model stops generating for a reader that is gone. A stream that did not finish has no
+``result()`` - it raises ``IncompleteResponse`` - so partial text is never
+mistaken for (or cached as) a full answer.
+
+A stream read in a worker thread (see ``real_estate.workers``) cannot draw to
+the page itself; ``StreamRelay`` hands its deltas to the thread that can.
+"""
+import collections
+import queue
+import statistics
+import threading
+import time
+
+from real_estate import workers
+
+RECENT_STREAMS = 200
+
+
+class IncompleteResponse(RuntimeError):
+    """The stream was cancelled, stopped or failed before the model finished"""
+
+
+class StreamMetrics:
+    """Recent per-stream timings, shared by every session of a page"""
+
+    def __init__(self, maxlen=RECENT_STREAMS):
+        self._lock = threading.Lock()
+        self._recent = collections.deque(maxlen=maxlen)
+        self.streams = 0
+        self.cancelled = 0
+
+    def record(self, stats):
+        with self._lock:
+            self._recent.append(stats)
+            self.streams += 1
+            self.cancelled += stats['outcome'] == 'cancelled'
+
+    def summary(self):
+        with self._lock:
+            recent = list(self._recent)
+            first_token = [s['first_token'] for s in recent if s['first_token'] is not None]
+            rates = [s['tokens_per_sec'] for s in recent if s['tokens_per_sec']]
+            return {
+                'streams': self.streams,
+                'cancelled': self.cancelled,
+                'median_first_token': statistics.median(first_token) if first_token else None,
+                'median_total': statistics.median(s['total'] for s in recent) if recent else None,
+                'median_tokens_per_sec': statistics.median(rates) if rates else None,
+            }
+
+
+class ChatStream:
+    """One streamed completion; iterate it once for the text deltas
+
+    ``text`` holds everything received so far and ``stats`` is filled in when
+    the stream ends (finished, failed or cancelled).
+    """
+
+    def __init__(self, client, request, label=None, metrics=None):
+        self._client = client
+        self._request = request
+        self._cancel = threading.Event()
+        self._response = None
+        self.label = label
+        self.metrics = metrics
+        self.text = ''
+        self.stats = None
+
+    def cancel(self):
+        """Stop the stream from any thread; the reader sees it end and ``result()`` raises"""
+        self._cancel.set()
+        response = self._response
+        if response is not None:
+            response.close()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set() or workers.cancelled()
+
+    def __iter__(self):
+        started = time.perf_counter()
+        first_token = None
+        chunks = 0
+        usage = None
+        outcome = 'cancelled'  # unless the loop runs to the end or raises
+        # Cancelled before it started (e.g. its task already timed out): don't send the request
+        response = None if self.cancelled else self._client.chat.completions.create(stream=True, **self._request)
+        self._response = response
+        try:
+            for chunk in () if response is None else response:
+                if self.cancelled:
+                    break
+                x_groq = getattr(chunk, 'x_groq', None)
+                usage = getattr(x_groq, 'usage', None) or getattr(chunk, 'usage', None) or usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                chunks += 1
+                self.text += delta
+                yield delta
+            else:
+                # A response closed by cancel() may simply run out of chunks
+                outcome = 'cancelled' if response is None or self.cancelled else 'finished'
+        except Exception:
+            if not self._cancel.is_set():
+                outcome = 'failed'
+                raise
+            # cancel() closed the response under the reader: that is a cancellation, not a failure
+        finally:
+            self._response = None
+            if response is not None:
+                response.close()
+            total = time.perf_counter() - started
+            tokens = usage.completion_tokens if usage is not None else chunks
+            generating = total - (first_token or 0)
+            self.stats = {
+                'label': self.label,
+                'first_token': first_token,
+                'total': total,
+                'tokens': tokens,
+                'tokens_per_sec': tokens / generating if tokens and generating > 0 else None,
+                'outcome': outcome,
+            }
+            if self.metrics is not None:
+                self.metrics.record(self.stats)
+
+    def result(self):
+        """The full text of a stream that ran to the end; raises ``IncompleteResponse`` otherwise"""
+        outcome = self.stats['outcome'] if self.stats else 'unfinished'
+        if outcome != 'finished':
+            raise IncompleteResponse(f"response {outcome} after {len(self.text):,} characters")
+        return self.text
+
+    def collect(self):
+        """Consume the stream and return the full text (see ``result``)"""
+        for _ in self:
+            pass
+        return self.result()
+
+
+class StreamRelay:
+    """Carries a stream read in a worker thread to the thread that draws it
+
+    The worker calls ``relay(stream)`` in place of ``stream.collect()``; the
+    drawing thread polls ``drain()`` for the text received so far and may
+    ``cancel()`` the stream, before or while it runs.
+    """
+
+    def __init__(self):
+        self._deltas = queue.Queue()
+        self._stream = None
+        self._cancelled = False
+        self.text = ''
+
+    def relay(self, stream):
+        """Consume ``stream``, passing on each delta, and return its ``result()``"""
+        self._stream = stream
+        if self._cancelled:
+            stream.cancel()
+        for delta in stream:
+            self._deltas.put(delta)
+        return stream.result()
+
+    def drain(self):
+        """Everything relayed so far"""
+        while True:
+            try:
+                self.text += self._deltas.get_nowait()
+            except queue.Empty:
+                return self.text
+
+    def cancel(self):
+        self._cancelled = True
+        stream = self._stream
+        if stream is not None:
+            stream.cancel()
+
+
+class StreamingChat:
+    """Drop-in for ``client.chat.completions.create`` that streams"""
+
+    def __init__(self, client, metrics=None):
+        self.client = client
+        self.metrics = metrics if metrics is not None else StreamMetrics()
+
+    def stream(self, label=None, **request):
+        """A ``ChatStream`` for ``request`` (model, messages, temperature, ...); nothing is sent until iterated"""
+        return ChatStream(self.client, request, label=label, metrics=self.metrics)
+
+    def complete(self, label=None, **request):
+        """Full response text, streamed underneath so the metrics are still recorded"""
+        return self.stream(label=label, **request).collect()
+
+
+def metrics_caption(summary):
+    """One-line sidebar text for ``StreamMetrics.summary()``"""
+    if summary['median_first_token'] is None:
+        return "⚡ AI streaming: no responses yet"
+    rate = summary['median_tokens_per_sec']
+    rate = f", {rate:,.0f} tokens/s" if rate else ""
+    return (f"⚡ AI streaming: first token in {summary['median_first_token']:.2f}s "
+            f"(median of {summary['streams']}){rate}")
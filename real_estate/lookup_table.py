@@ -0,0 +1,177 @@
+"""Precomputed sector x configuration price table for instant what-if estimates.
+
+An offline job evaluates the pipeline over the full grid of the categorical
+inputs the predictor exposes, at geometrically spaced ``built_up_area`` bins, and
+stores the prices in a memory-mapped ``.npy`` array with a JSON sidecar holding
+the axes. The page then answers what-if questions (price across sectors, price
+vs. area, ...) by indexing and interpolating into that array instead of calling
+the model. Usage::
+
+    python -m real_estate.lookup_table                # writes datasets/price_grid.npy
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from real_estate.batch import predict_prices
+from real_estate.model_registry import DF_PATH, FEATURE_COLUMNS, ModelRegistry
+
+GRID_PATH = 'datasets/price_grid.npy'
+
+# Axes enumerated in the table; the remaining features are held at their most
+# common value and only affect the anchor price (see PriceLookupTable.what_if)
+GRID_AXES = ['property_type', 'sector', 'bedRoom', 'agePossession',
+             'furnishing_type', 'luxury_category', 'floor_category']
+AREA_RANGE = (300.0, 8000.0)
+DEFAULT_AREA_BINS = 20
+BUILD_CHUNK_ROWS = 200_000
+
+
+def _meta_path(path):
+    return path[:-len('.npy')] + '.json' if path.endswith('.npy') else path + '.json'
+
+
+def grid_spec(reference_df, area_bins=DEFAULT_AREA_BINS):
+    """Axis values (from the reference frame) and fixed defaults for the other features"""
+    axes = {column: sorted(reference_df[column].unique().tolist()) for column in GRID_AXES}
+    axes['built_up_area'] = np.geomspace(*AREA_RANGE, area_bins).round(1).tolist()
+    fixed = [c for c in FEATURE_COLUMNS if c not in axes]
+    defaults = {c: reference_df[c].mode().iloc[0] for c in fixed}
+    # Plain Python scalars so the spec survives a JSON round trip
+    defaults = {c: v.item() if hasattr(v, 'item') else v for c, v in defaults.items()}
+    return {'axes': axes, 'defaults': defaults}
+
+
+def build_lookup_table(model, reference_df, path=GRID_PATH, area_bins=DEFAULT_AREA_BINS,
+                       model_hash=None, progress=None):
+    """Evaluate ``model`` over the whole grid, streaming results into a memmapped array"""
+    spec = grid_spec(reference_df, area_bins)
+    axis_names = list(spec['axes'])
+    axis_values = [np.asarray(spec['axes'][name], dtype=object) for name in axis_names]
+    shape = tuple(len(values) for values in axis_values)
+    prices = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=shape)
+    flat = prices.reshape(-1)
+
+    total = flat.size
+    for start in range(0, total, BUILD_CHUNK_ROWS):
+        stop = min(start + BUILD_CHUNK_ROWS, total)
+        index = np.unravel_index(np.arange(start, stop), shape)
+        chunk = pd.DataFrame({name: values[idx] for name, values, idx in zip(axis_names, axis_values, index)})
+        for column, value in spec['defaults'].items():
+            chunk[column] = value
+        chunk['built_up_area'] = chunk['built_up_area'].astype(float)
+        chunk['bedRoom'] = chunk['bedRoom'].astype(float)
+        flat[start:stop] = predict_prices(model, chunk[FEATURE_COLUMNS])[0]
+        if progress is not None:
+            progress(stop, total)
+    prices.flush()
+    del prices
+
+    meta = dict(spec, axis_order=axis_names, model_hash=model_hash, built_at=time.time())
+    with open(_meta_path(path), 'w') as file:
+        json.dump(meta, file)
+    return PriceLookupTable.load(path)
+
+
+class PriceLookupTable:
+    """Read-only view over a built price grid"""
+
+    def __init__(self, prices, meta):
+        self.prices = prices
+        self.meta = meta
+        self.axis_order = meta['axis_order']
+        self.axes = meta['axes']
+        self.defaults = meta['defaults']
+        self.areas = np.asarray(self.axes['built_up_area'])
+        self._log_areas = np.log(self.areas)
+        self._index = {name: {value: i for i, value in enumerate(values)}
+                       for name, values in self.axes.items() if name != 'built_up_area'}
+
+    @property
+    def model_hash(self):
+        return self.meta.get('model_hash')
+
+    @classmethod
+    def load(cls, path=GRID_PATH):
+        """Memory-map the table; nothing is read until it is indexed"""
+        with open(_meta_path(path)) as file:
+            meta = json.load(file)
+        return cls(np.load(path, mmap_mode='r'), meta)
+
+    def _category_index(self, row):
+        index = []
+        for name in self.axis_order[:-1]:
+            value = row[name]
+            if name == 'bedRoom':
+                value = float(value)
+            if value not in self._index[name]:
+                raise KeyError(f"{name}={value!r} is not in the price grid")
+            index.append(self._index[name][value])
+        return tuple(index)
+
+    def _interpolate(self, curves, areas):
+        """Interpolate along the last (area) axis of ``curves`` at each of ``areas``
+
+        Interpolation is linear in log-area, matching the geometric bin spacing, and
+        clamps at the ends of the area range.
+        """
+        x = np.log(np.clip(np.asarray(areas, dtype=float), self.areas[0], self.areas[-1]))
+        upper = np.clip(np.searchsorted(self._log_areas, x), 1, self.areas.size - 1)
+        lower = upper - 1
+        weight = (x - self._log_areas[lower]) / (self._log_areas[upper] - self._log_areas[lower])
+        curves = np.asarray(curves, dtype=float)
+        return curves[..., lower] * (1 - weight) + curves[..., upper] * weight
+
+    def price(self, row):
+        """Grid price for ``row`` (features outside GRID_AXES are taken at their defaults)"""
+        curve = self.prices[self._category_index(row)]
+        return float(self._interpolate(curve, float(row['built_up_area'])))
+
+    def area_curve(self, row, areas):
+        """Grid prices for ``row`` at each of ``areas``"""
+        return self._interpolate(self.prices[self._category_index(row)], np.asarray(areas, dtype=float))
+
+    def compare(self, row, axis):
+        """Grid price for every value of ``axis`` with the rest of ``row`` unchanged"""
+        position = self.axis_order.index(axis)
+        index = list(self._category_index(row))
+        index[position] = slice(None)
+        curves = self.prices[tuple(index)]
+        values = self._interpolate(curves, float(row['built_up_area']))
+        return pd.Series(values, index=pd.Index(self.axes[axis], name=axis), name='price')
+
+    def what_if(self, row, base_price, axis=None, areas=None):
+        """Scale grid prices so that ``row`` itself maps to the model's ``base_price``
+
+        The grid fixes bathroom/balcony/servant/store room at their defaults, so
+        absolute grid prices can be off for a specific listing; the ratios between
+        grid cells are what carry the what-if effect.
+        """
+        scale = base_price / max(self.price(row), 1e-9)
+        if areas is not None:
+            return self.area_curve(row, areas) * scale
+        return self.compare(row, axis) * scale
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the what-if price grid")
+    parser.add_argument('--output', default=GRID_PATH, help="Destination .npy file")
+    parser.add_argument('--reference', default=DF_PATH, help="Reference frame providing the axis values")
+    parser.add_argument('--area-bins', type=int, default=DEFAULT_AREA_BINS, help="Number of built-up area bins")
+    args = parser.parse_args(argv)
+
+    # Bulk grid evaluation is fastest through the sklearn pipeline itself
+    registry = ModelRegistry(df_path=args.reference, compiled_path=None).load()
+    start = time.perf_counter()
+    table = build_lookup_table(
+        registry.pipeline, registry.df, args.output, args.area_bins, model_hash=registry.model_hash,
+        progress=lambda done, total: print(f"\rScored {done:,}/{total:,} grid cells", end='', file=sys.stderr))
+    print(f"\nWrote {args.output} {table.prices.shape} in {time.perf_counter() - start:.0f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Process-wide loading of the price prediction pipeline and its reference data.
+
+Streamlit re-executes a page script on every widget change, so anything loaded at
+module level in ``pages/2_Price Predictor.py`` is paid for again on each rerun.
+The registry below loads ``pipeline1.pkl.gz`` and the reference frame once per
+process and hands the same objects to every session (and to the batch/CLI tools).
+
+When ``pipeline1_compiled.npz`` (see ``real_estate.compiled_model``) was exported
+from the current pickle, it is loaded instead: same predictions, no sklearn import.
+Calibrated price intervals (``real_estate.intervals``) for the same model are
+loaded alongside when present.
+"""
+import gzip
+import os
+import pickle
+import threading
+import time
+
+from real_estate.artifacts import read_frame
+from real_estate.compiled_model import COMPILED_PATH, CompiledScorer, file_sha256
+from real_estate.intervals import INTERVALS_PATH, IntervalTable
+
+DF_PATH = 'datasets/artifacts/df.arrow'
+PIPELINE_PATH = 'pipeline1.pkl.gz'
+
+# Input schema expected by the pipeline, in training order
+FEATURE_COLUMNS = ['property_type', 'sector', 'bedRoom', 'bathroom', 'balcony',
+                   'agePossession', 'built_up_area', 'servant room', 'store room',
+                   'furnishing_type', 'luxury_category', 'floor_category']
+NUMERIC_COLUMNS = ['bedRoom', 'bathroom', 'built_up_area', 'servant room', 'store room']
+CATEGORICAL_COLUMNS = [c for c in FEATURE_COLUMNS if c not in NUMERIC_COLUMNS]
+
+
+class ModelRegistry:
+    """Lazily loads the pipeline and reference frame exactly once"""
+
+    def __init__(self, pipeline_path=PIPELINE_PATH, df_path=DF_PATH, compiled_path=COMPILED_PATH,
+                 intervals_path=INTERVALS_PATH):
+        self.pipeline_path = pipeline_path
+        self.df_path = df_path
+        self.compiled_path = compiled_path
+        self.intervals_path = intervals_path
+        self._lock = threading.Lock()
+        self._pipeline = None
+        self._df = None
+        self._intervals = None
+        self._stats = {}
+        self._artifact_stat = None
+        self.model_hash = None
+
+    @property
+    def loaded(self):
+        return self._pipeline is not None
+
+    @property
+    def pipeline(self):
+        return self.load()._pipeline
+
+    @property
+    def df(self):
+        return self.load()._df
+
+    @property
+    def intervals(self):
+        """IntervalTable calibrated for the loaded model, or None (fixed band)"""
+        return self.load()._intervals
+
+    def _stat_artifact(self):
+        stats = []
+        for path in (self.pipeline_path, self.compiled_path, self.intervals_path):
+            if path and os.path.exists(path):
+                stat = os.stat(path)
+                stats.append((stat.st_mtime_ns, stat.st_size))
+            else:
+                stats.append(None)
+        return tuple(stats)
+
+    def _load_model(self, model_hash):
+        """Return (model, format, bytes); prefers an up to date compiled export"""
+        if self.compiled_path and os.path.exists(self.compiled_path):
+            try:
+                scorer = CompiledScorer.load(self.compiled_path)
+            except ValueError:  # exported in an older format: fall back to the pickle
+                scorer = None
+            if scorer is not None and scorer.source_sha256 == model_hash:
+                return scorer, 'compiled', sum(a.nbytes for a in scorer.arrays.values())
+        with gzip.open(self.pipeline_path, 'rb') as file:
+            raw = file.read()
+        return pickle.loads(raw), 'pickle', len(raw)
+
+    def _load_intervals(self, model_hash):
+        if self.intervals_path and os.path.exists(self.intervals_path):
+            intervals = IntervalTable.load(self.intervals_path)
+            if intervals.model_hash == model_hash:
+                return intervals
+        return None
+
+    def load(self, force=False):
+        """Load both artifacts if not already loaded; safe to call from many threads"""
+        if self.loaded and not force:
+            return self
+        with self._lock:
+            if self.loaded and not force:
+                return self
+
+            start = time.perf_counter()
+            df = read_frame(self.df_path)
+            df_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            artifact_stat = self._stat_artifact()
+            model_hash = file_sha256(self.pipeline_path)
+            pipeline, model_format, model_bytes = self._load_model(model_hash)
+            intervals = self._load_intervals(model_hash)
+            pipeline_seconds = time.perf_counter() - start
+
+            self._stats = {
+                'df_load_seconds': df_seconds,
+                'pipeline_load_seconds': pipeline_seconds,
+                'load_seconds': df_seconds + pipeline_seconds,
+                'df_bytes': int(df.memory_usage(deep=True).sum()),
+                'model_bytes': model_bytes,
+                'model_format': model_format,
+                'loaded_at': time.time(),
+            }
+            self._df = df
+            self._pipeline = pipeline
+            self._intervals = intervals
+            self._artifact_stat = artifact_stat
+            self.model_hash = model_hash
+        return self
+
+    def refresh(self):
+        """Reload the artifacts if a model file changed on disk since the last load
+
+        Only a stat() call when nothing changed, so it is cheap enough for every rerun.
+        """
+        if not self.loaded:
+            return self.load()
+        try:
+            changed = self._stat_artifact() != self._artifact_stat
+        except OSError:
+            return self
+        return self.load(force=True) if changed else self
+
+    def stats(self):
+        """Load time (seconds) and memory footprint (bytes) of the loaded artifacts"""
+        return dict(self._stats)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the process-wide registry (artifacts are loaded on first access)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
+
+
+def warm_up(background=True):
+    """Start loading the artifacts ahead of the first prediction request"""
+    registry = get_registry()
+    if registry.loaded:
+        return None
+    if not background:
+        registry.load()
+        return None
+    thread = threading.Thread(target=registry.load, name='model-registry-warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+def format_stats(stats):
+    """Human readable one-liner for the load statistics"""
+    if not stats:
+        return "Model not loaded yet"
+    return (f"Loaded in {stats['load_seconds']:.2f}s "
+            f"(data {stats['df_bytes'] / 1e6:.1f} MB, {stats['model_format']} model {stats['model_bytes'] / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    registry = get_registry().load()
+    print(format_stats(registry.stats()))
@@ -0,0 +1,167 @@
+"""Lazy, page-parallel PDF text extraction with a character budget.
+
+``extract_text_from_pdf`` used to build one string with ``text += ...`` for
+every page (quadratic in the page count) and always read the whole file,
+even past the ``DOCUMENT_TOKEN_BUDGET`` that the map-reduce analysis
+(``real_estate.documents``) will take. Here:
+
+* ``iter_pages`` parses and yields one page at a time
+* files of ``PARALLEL_PAGES`` pages or more are split into ranges of
+  ``RANGE_PAGES`` that a process pool extracts (page parsing is pure Python and
+  holds the GIL, so threads would not help); at most two ranges per worker are
+  in flight, which bounds the memory held in finished-but-unread results. The
+  upload is written to a temporary file once and tasks only carry its path,
+  not a copy of the bytes each; the file is deleted once no queued or running
+  range can still open it. The pool uses spawned processes (forking the
+  threaded Streamlit server is unsafe) and is started once, then reused
+* extraction stops as soon as ``max_chars`` characters are collected
+* ``stats`` reports pages extracted, elapsed time and pages/sec
+
+Usage::
+
+    python -m real_estate.pdf_text report.pdf --workers 4   # serial vs parallel pages/sec
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+from real_estate.documents import CHARS_PER_TOKEN, DOCUMENT_TOKEN_BUDGET
+
+PARALLEL_PAGES = int(os.getenv('PDF_PARALLEL_PAGES', 40))
+RANGE_PAGES = 16
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', min(4, os.cpu_count() or 1)))
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _reader(data):
+    return PyPDF2.PdfReader(io.BytesIO(data) if isinstance(data, bytes) else data)
+
+
+def page_count(data):
+    return len(_reader(data).pages)
+
+
+def _read_pages(reader, start=0, stop=None):
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    for number in range(start, stop):
+        yield number, reader.pages[number].extract_text() or ''
+
+
+def iter_pages(data, start=0, stop=None):
+    """``(page number, text)`` for pages ``start`` to ``stop``, parsed one at a time
+
+    ``data`` is the PDF's bytes or a path to it.
+    """
+    return _read_pages(_reader(data), start, stop)
+
+
+def _extract_range(path, start, stop):
+    """Process pool task: the texts of pages ``start`` to ``stop`` of the PDF at ``path``"""
+    return [text for _, text in iter_pages(path, start, stop)]
+
+
+def _pool(workers):
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pools[workers]
+
+
+def _parallel_pages(data, pages, workers):
+    ranges = [(start, min(start + RANGE_PAGES, pages)) for start in range(0, pages, RANGE_PAGES)]
+    executor = _pool(workers)
+    with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as file:
+        file.write(data)
+    in_flight = []
+    try:
+        next_range = 0
+        while in_flight or next_range < len(ranges):
+            while next_range < len(ranges) and len(in_flight) < 2 * workers:
+                start, stop = ranges[next_range]
+                in_flight.append((start, executor.submit(_extract_range, file.name, start, stop)))
+                next_range += 1
+            start, future = in_flight.pop(0)
+            for offset, text in enumerate(future.result()):
+                yield start + offset, text
+    finally:
+        # Stopped early: drop the ranges nobody will read
+        for _, future in in_flight:
+            future.cancel()
+        _unlink_when_done(file.name, [future for _, future in in_flight])
+
+
+def _unlink_when_done(path, futures):
+    """Delete ``path`` once none of ``futures`` can still open it, without waiting for them here"""
+    remaining = [future for future in futures if not future.done()]
+    if not remaining:
+        os.unlink(path)
+        return
+    lock = threading.Lock()
+
+    def finished(_):
+        with lock:
+            remaining.pop()
+            last = not remaining
+        if last:
+            os.unlink(path)
+
+    for future in list(remaining):
+        future.add_done_callback(finished)
+
+
+def extract_text(data, max_chars=DOCUMENT_TOKEN_BUDGET * CHARS_PER_TOKEN, workers=PDF_WORKERS,
+                 parallel_pages=PARALLEL_PAGES):
+    """``(text, stats)`` of the PDF in ``data`` (bytes), stopping once ``max_chars`` are collected"""
+    started = time.perf_counter()
+    reader = _reader(data)
+    pages = len(reader.pages)
+    parallel = workers > 1 and pages >= parallel_pages
+    texts, chars = [], 0
+    for number, text in (_parallel_pages(data, pages, workers) if parallel else _read_pages(reader)):
+        texts.append(text)
+        chars += len(text) + 1
+        if chars >= max_chars:
+            break
+    seconds = time.perf_counter() - started
+    stats = {
+        'pages': pages,
+        'extracted': len(texts),
+        'truncated': len(texts) < pages,
+        'seconds': seconds,
+        'pages_per_sec': len(texts) / seconds if seconds > 0 else None,
+        'mode': f"{workers} processes" if parallel else 'serial',
+    }
+    return "\n".join(texts)[:max_chars], stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction")
+    parser.add_argument('pdf')
+    parser.add_argument('--workers', type=int, default=PDF_WORKERS)
+    parser.add_argument('--max-chars', type=int, default=DOCUMENT_TOKEN_BUDGET * CHARS_PER_TOKEN)
+    args = parser.parse_args(argv)
+
+    with open(args.pdf, 'rb') as f:
+        data = f.read()
+    for workers in sorted({1, args.workers}):
+        if workers > 1:
+            _pool(workers).submit(page_count, data).result()  # time extraction, not process start-up
+        text, stats = extract_text(data, args.max_chars, workers=workers, parallel_pages=1)
+        print(f"{stats['mode']:>12}: {stats['extracted']}/{stats['pages']} pages, {len(text):,} chars "
+              f"in {stats['seconds']:.2f}s ({stats['pages_per_sec']:.1f} pages/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""LRU/TTL cache of price predictions keyed on the canonical feature tuple.
+
+Many users submit the same property configuration, so predictions are memoized on
+the normalized 12-feature tuple. Entries belong to one model version: when the
+model hash passed in changes, the whole cache is dropped. Only the model's point
+prediction is cached; price intervals are applied after the lookup, so a
+recalibrated interval table takes effect without waiting for entries to expire.
+"""
+import collections
+import threading
+import time
+
+from real_estate.model_registry import FEATURE_COLUMNS, NUMERIC_COLUMNS
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_TTL = 6 * 60 * 60
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with per-entry time-to-live and hit/miss/eviction counters
+
+    ``area_bucket`` (sq.ft) optionally rounds ``built_up_area`` to the nearest
+    bucket, trading a little precision for a much higher hit rate. The rounded
+    row is what gets scored, so every hit returns exactly what a fresh
+    prediction for that key would.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, area_bucket=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.area_bucket = area_bucket
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._model_hash = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def canonicalize(self, row):
+        """Normalize a feature mapping to the values actually scored and cached"""
+        canonical = {}
+        for column in FEATURE_COLUMNS:
+            value = row[column]
+            if column in NUMERIC_COLUMNS:
+                value = float(value)
+            else:
+                value = str(value).strip()
+            canonical[column] = value
+        if self.area_bucket:
+            area = round(canonical['built_up_area'] / self.area_bucket) * self.area_bucket
+            canonical['built_up_area'] = float(max(area, self.area_bucket))
+        return canonical
+
+    def key(self, canonical_row):
+        return tuple(canonical_row[column] for column in FEATURE_COLUMNS)
+
+    def _check_model(self, model_hash):
+        if model_hash != self._model_hash:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._model_hash = model_hash
+
+    def get(self, key, model_hash=None):
+        """Return the cached value or None"""
+        with self._lock:
+            self._check_model(model_hash)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, model_hash=None):
+        with self._lock:
+            self._check_model(model_hash)
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, row, compute, model_hash=None):
+        """Return the cached prediction for ``row``, calling ``compute(canonical_row)`` on a miss"""
+        canonical = self.canonicalize(row)
+        key = self.key(canonical)
+        value = self.get(key, model_hash)
+        if value is None:
+            value = compute(canonical)
+            self.put(key, value, model_hash)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,89 @@
+"""Top-k apartment recommendations over weighted similarity views.
+
+Each view (facilities, pricing, location) supplies similarity rows for the query
+properties only, so a recommendation combines Q x N scores instead of building
+the full weighted N x N matrix, and top-k selection uses ``np.argpartition``
+rather than sorting every candidate in Python.
+"""
+import numpy as np
+import pandas as pd
+
+
+class DenseSimilarity:
+    """A precomputed N x N similarity matrix"""
+
+    def __init__(self, matrix):
+        self.matrix = np.asarray(matrix)
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def rows(self, indices):
+        return self.matrix[indices]
+
+
+def top_k(scores, k):
+    """Indices and values of the k largest entries in each row of ``scores``
+
+    Ties are broken by position, matching a stable descending sort, including ties
+    straddling the k-th place.
+    """
+    scores = np.atleast_2d(scores)
+    k = min(k, scores.shape[1])
+    indices = np.empty((scores.shape[0], k), dtype=np.intp)
+    for q, row in enumerate(scores):
+        kth = row[np.argpartition(row, -k)[-k]]
+        candidates = np.flatnonzero(row >= kth)
+        order = np.lexsort((candidates, -row[candidates]))[:k]
+        indices[q] = candidates[order]
+    return indices, np.take_along_axis(scores, indices, axis=1)
+
+
+class Recommender:
+    """Weighted combination of similarity views keyed by property name
+
+    ``index`` is an optional nearest-neighbour index (see ``real_estate.ann``)
+    used for top-k search instead of scoring every property.
+    """
+
+    def __init__(self, names, views, index=None):
+        self.names = pd.Index(names)
+        self.views = list(views)
+        self.index = index
+        if any(len(view) != len(self.names) for view in self.views):
+            raise ValueError("Every similarity view must cover every property")
+
+    def positions(self, property_names):
+        return self.names.get_indexer(property_names)
+
+    def scores(self, query_positions, weights):
+        """(Q, N) weighted similarity of each query property to every property"""
+        query_positions = np.atleast_1d(query_positions)
+        combined = np.zeros((query_positions.size, len(self.names)))
+        for weight, view in zip(weights, self.views):
+            if weight:
+                combined += weight * view.rows(query_positions)
+        return combined
+
+    def top_k(self, query_positions, weights, k=5):
+        """Top-k (positions, scores) per query, never recommending a query to itself"""
+        query_positions = np.atleast_1d(query_positions)
+        if self.index is not None:
+            return self.index.search(query_positions, weights, k)
+        scores = self.scores(query_positions, weights)
+        scores[np.arange(query_positions.size), query_positions] = -np.inf
+        return top_k(scores, k)
+
+    def recommend(self, property_names, weights, top_n=5):
+        """One DataFrame of recommendations per query property name"""
+        positions = self.positions(property_names)
+        if (positions < 0).any():
+            unknown = [name for name, p in zip(property_names, positions) if p < 0]
+            raise KeyError(f"Unknown properties: {unknown}")
+        indices, scores = self.top_k(positions, weights, top_n)
+        # An ANN index pads with -1 when it has fewer than top_n candidates
+        return [
+            pd.DataFrame({'Property Name': self.names[row_indices[row_indices >= 0]],
+                          'Similarity Score': row_scores[row_indices >= 0]})
+            for row_indices, row_scores in zip(indices, scores)
+        ]
@@ -0,0 +1,75 @@
+"""BM25 retrieval over the chunks of a session's uploaded documents.
+
+Follow-up questions on the Ask AI page used to carry every file's full
+analysis as context, so prompts grew with each upload. ``BM25Index`` is built
+once per analysis from the extracted text and the analyses, split into
+``PASSAGE_TOKENS`` chunks, and each follow-up sends only the ``TOP_K`` best
+matching passages. Scoring is Okapi BM25 over sklearn's term counts: local,
+no embedding model or network call, and fast enough to rebuild per upload.
+"""
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+from real_estate.documents import split_chunks
+
+PASSAGE_TOKENS = 250
+TOP_K = 6
+K1 = 1.5
+B = 0.75
+
+
+class BM25Index:
+    """Okapi BM25 over passages, each tagged with the file it came from"""
+
+    def __init__(self, passages, sources, k1=K1, b=B):
+        self.passages = list(passages)
+        self.sources = list(sources)
+        self.k1, self.b = k1, b
+        self.vectorizer = CountVectorizer(stop_words='english')
+        counts = self.vectorizer.fit_transform(self.passages).tocsc().astype(np.float64)
+        lengths = np.asarray(counts.sum(axis=1)).ravel()
+        documents = len(self.passages)
+        frequency = np.diff(counts.indptr)
+        self.idf = np.log(1 + (documents - frequency + 0.5) / (frequency + 0.5))
+
+        # Precompute each (term, passage) weight; a query then sums columns
+        rows = counts.indices
+        norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1))
+        tf = counts.data
+        counts.data = tf * (k1 + 1) / (tf + norm[rows]) * np.repeat(self.idf, frequency)
+        self.weights = counts
+
+    @classmethod
+    def from_documents(cls, documents, passage_tokens=PASSAGE_TOKENS):
+        """Index ``{source: text}``, splitting each text into passages"""
+        passages, sources = [], []
+        for source, text in documents.items():
+            for chunk in split_chunks(text or '', passage_tokens):
+                passages.append(chunk)
+                sources.append(source)
+        if not passages:
+            return None
+        try:
+            return cls(passages, sources)
+        except ValueError:  # only stop words
+            return None
+
+    def _top(self, query, k):
+        vocabulary = self.vectorizer.vocabulary_
+        terms = [vocabulary[term] for term in set(self.vectorizer.build_analyzer()(query)) if term in vocabulary]
+        if not terms:
+            return np.empty(0, dtype=int), np.empty(0)
+        scores = np.asarray(self.weights[:, terms].sum(axis=1)).ravel()
+        best = np.argsort(-scores, kind='stable')[:k]
+        best = best[scores[best] > 0]
+        return best, scores[best]
+
+    def search(self, query, k=TOP_K):
+        """``(score, source, passage)`` of the ``k`` best passages, best first"""
+        best, scores = self._top(query, k)
+        return [(float(score), self.sources[i], self.passages[i]) for i, score in zip(best, scores)]
+
+    def context(self, query, k=TOP_K):
+        """The ``k`` best passages formatted for a prompt, in document order"""
+        best, _ = self._top(query, k)
+        return "\n\n".join(f"[From {self.sources[i]}]\n{self.passages[i]}" for i in sorted(best))
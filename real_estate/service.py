@@ -0,0 +1,246 @@
+"""Local HTTP/JSON price prediction service with request micro-batching.
+
+Concurrent single-listing requests are queued and scored together in one
+``pipeline.predict`` call, which amortizes the per-call ColumnTransformer
+overhead across the batch. Usage::
+
+    python -m real_estate.service --port 8502 --max-batch-size 64 --max-wait-ms 5
+
+Endpoints:
+    POST /predict   one listing (JSON object) or a list of listings
+    GET  /metrics   latency percentiles, throughput and batching counters
+    GET  /health    liveness check
+"""
+import argparse
+import collections
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from real_estate.batch import predict_prices, prepare_features
+from real_estate.model_registry import FEATURE_COLUMNS, get_registry
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT = 0.005
+
+
+class ServiceMetrics:
+    """Thread-safe latency and throughput counters
+
+    Percentiles and throughput both cover the last ``window`` requests.
+    """
+
+    def __init__(self, window=10_000):
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=window)
+        self._finished_at = collections.deque(maxlen=window)
+        self.started_at = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_rows = 0
+
+    def record_request(self, seconds, ok=True):
+        with self._lock:
+            self._latencies.append(seconds)
+            self._finished_at.append(time.time())
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+
+    def record_batch(self, size):
+        with self._lock:
+            self.batches += 1
+            self.batched_rows += size
+
+    def snapshot(self):
+        with self._lock:
+            latencies = np.fromiter(self._latencies, dtype=float)
+            now = time.time()
+            uptime = now - self.started_at
+            # Requests per second since the oldest request still in the window
+            span = now - self._finished_at[0] if self._finished_at else 0.0
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if latencies.size else (None, None)
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'batches': self.batches,
+                'rows_scored': self.batched_rows,
+                'mean_batch_size': self.batched_rows / self.batches if self.batches else 0.0,
+                'latency_p50_ms': p50,
+                'latency_p99_ms': p99,
+                'throughput_rps': len(self._finished_at) / span if span > 0 else 0.0,
+                'uptime_seconds': uptime,
+            }
+
+
+class MicroBatcher:
+    """Coalesce single rows submitted from many threads into pipeline batches"""
+
+    def __init__(self, pipeline, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT,
+                 metrics=None, intervals=None):
+        self.pipeline = pipeline
+        self.intervals = intervals
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.metrics = metrics or ServiceMetrics()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, row):
+        """Queue one listing (dict of the 12 features); returns a Future of (price, low, high)"""
+        future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _score(self, rows):
+        features = prepare_features(pd.DataFrame(list(rows)))
+        price, low, high = predict_prices(self.pipeline, features, self.intervals)
+        return [(float(price[i]), float(low[i]), float(high[i])) for i in range(len(rows))]
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            rows, futures = zip(*batch)
+            try:
+                results = self._score(rows)
+            except Exception:
+                # One bad row must not fail its neighbours: score them one at a time
+                self.metrics.record_batch(len(batch))
+                for row, future in batch:
+                    try:
+                        future.set_result(self._score([row])[0])
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+            self.metrics.record_batch(len(batch))
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    """JSON endpoints backed by the server's MicroBatcher"""
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/metrics':
+            self._send_json(200, self.server.batcher.metrics.snapshot())
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+
+        start = time.perf_counter()
+        metrics = self.server.batcher.metrics
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'null')
+            listings = payload if isinstance(payload, list) else [payload]
+            for listing in listings:
+                if not isinstance(listing, dict):
+                    raise ValueError("Each listing must be a JSON object")
+                missing = [c for c in FEATURE_COLUMNS if c not in listing]
+                if missing:
+                    raise ValueError(f"Listing is missing required fields: {', '.join(missing)}")
+            # Coerce here so a malformed listing is rejected alone, before it joins a batch
+            if listings:
+                listings = prepare_features(pd.DataFrame(listings)).to_dict('records')
+        except ValueError as e:
+            metrics.record_request(time.perf_counter() - start, ok=False)
+            self._send_json(400, {'error': str(e)})
+            return
+
+        try:
+            futures = [self.server.batcher.submit(listing) for listing in listings]
+            results = [future.result() for future in futures]
+        except ValueError as e:
+            # e.g. a category the model has never seen
+            metrics.record_request(time.perf_counter() - start, ok=False)
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            metrics.record_request(time.perf_counter() - start, ok=False)
+            self._send_json(500, {'error': str(e)})
+            return
+
+        predictions = [{'price': p, 'low': lo, 'high': hi} for p, lo, hi in results]
+        metrics.record_request(time.perf_counter() - start)
+        self._send_json(200, predictions if isinstance(payload, list) else predictions[0])
+
+    def log_message(self, format, *args):
+        # Keep the console quiet under load; /metrics carries the useful numbers
+        pass
+
+
+class PredictionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Concurrent clients are the whole point; don't reset connections past 5 pending
+    request_queue_size = 128
+
+
+def create_server(host='127.0.0.1', port=8502, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                  max_wait=DEFAULT_MAX_WAIT, pipeline=None, intervals=None):
+    """Build (but do not start) the HTTP server"""
+    if pipeline is None:
+        registry = get_registry()
+        pipeline, intervals = registry.pipeline, registry.intervals
+    server = PredictionServer((host, port), PredictionHandler)
+    server.batcher = MicroBatcher(pipeline, max_batch_size=max_batch_size, max_wait=max_wait,
+                                  intervals=intervals)
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve price predictions over local HTTP/JSON")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--max-batch-size', type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="Most listings scored in one pipeline call")
+    parser.add_argument('--max-wait-ms', type=float, default=DEFAULT_MAX_WAIT * 1000,
+                        help="Longest a request waits for its batch to fill")
+    args = parser.parse_args(argv)
+
+    server = create_server(args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000)
+    print(f"Serving price predictions on http://{args.host}:{args.port}/predict")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Bounded thread pool that yields results in completion order.
+
+``analyze_files`` used to extract and analyze uploaded files one after the
+other, so ten documents took ten times one Groq round trip. Each file's
+extraction and model call run in a small thread pool instead; the time is
+spent waiting on the API, so the calls overlap almost perfectly.
+``MAX_WORKERS`` bounds the concurrent API calls and ``TASK_TIMEOUT`` bounds how
+long one file may keep the user waiting; both can be set with
+``ANALYSIS_MAX_WORKERS`` and ``ANALYSIS_TASK_TIMEOUT``.
+
+A thread cannot be killed, so a timed-out task is reported and asked to stop:
+its cancellation event is set, and long-running work inside it (the chunk loop
+of a streamed model call, see ``real_estate.llm_stream``) polls ``cancelled()``
+and gives up. Tasks started from inside a task, like the chunk summaries of a
+document, are cancelled along with it. Whatever the task still returns is
+ignored.
+"""
+import collections
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+MAX_WORKERS = int(os.getenv('ANALYSIS_MAX_WORKERS', 4))
+TASK_TIMEOUT = float(os.getenv('ANALYSIS_TASK_TIMEOUT', 120))
+POLL_INTERVAL = 0.25
+
+TaskResult = collections.namedtuple('TaskResult', ['index', 'result', 'error', 'seconds'])
+
+# Cancellation events of the task running on this thread and of the tasks that started it
+_local = threading.local()
+
+
+def cancelled():
+    """True once the task running on this thread, or one that started it, should stop"""
+    return any(event.is_set() for event in getattr(_local, 'events', ()))
+
+
+def as_completed(func, items, max_workers=MAX_WORKERS, timeout=TASK_TIMEOUT, on_wait=None):
+    """Yield a ``TaskResult`` for each ``func(item)`` as soon as it finishes
+
+    ``index`` is the item's position in ``items``; ``error`` holds the raised
+    exception, or a ``TimeoutError`` once the call has run longer than
+    ``timeout`` seconds. A timed-out call, and every call still running when
+    the caller stops iterating, is cancelled (see ``cancelled``).
+    ``on_wait()``, if given, is called on the caller's thread after every poll,
+    e.g. to draw output the tasks have produced so far.
+    """
+    started = {}
+    inherited = getattr(_local, 'events', ())
+    events = [threading.Event() for _ in items]
+
+    def run(index, item):
+        started[index] = time.perf_counter()
+        _local.events = inherited + (events[index],)
+        try:
+            return func(item)
+        finally:
+            _local.events = ()
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='analysis')
+    futures = {executor.submit(run, index, item): index for index, item in enumerate(items)}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            if on_wait is not None:
+                on_wait()
+            now = time.perf_counter()
+            for future in done:
+                index = futures[future]
+                error = future.exception()
+                yield TaskResult(index, None if error else future.result(), error, now - started[index])
+            for future in list(pending):
+                index = futures[future]
+                if index in started and now - started[index] > timeout:
+                    events[index].set()
+                    pending.discard(future)
+                    error = TimeoutError(f"no result after {timeout:.0f} s")
+                    yield TaskResult(index, None, error, now - started[index])
+    finally:
+        for event in events:
+            event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+
+from real_estate.analytics import DATA_VIZ_PATH, AnalyticsData
+
+
+@pytest.fixture(scope='module')
+def data():
+    return AnalyticsData(pd.read_csv(DATA_VIZ_PATH), version='test')
+
+
+def test_shared_values_reject_in_place_writes(data):
+    frame = data.frame
+    with pytest.raises(ValueError, match='read-only'):
+        frame['price'].to_numpy()[0] = -1.0
+    with pytest.raises(ValueError, match='read-only'):
+        data.sector_means['price'].to_numpy()[0] = -1.0
+    assert (data.frame['price'] > 0).all()
+
+
+def test_a_session_can_add_columns_to_its_copy(data):
+    frame = data.frame
+    frame['price_lakh'] = frame['price'] * 100
+    frame['price'] = 0.0  # replacing a column only changes this copy
+    assert 'price_lakh' not in data.frame
+    assert (data.frame['price'] > 0).all()
+
+
+def test_categorical_columns_are_typed_and_shared(data):
+    frame = data.frame
+    assert isinstance(frame['sector'].dtype, pd.CategoricalDtype)
+    with pytest.raises(ValueError, match='read-only'):
+        frame['sector'].cat.codes.to_numpy()[0] = 0
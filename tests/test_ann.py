@@ -0,0 +1,41 @@
+import numpy as np
+
+from real_estate.ann import IVFIndex, build_index, load_or_build
+from real_estate.compiled_model import file_sha256
+from real_estate.embeddings import EMBEDDINGS_PATH, load_embeddings
+from real_estate.recommender import Recommender
+
+WEIGHTS = (0.5, 0.8, 1.0)
+
+
+def test_sparse_probe_still_returns_k_real_neighbours():
+    names, views = load_embeddings()
+    index = build_index(views, n_lists=64, n_probe=1)
+    positions, scores = index.search(np.arange(len(names)), WEIGHTS, k=5)
+    assert (positions >= 0).all()
+    assert np.isfinite(scores).all()
+
+
+def test_recommend_drops_padding():
+    names, views = load_embeddings()
+    full = build_index(views, backend='exact')
+    # Three items: every query has only two neighbours to offer
+    small = IVFIndex.build(full.items[:3], full.view_dims, n_lists=2, n_probe=1)
+    recommender = Recommender(names[:3], [], small)
+    result = recommender.recommend([names[0]], WEIGHTS, top_n=5)[0]
+    assert len(result) == 2
+    assert names[0] not in set(result['Property Name'])
+    assert np.isfinite(result['Similarity Score']).all()
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    names, views = load_embeddings()
+    stale = build_index(views, n_lists=8, n_probe=2)
+    stale.source_sha256 = 'not the embeddings file'
+    stale.save(tmp_path / 'ann.npz')
+    index = load_or_build(views, tmp_path / 'ann.npz')
+    assert index.source_sha256 == file_sha256(EMBEDDINGS_PATH)
+    assert index.centroids.shape[0] == 8
+
+    index.save(tmp_path / 'ann.npz')
+    assert load_or_build(views, tmp_path / 'ann.npz').source_sha256 == index.source_sha256
@@ -0,0 +1,72 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from real_estate.batch import score_file
+
+LISTING = {
+    'property_type': 'flat', 'sector': 'sector 45', 'bedRoom': 3, 'bathroom': 2, 'balcony': '3+',
+    'agePossession': 'New Property', 'built_up_area': 1500, 'servant room': 0, 'store room': 0,
+    'furnishing_type': 'unfurnished', 'luxury_category': 'Low', 'floor_category': 'Mid Floor',
+}
+
+
+class FakePipeline:
+    """log price = built up area / 1000; unknown sectors raise like OneHotEncoder"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, frame):
+        self.calls += 1
+        unknown = sorted(set(frame['sector']) - {'sector 45', 'sector 46'})
+        if unknown:
+            raise ValueError(f"Found unknown categories {unknown} in column 'sector'")
+        return np.log1p(frame['built_up_area'].to_numpy() / 1000)
+
+
+def listings_csv():
+    frame = pd.DataFrame([LISTING, {**LISTING, 'sector': 'sector 999'}, {**LISTING, 'built_up_area': 'large'},
+                          {**LISTING, 'built_up_area': 2000}, {**LISTING, 'sector': 'sector 46'}])
+    return io.StringIO(frame.to_csv(index=False))
+
+
+def test_bad_rows_get_nan_and_error_instead_of_failing_the_file():
+    output = io.StringIO()
+    rows, failed = score_file(listings_csv(), output, chunksize=2, pipeline=FakePipeline(), output_format='csv')
+    scored = pd.read_csv(io.StringIO(output.getvalue()))
+    assert (rows, failed) == (5, 2)
+    np.testing.assert_allclose(scored['predicted_price'], [1.5, np.nan, np.nan, 2.0, 1.5])
+    assert scored['error'].isna().tolist() == [True, False, False, True, True]
+    assert 'sector 999' in scored['error'][1]
+
+
+def test_one_bad_row_in_a_large_chunk_costs_logarithmic_calls():
+    frame = pd.DataFrame([LISTING] * 1024)
+    frame.loc[700, 'sector'] = 'sector 999'
+    output, pipeline = io.StringIO(), FakePipeline()
+    rows, failed = score_file(io.StringIO(frame.to_csv(index=False)), output, chunksize=1024,
+                              pipeline=pipeline, output_format='csv')
+    scored = pd.read_csv(io.StringIO(output.getvalue()))
+    assert (rows, failed) == (1024, 1)
+    assert scored['error'].notna().tolist() == [i == 700 for i in range(1024)]
+    np.testing.assert_allclose(scored['predicted_price'].drop(700), 1.5)
+    assert pipeline.calls == 1 + 2 * 10  # the whole chunk, then both halves at each of 10 levels
+
+
+def test_parquet_schema_survives_chunks_of_different_shapes():
+    output = io.BytesIO()
+    score_file(listings_csv(), output, chunksize=1, pipeline=FakePipeline(), output_format='parquet')
+    table = pq.read_table(io.BytesIO(output.getvalue()))
+    assert table.num_rows == 5
+    assert str(table.schema.field('error').type) == 'string'
+    assert str(table.schema.field('built_up_area').type) == 'double'
+
+
+def test_missing_columns_still_fail_fast():
+    source = io.StringIO(pd.DataFrame([LISTING]).drop(columns='sector').to_csv(index=False))
+    with pytest.raises(ValueError, match='sector'):
+        score_file(source, io.StringIO(), pipeline=FakePipeline(), output_format='csv')
@@ -0,0 +1,63 @@
+import threading
+import types
+
+import plotly.graph_objects as go
+
+from real_estate.charts import ChartRegistry
+
+
+def counting_registry(calls):
+    registry = ChartRegistry()
+    for chart_id in ('bar', 'map'):
+        def build(data, chart_id=chart_id):
+            calls.append((chart_id, data.version))
+            return go.Figure(go.Bar(x=[1, 2], y=[3, 4]))
+        registry.chart(chart_id)(build)
+    return registry
+
+
+def request_all(registry, requests):
+    threads = [threading.Thread(target=registry.spec, args=request) for request in requests]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_different_charts_build_in_parallel_and_each_only_once():
+    registry = ChartRegistry()
+    calls = []
+    map_started = threading.Event()
+    overlapped = []
+
+    @registry.chart('bar')
+    def bar(data):
+        calls.append('bar')
+        # Under one global lock 'map' could not start until this returns
+        overlapped.append(map_started.wait(5))
+        return go.Figure(go.Bar(x=[1, 2], y=[3, 4]))
+
+    @registry.chart('map')
+    def map_chart(data):
+        calls.append('map')
+        map_started.set()
+        return go.Figure(go.Bar(x=[1, 2], y=[3, 4]))
+
+    data = types.SimpleNamespace(version='v1')
+    request_all(registry, [('bar', data), ('map', data)] * 3)
+    assert overlapped == [True]
+    assert sorted(calls) == ['bar', 'map']
+    assert sorted(registry.built('v1')) == ['bar', 'map']
+
+
+def test_specs_of_older_versions_are_dropped():
+    calls = []
+    registry = counting_registry(calls)
+    old, new = types.SimpleNamespace(version='v1'), types.SimpleNamespace(version='v2')
+    registry.spec('bar', old)
+    registry.spec('map', old)
+    registry.spec('bar', new)
+    assert registry.built('v1') == []
+    assert registry.built('v2') == ['bar']
+    registry.spec('bar', new)
+    assert calls.count(('bar', 'v2')) == 1
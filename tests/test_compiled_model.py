@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder, StandardScaler
+
+from real_estate.compiled_model import CompiledScorer, compile_pipeline, verify
+
+
+def training_frame(rows=300, missing=False):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'area': rng.uniform(500, 3000, rows),
+        'rooms': rng.integers(1, 5, rows).astype(float),
+        'sector': rng.choice(['sector 1', 'sector 2', 'sector 3'], rows),
+        'kind': rng.choice(['flat', 'house'], rows),
+    })
+    y = np.log1p(frame['area'] / 1000 + frame['rooms'] * 0.1 + (frame['sector'] == 'sector 2'))
+    if missing:
+        frame.loc[frame.index[::7], 'area'] = np.nan
+    return frame, y
+
+
+def fit(encoders, missing=False):
+    frame, y = training_frame(missing=missing)
+    preprocessor = ColumnTransformer([
+        ('num', StandardScaler(), ['area', 'rooms']),
+        ('cat', encoders[0], ['sector', 'kind']),
+        ('cat1', encoders[1], ['sector']),
+    ])
+    pipeline = Pipeline([('preprocessor', preprocessor),
+                         ('regressor', RandomForestRegressor(n_estimators=5, random_state=0))])
+    return pipeline.fit(frame, y), frame
+
+
+@pytest.mark.parametrize('missing', [False, True])
+def test_missing_values_follow_sklearn_routing(missing):
+    pipeline, frame = fit([OrdinalEncoder(), OneHotEncoder(drop='first')], missing=missing)
+    scorer = compile_pipeline(pipeline)
+    rows = frame.iloc[:50].copy()
+    rows.loc[rows.index[::2], 'area'] = np.nan
+    rows.loc[rows.index[::3], 'rooms'] = np.nan
+    np.testing.assert_allclose(scorer.predict(rows), pipeline.predict(rows), atol=1e-9)
+    verify(pipeline, scorer, frame)
+
+
+def test_unknown_category_policies_are_compiled(tmp_path):
+    pipeline, frame = fit([OrdinalEncoder(handle_unknown='use_encoded_value', unknown_value=-1),
+                           OneHotEncoder(handle_unknown='ignore')])
+    compile_pipeline(pipeline).save(tmp_path / 'model.npz')
+    scorer = CompiledScorer.load(tmp_path / 'model.npz')
+    rows = frame.iloc[:4].copy()
+    rows['sector'] = ['sector 1', 'sector 99', 'sector 3', 'nowhere']
+    rows['kind'] = ['flat', 'flat', 'villa', 'house']
+    np.testing.assert_allclose(scorer.predict(rows), pipeline.predict(rows), atol=1e-9)
+    verify(pipeline, scorer, frame)
+
+
+def test_unknown_category_raises_like_the_pipeline():
+    pipeline, frame = fit([OrdinalEncoder(), OneHotEncoder()])
+    rows = frame.iloc[:1].assign(sector='sector 99')
+    with pytest.raises(ValueError, match='sector 99'):
+        compile_pipeline(pipeline).predict(rows)
+
+
+def test_refuses_infrequent_categories():
+    pipeline, _ = fit([OrdinalEncoder(), OneHotEncoder(handle_unknown='infrequent_if_exist', min_frequency=0.4)])
+    with pytest.raises(TypeError, match='infrequent'):
+        compile_pipeline(pipeline)
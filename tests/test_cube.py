@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from real_estate.analytics import DATA_VIZ_PATH, AnalyticsData
+from real_estate.cube import DEFAULT_ALPHA, MAX_OUTLIERS, AggregateCube
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return AnalyticsData(pd.read_csv(DATA_VIZ_PATH)).frame
+
+
+@pytest.mark.parametrize('by, measure', [
+    (['sector'], 'price'),
+    (['bedRoom'], 'price'),
+    (['property_type'], 'price_per_sqft'),
+])
+def test_box_stats_quartiles_match_pandas_within_alpha(frame, by, measure):
+    cube = AggregateCube.build(frame)
+    box = cube.box_stats(by, measure)
+    expected = frame.groupby(by, observed=True)[measure].quantile([0.25, 0.5, 0.75]).unstack()
+    expected.index = box.index
+    for q, column in ((0.25, 'q1'), (0.5, 'median'), (0.75, 'q3')):
+        np.testing.assert_allclose(box[column], expected[q], rtol=DEFAULT_ALPHA)
+
+
+def test_two_value_group_interpolates():
+    frame = pd.DataFrame({'sector': 'sector 1', 'property_type': 'flat', 'bedRoom': 2, 'month': 1,
+                          'price': [0.33, 2.37], 'price_per_sqft': 1.0, 'built_up_area': 1.0,
+                          'latitude': 0.0, 'longitude': 0.0})
+    median = AggregateCube.build(frame).quantiles(['sector'], 'price', (0.5,))[0.5].iloc[0]
+    assert median == pytest.approx(1.35, rel=DEFAULT_ALPHA)
+
+
+def test_box_outliers_are_the_values_outside_the_fences(frame):
+    box = AggregateCube.build(frame).box_stats(['sector'], 'price')
+    for sector, prices in frame.groupby('sector', observed=True)['price']:
+        row = box.loc[sector]
+        iqr = row['q3'] - row['q1']
+        outside = prices[(prices < row['q1'] - 1.5 * iqr) | (prices > row['q3'] + 1.5 * iqr)]
+        np.testing.assert_array_equal(row['outliers'], np.sort(outside.to_numpy()))
+
+
+def test_outliers_survive_save_and_load(frame, tmp_path):
+    cube = AggregateCube.build(frame)
+    cube.save(tmp_path / 'cube.npz')
+    loaded = AggregateCube.load(tmp_path / 'cube.npz')
+    for before, after in zip(cube.box_stats(['bedRoom'], 'price')['outliers'],
+                             loaded.box_stats(['bedRoom'], 'price')['outliers']):
+        np.testing.assert_array_equal(before, after)
+        assert len(after) <= MAX_OUTLIERS
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import gaussian_kde
+
+from real_estate.charts import distribution_figure
+from real_estate.density import fft_kde, group_distributions
+
+
+def test_fft_kde_matches_scipy():
+    values = np.random.default_rng(0).lognormal(0, 0.5, 2000)
+    grid, density = fft_kde(values)
+    np.testing.assert_allclose(density, gaussian_kde(values)(grid), atol=2e-3)
+
+
+@pytest.mark.parametrize('values', [[1.5], [2.0, 2.0, 2.0]])
+def test_fft_kde_refuses_values_without_spread(values):
+    with pytest.raises(ValueError, match='distinct'):
+        fft_kde(values)
+
+
+def test_degenerate_groups_get_a_histogram_but_no_curve():
+    frame = pd.DataFrame({'property_type': ['flat'] * 50 + ['house'] + ['plot'] * 3,
+                          'price': list(np.linspace(0.5, 3, 50)) + [4.0] + [1.0] * 3})
+    distributions = group_distributions(frame, 'price', 'property_type')
+    assert distributions['flat']['kde']['count'].notna().all()
+    for group in ('house', 'plot'):
+        assert distributions[group]['kde'] is None
+        assert distributions[group]['counts'].sum() == (frame['property_type'] == group).sum()
+    fig = distribution_figure(distributions, {g: (g, 'red') for g in ('flat', 'house', 'plot')})
+    assert [trace.type for trace in fig.data] == ['bar', 'scatter', 'bar', 'bar']
+
+
+def test_styled_group_without_rows_is_skipped():
+    frame = pd.DataFrame({'property_type': ['flat'] * 20, 'price': np.linspace(0.5, 3, 20)})
+    distributions = group_distributions(frame, 'price', 'property_type')
+    fig = distribution_figure(distributions, {'house': ('House', 'blue'), 'flat': ('Flat', 'red')})
+    assert [trace.name for trace in fig.data] == ['Flat', 'Flat KDE']
@@ -0,0 +1,56 @@
+import threading
+import time
+
+from real_estate import documents, workers
+
+
+class CallCounter:
+    """Stub model call that records how many calls overlap"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def __call__(self, text):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.02)
+        with self._lock:
+            self.running -= 1
+        return text[:20]
+
+
+def test_concurrent_files_share_one_bound_on_model_calls(monkeypatch):
+    monkeypatch.setattr(documents, 'LLM_CALLS', threading.BoundedSemaphore(3))
+    model = CallCounter()
+    text = "\n\n".join(f"paragraph {i} " + "word " * 400 for i in range(12))
+
+    def analyze(text):
+        return documents.map_reduce(text, model, model, max_tokens=500, max_workers=4)
+
+    results = list(workers.as_completed(analyze, [text] * 4, max_workers=4))
+    assert all(task.error is None for task in results)
+    assert model.peak == 3
+
+
+def test_short_document_is_answered_in_one_call():
+    model = CallCounter()
+    assert documents.map_reduce("a short lease", model, lambda text: f"answer: {text}") == "answer: a short lease"
+    assert model.peak == 0
+
+
+def test_text_over_the_budget_is_cut_and_the_answer_says_so():
+    seen = []
+    text = "\n\n".join(f"paragraph {i} " + "word " * 400 for i in range(12))  # ~6,000 tokens
+
+    def summarize(chunk):
+        seen.append(chunk)
+        return chunk[:20]
+
+    answer = documents.map_reduce(text, summarize, lambda content: "answer", max_tokens=500, budget=1_000)
+    assert sum(len(chunk) for chunk in seen) <= 1_000 * documents.CHARS_PER_TOKEN
+    assert "paragraph 11" not in "".join(seen)
+    assert answer.startswith("_Only the first 4,000 of")
+    assert answer.endswith("answer")
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from real_estate.geo import LandmarkDistances, SpatialIndex, haversine
+
+
+def test_landmark_column_matches_the_stored_distances():
+    measured = pd.read_csv('datasets/landmark_distances.csv')
+    distances = LandmarkDistances(measured)
+    for landmark, rows in measured.groupby('landmark'):
+        expected = rows.set_index('PropertyName')['distance_m']
+        assert distances.column(landmark).dropna().sort_index().equals(expected.astype(float).sort_index())
+
+
+def test_within_is_sorted_and_bounded():
+    measured = pd.DataFrame({'PropertyName': ['a', 'b', 'c', 'a'], 'landmark': ['Mall', 'Mall', 'Mall', 'Park'],
+                             'distance_m': [3000.0, 800.0, 9000.0, 100.0]})
+    result = LandmarkDistances(measured).within('Mall', 5000)
+    assert result.index.tolist() == ['b', 'a']
+    assert result.tolist() == [800.0, 3000.0]
+
+
+def test_spatial_index_radius_matches_haversine():
+    rng = np.random.default_rng(0)
+    lats, lons = 28.45 + rng.normal(0, 0.05, 200), 77.03 + rng.normal(0, 0.05, 200)
+    index = SpatialIndex([f"p{i}" for i in range(200)], lats, lons)
+    result = index.within(28.46, 77.02, 3000)
+    distances = haversine(28.46, 77.02, lats, lons)
+    assert set(result.index) == {f"p{i}" for i in np.flatnonzero(distances < 3000)}
+    assert np.allclose(result.values, np.sort(distances[distances < 3000]))
+
+
+def test_points_on_one_sector_centre_are_counted_as_sharing():
+    index = SpatialIndex(['a', 'b', 'c'], [28.40, 28.40, 28.50], [77.00, 77.00, 77.10])
+    assert index.sharing.to_dict() == {'a': 2, 'b': 2, 'c': 1}
@@ -0,0 +1,16 @@
+import numpy as np
+
+from real_estate.intervals import calibrate
+
+
+def test_levels_report_the_fallback_actually_used():
+    rng = np.random.default_rng(0)
+    property_types = ['flat'] * 80 + ['house'] * 10
+    sectors = ['sector 45'] * 40 + ['sector 46'] * 40 + ['sector 45'] * 10
+    table = calibrate(rng.normal(0, 0.2, 90), property_types, sectors, min_group_size=30)
+
+    queries = (['flat', 'house', 'villa'], ['sector 45', 'sector 45', 'sector 45'])
+    assert table.levels(*queries).tolist() == ['segment', 'property_type', 'global']
+    q = table.quantiles(*queries)
+    np.testing.assert_allclose(q[1], table.table['property_type']['house'][:2])
+    np.testing.assert_allclose(q[2], table.table['global'][:2])
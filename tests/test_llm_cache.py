@@ -0,0 +1,185 @@
+import threading
+import time
+import types
+
+import pytest
+
+from real_estate.llm_cache import ResponseCache
+from real_estate.llm_stream import IncompleteResponse, StreamingChat, StreamRelay
+
+
+def chunk(text):
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=text))],
+                                 x_groq=None, usage=None)
+
+
+class FakeStream:
+    def __init__(self, tokens, fail_at=None):
+        self.tokens = tokens
+        self.fail_at = fail_at
+        self.closed = False
+
+    def __iter__(self):
+        for i in range(self.tokens):
+            if self.closed:  # like httpx, a closed response yields nothing more
+                return
+            if i == self.fail_at:
+                raise ConnectionError("connection reset")
+            yield chunk(f"t{i} ")
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    """Stands in for groq.Groq: ``chat.completions.create(stream=True)`` yields ``max_tokens`` chunks"""
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.requests = []
+        self.chat = types.SimpleNamespace(completions=self)
+
+    def create(self, stream=False, **request):
+        self.requests.append(request)
+        self.last = FakeStream(request['max_tokens'], self.fail_at)
+        return self.last
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(str(tmp_path / 'responses.sqlite3'))
+
+
+def ask(cache, chat, question='Which sector is cheapest?', params=None, stop_after=None):
+    params = params or {'model': 'llama-3.1-8b-instant', 'temperature': 0.2, 'max_tokens': 5}
+
+    def compute():
+        stream = chat.stream(messages=[{'role': 'user', 'content': question}], **params)
+        deltas = iter(stream)
+        for i, _ in enumerate(deltas):
+            if i + 1 == stop_after:
+                deltas.close()  # the reader went away, e.g. a Streamlit rerun
+        return stream.result()
+
+    return cache.get_or_compute('bar chart', question, 'v1', 'data-1', compute, params=params)
+
+
+def test_repeat_question_is_a_hit(cache):
+    client = FakeClient()
+    chat = StreamingChat(client)
+    first = ask(cache, chat)
+    assert ask(cache, chat, question='  which SECTOR is cheapest ') == first == "t0 t1 t2 t3 t4 "
+    assert len(client.requests) == 1
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+
+
+@pytest.mark.parametrize('changed', [{'model': 'llama-3.3-70b-versatile'}, {'temperature': 0.7}, {'max_tokens': 6}])
+def test_key_includes_model_and_params(cache, changed):
+    client = FakeClient()
+    chat = StreamingChat(client)
+    params = {'model': 'llama-3.1-8b-instant', 'temperature': 0.2, 'max_tokens': 5}
+    ask(cache, chat, params=params)
+    ask(cache, chat, params={**params, **changed})
+    assert len(client.requests) == 2
+    assert cache.key('bar chart', 'q', 'v1', 'data-1', params) != cache.key('bar chart', 'q', 'v1', 'data-1')
+    assert cache.key('bar chart', 'q', 'v1', 'data-1', params) != cache.key('bar chart', 'q', 'v2', 'data-1', params)
+    assert cache.key('bar chart', 'q', 'v1', 'data-1', params) != cache.key('bar chart', 'q', 'v1', 'data-2', params)
+
+
+def test_stopped_stream_is_not_cached(cache):
+    client = FakeClient()
+    chat = StreamingChat(client)
+    with pytest.raises(IncompleteResponse, match='cancelled'):
+        ask(cache, chat, stop_after=2)
+    assert cache.stats()['size'] == 0
+    assert ask(cache, chat) == "t0 t1 t2 t3 t4 "
+    assert len(client.requests) == 2
+
+
+def test_failed_stream_is_not_cached(cache):
+    chat = StreamingChat(FakeClient(fail_at=3))
+    with pytest.raises(ConnectionError):
+        ask(cache, chat)
+    assert cache.stats()['size'] == 0
+    assert chat.metrics.summary()['streams'] == 1
+
+
+def test_abandoned_stream_has_no_result():
+    chat = StreamingChat(FakeClient())
+    stream = chat.stream(model='m', messages=[], max_tokens=5)
+    iterator = iter(stream)
+    next(iterator)
+    with pytest.raises(IncompleteResponse):
+        stream.result()
+    iterator.close()
+    assert stream.stats['outcome'] == 'cancelled'
+    with pytest.raises(IncompleteResponse):
+        stream.result()
+    assert chat.complete(model='m', messages=[], max_tokens=3) == "t0 t1 t2 "
+
+
+def test_cancel_mid_stream_closes_the_response():
+    client = FakeClient()
+    stream = StreamingChat(client).stream(model='m', messages=[], max_tokens=50)
+    deltas = []
+    for delta in stream:
+        deltas.append(delta)
+        if len(deltas) == 3:
+            stream.cancel()
+    assert deltas == ["t0 ", "t1 ", "t2 "]
+    assert client.last.closed
+    assert stream.stats['outcome'] == 'cancelled'
+    with pytest.raises(IncompleteResponse, match='cancelled after 9 characters'):
+        stream.result()
+
+
+def test_cancel_from_another_thread():
+    client = FakeClient()
+    stream = StreamingChat(client).stream(model='m', messages=[], max_tokens=10_000)
+    reader = threading.Thread(target=lambda: [time.sleep(0.001) for _ in stream])
+    reader.start()
+    while not stream.text:
+        time.sleep(0.001)
+    stream.cancel()
+    reader.join(5)
+    assert not reader.is_alive()
+    assert stream.stats['outcome'] == 'cancelled'
+    with pytest.raises(IncompleteResponse):
+        stream.result()
+
+
+def test_relay_hands_deltas_to_another_thread():
+    relay = StreamRelay()
+    stream = StreamingChat(FakeClient()).stream(model='m', messages=[], max_tokens=500)
+    halfway, resume = threading.Event(), threading.Event()
+
+    class Paused:
+        """The stream as the worker reads it, held after three deltas until the test has looked"""
+
+        def __iter__(self):
+            for i, delta in enumerate(stream):
+                if i == 3:
+                    halfway.set()
+                    resume.wait(5)
+                yield delta
+
+        def result(self):
+            return stream.result()
+
+    worker = threading.Thread(target=lambda: relay.relay(Paused()))
+    worker.start()
+    assert halfway.wait(5)
+    assert relay.drain() == 't0 t1 t2 '
+    resume.set()
+    worker.join(5)
+    assert relay.drain() == stream.result()
+
+
+def test_relay_cancelled_before_the_stream_starts():
+    client = FakeClient()
+    relay = StreamRelay()
+    relay.cancel()
+    with pytest.raises(IncompleteResponse):
+        relay.relay(StreamingChat(client).stream(model='m', messages=[], max_tokens=10))
+    assert client.requests == []
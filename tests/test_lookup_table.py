@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from real_estate.lookup_table import build_lookup_table
+
+LISTING = {
+    'property_type': 'flat', 'sector': 'sector 45', 'bedRoom': 3.0, 'bathroom': 2, 'balcony': '3+',
+    'agePossession': 'New Property', 'built_up_area': 1500, 'servant room': 0, 'store room': 0,
+    'furnishing_type': 'unfurnished', 'luxury_category': 'Low', 'floor_category': 'Mid Floor',
+}
+SECTOR_FACTOR = {'sector 45': 1.0, 'sector 46': 2.0, 'sector 47': 3.0}
+
+
+class FakeModel:
+    """price = built up area / 1000 * a per-sector factor, +10% for houses (log1p scale)"""
+
+    def predict(self, frame):
+        price = frame['built_up_area'].to_numpy() / 1000 * frame['sector'].map(SECTOR_FACTOR).to_numpy()
+        return np.log1p(price * np.where(frame['property_type'] == 'house', 1.1, 1.0))
+
+
+@pytest.fixture
+def table(tmp_path):
+    reference = pd.DataFrame([{**LISTING, 'sector': sector, 'property_type': kind}
+                              for sector in SECTOR_FACTOR for kind in ('flat', 'house')])
+    return build_lookup_table(FakeModel(), reference, str(tmp_path / 'grid.npy'), area_bins=8, model_hash='m1')
+
+
+def test_grid_holds_the_model_price_for_every_cell(table):
+    assert table.prices.shape == (2, 3, 1, 1, 1, 1, 1, 8)
+    assert table.model_hash == 'm1'
+    for area in table.areas:
+        row = {**LISTING, 'sector': 'sector 46', 'built_up_area': area}
+        assert table.price(row) == pytest.approx(area / 1000 * 2.0, rel=1e-6)
+
+
+def test_what_if_across_sectors_keeps_the_grid_ratios(table):
+    row = {**LISTING, 'built_up_area': table.areas[3]}
+    prices = table.what_if(row, base_price=5.0, axis='sector')
+    assert prices.index.tolist() == list(SECTOR_FACTOR)
+    np.testing.assert_allclose(prices, [5.0, 10.0, 15.0], rtol=1e-6)
+
+
+def test_what_if_area_curve_is_anchored_at_the_base_price(table):
+    row = {**LISTING, 'property_type': 'house', 'built_up_area': table.areas[2]}
+    curve = table.what_if(row, base_price=4.0, areas=table.areas)
+    np.testing.assert_allclose(curve, 4.0 * table.areas / table.areas[2], rtol=1e-6)
+    # Between bins the price is interpolated linearly in log-area, clamped at the ends
+    middle = np.sqrt(table.areas[4] * table.areas[5])
+    expected = (curve[4] + curve[5]) / 2
+    assert table.what_if(row, 4.0, areas=[middle])[0] == pytest.approx(expected, rel=1e-6)
+    assert table.what_if(row, 4.0, areas=[1.0])[0] == pytest.approx(curve[0], rel=1e-6)
+
+
+def test_unknown_category_is_a_key_error(table):
+    with pytest.raises(KeyError, match='sector 99'):
+        table.what_if({**LISTING, 'sector': 'sector 99'}, 1.0, axis='sector')
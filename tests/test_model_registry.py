@@ -0,0 +1,46 @@
+import gzip
+import os
+import pickle
+
+import pandas as pd
+import pytest
+
+from real_estate.model_registry import ModelRegistry
+
+
+def write_pipeline(path, version):
+    with gzip.open(path, 'wb') as file:
+        pickle.dump({'version': version}, file)
+    # A rewrite within the same mtime tick must still look changed
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + version * 1_000_000))
+
+
+@pytest.fixture
+def registry(tmp_path):
+    pd.DataFrame({'price': [1.0, 2.0]}).to_feather(tmp_path / 'df.arrow')
+    write_pipeline(tmp_path / 'pipeline.pkl.gz', 1)
+    return ModelRegistry(str(tmp_path / 'pipeline.pkl.gz'), str(tmp_path / 'df.arrow'),
+                         compiled_path=None, intervals_path=None)
+
+
+def test_refresh_is_a_no_op_while_the_artifact_is_unchanged(registry):
+    pipeline = registry.pipeline
+    loaded_at = registry.stats()['loaded_at']
+    assert registry.refresh().pipeline is pipeline
+    assert registry.stats()['loaded_at'] == loaded_at
+    assert registry.stats()['model_format'] == 'pickle'
+
+
+def test_refresh_reloads_a_changed_artifact(registry):
+    assert registry.pipeline == {'version': 1}
+    old_hash = registry.model_hash
+    write_pipeline(registry.pipeline_path, 2)
+    assert registry.refresh().pipeline == {'version': 2}
+    assert registry.model_hash != old_hash
+    assert registry.df['price'].tolist() == [1.0, 2.0]
+
+
+def test_refresh_before_the_first_load_loads(registry):
+    assert not registry.loaded
+    assert registry.refresh().loaded
@@ -0,0 +1,53 @@
+import glob
+import os
+import tempfile
+import time
+
+import pytest
+
+pytest.importorskip('PyPDF2')
+
+from real_estate import pdf_text
+
+
+@pytest.fixture(scope='module')
+def pdf_bytes(tmp_path_factory):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    path = tmp_path_factory.mktemp('pdf') / 'listing.pdf'
+    with PdfPages(path) as pdf:
+        for page in range(40):
+            fig = plt.figure(figsize=(8.5, 11))
+            for line in range(10):
+                fig.text(0.05, 0.9 - line * 0.05, f"Page {page} line {line}: sector {line} flat at {page}.{line} crore")
+            pdf.savefig(fig)
+            plt.close(fig)
+    return path.read_bytes()
+
+
+def temp_pdfs():
+    return set(glob.glob(os.path.join(tempfile.gettempdir(), '*.pdf')))
+
+
+def test_serial_and_pooled_extraction_give_the_same_text(pdf_bytes):
+    serial, serial_stats = pdf_text.extract_text(pdf_bytes, workers=1)
+    pooled, pooled_stats = pdf_text.extract_text(pdf_bytes, workers=2, parallel_pages=1)
+    assert (serial_stats['mode'], pooled_stats['mode']) == ('serial', '2 processes')
+    assert pooled == serial
+    assert 'Page 39 line 9' in serial
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_extraction_stops_at_the_text_limit(pdf_bytes, workers):
+    before = temp_pdfs()
+    text, stats = pdf_text.extract_text(pdf_bytes, max_chars=1_000, workers=workers, parallel_pages=1)
+    assert len(text) <= 1_000
+    assert stats['truncated'] and stats['extracted'] < stats['pages'] == 40
+    # The pooled path deletes its temporary copy once the cancelled ranges are gone
+    deadline = time.monotonic() + 10
+    while temp_pdfs() - before and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not temp_pdfs() - before
@@ -0,0 +1,67 @@
+import types
+
+import pytest
+
+from real_estate import prediction_cache
+from real_estate.prediction_cache import PredictionCache
+
+LISTING = {
+    'property_type': 'flat', 'sector': 'sector 45', 'bedRoom': 3, 'bathroom': 2, 'balcony': '3+',
+    'agePossession': 'New Property', 'built_up_area': 1500, 'servant room': 0, 'store room': 0,
+    'furnishing_type': 'unfurnished', 'luxury_category': 'Low', 'floor_category': 'Mid Floor',
+}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache, 'time', types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.mark.parametrize('area, bucketed', [(1530, 1550.0), (1520, 1500.0), (10, 50.0)])
+def test_canonicalize_types_strips_and_buckets_area(area, bucketed):
+    row = {**LISTING, 'sector': ' sector 45 ', 'bedRoom': '3', 'built_up_area': area}
+    canonical = PredictionCache(area_bucket=50).canonicalize(row)
+    assert canonical['sector'] == 'sector 45'
+    assert canonical['bedRoom'] == 3.0
+    assert canonical['built_up_area'] == bucketed
+    assert PredictionCache().canonicalize(row)['built_up_area'] == float(area)
+
+
+def test_bucketed_areas_share_one_entry():
+    cache, calls = PredictionCache(area_bucket=50), []
+    for area in (1490, 1510, 1524):
+        cache.get_or_compute({**LISTING, 'built_up_area': area}, lambda row: calls.append(row) or 1.0)
+    assert [row['built_up_area'] for row in calls] == [1500.0]
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PredictionCache(ttl=60)
+    cache.put('key', 1.0)
+    clock[0] += 59
+    assert cache.get('key') == 1.0
+    clock[0] += 2
+    assert cache.get('key') is None
+    assert cache.stats()['expirations'] == 1
+    assert cache.stats()['size'] == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = PredictionCache(maxsize=2)
+    cache.put('a', 1.0)
+    cache.put('b', 2.0)
+    cache.get('a')  # 'b' is now the least recently used
+    cache.put('c', 3.0)
+    cache.put('d', 4.0)
+    assert cache.get('a') is None and cache.get('b') is None
+    assert (cache.get('c'), cache.get('d')) == (3.0, 4.0)
+    assert cache.stats()['evictions'] == 2
+
+
+def test_new_model_hash_drops_every_entry():
+    cache = PredictionCache()
+    cache.put('a', 1.0, model_hash='v1')
+    assert cache.get('a', model_hash='v2') is None
+    assert cache.stats()['invalidations'] == 1
@@ -0,0 +1,33 @@
+import math
+
+import pytest
+
+from real_estate.retrieval import BM25Index
+
+
+@pytest.fixture
+def index():
+    return BM25Index(["rent yield sector", "rent rent lease", "metro station"], ['a.pdf', 'b.pdf', 'a.pdf'])
+
+
+def test_scores_match_hand_computed_bm25(index):
+    # k1 = 1.5, b = 0.75; passage lengths 3, 3, 2 (mean 8/3); "rent" is in 2 of 3 passages
+    idf = math.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+    norm = 1.5 * (1 - 0.75 + 0.75 * 3 / (8 / 3))
+    results = index.search("rent")
+    assert [(source, passage) for _, source, passage in results] == [('b.pdf', "rent rent lease"),
+                                                                     ('a.pdf', "rent yield sector")]
+    assert results[0][0] == pytest.approx(idf * 2 * 2.5 / (2 + norm))
+    assert results[1][0] == pytest.approx(idf * 1 * 2.5 / (1 + norm))
+
+
+def test_scores_add_up_over_query_terms(index):
+    single = {passage: score for score, _, passage in index.search("yield")}
+    both = {passage: score for score, _, passage in index.search("rent yield")}
+    rent = {passage: score for score, _, passage in index.search("rent")}
+    assert both["rent yield sector"] == pytest.approx(rent["rent yield sector"] + single["rent yield sector"])
+
+
+def test_unknown_terms_match_nothing_and_context_keeps_document_order(index):
+    assert index.search("swimming pool") == []
+    assert index.context("station rent", k=2) == "[From b.pdf]\nrent rent lease\n\n[From a.pdf]\nmetro station"
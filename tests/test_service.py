@@ -0,0 +1,85 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+from real_estate.service import MicroBatcher, ServiceMetrics, create_server
+
+LISTING = {
+    'property_type': 'flat', 'sector': 'sector 45', 'bedRoom': 3, 'bathroom': 2, 'balcony': '3+',
+    'agePossession': 'New Property', 'built_up_area': 1500, 'servant room': 0, 'store room': 0,
+    'furnishing_type': 'unfurnished', 'luxury_category': 'Low', 'floor_category': 'Mid Floor',
+}
+
+
+class FakePipeline:
+    """log price = built up area / 1000; unknown sectors raise like OneHotEncoder"""
+
+    def predict(self, frame):
+        unknown = sorted(set(frame['sector']) - {'sector 45', 'sector 46'})
+        if unknown:
+            raise ValueError(f"Found unknown categories {unknown} in column 'sector'")
+        return np.log1p(frame['built_up_area'].to_numpy() / 1000)
+
+
+@pytest.fixture
+def server():
+    server = create_server(port=0, max_wait=0.2, pipeline=FakePipeline())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, payload):
+    url = f"http://127.0.0.1:{server.server_address[1]}/predict"
+    request = urllib.request.Request(url, json.dumps(payload).encode(), {'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_bad_row_fails_alone_in_its_batch():
+    batcher = MicroBatcher(FakePipeline(), max_wait=0.2)
+    good = batcher.submit(LISTING)
+    bad = batcher.submit({**LISTING, 'sector': 'sector 999'})
+    assert good.result(timeout=5)[0] == pytest.approx(1.5)
+    with pytest.raises(ValueError, match='sector 999'):
+        bad.result(timeout=5)
+
+
+def test_malformed_and_unknown_listings_get_400(server):
+    results = {}
+
+    def send(name, listing):
+        results[name] = post(server, listing)
+
+    threads = [threading.Thread(target=send, args=args) for args in [
+        ('good', LISTING), ('text', {**LISTING, 'bedRoom': 'three'}), ('unknown', {**LISTING, 'sector': 'sector 999'}),
+    ]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results['good'][0] == 200
+    assert results['good'][1]['price'] == pytest.approx(1.5)
+    assert results['text'][0] == 400
+    assert results['unknown'][0] == 400
+
+
+def test_throughput_covers_the_latency_window():
+    metrics = ServiceMetrics(window=3)
+    metrics.started_at -= 3600
+    for _ in range(5):
+        metrics.record_request(0.01)
+    now = metrics._finished_at[-1]
+    metrics._finished_at.extend([now - 1.5, now - 1.0, now - 0.5])
+    snapshot = metrics.snapshot()
+    assert snapshot['requests'] == 5
+    # The last three requests over their last 1.5 s, not 5 requests over an hour of uptime
+    assert snapshot['throughput_rps'] == pytest.approx(2.0, rel=0.05)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from real_estate.trendlines import Trendlines, confidence_bands, fit_groups
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(500, 3000, 300)
+    group = np.where(np.arange(300) % 3 == 0, 'house', 'flat')
+    y = np.where(group == 'house', 2.0, 0.8) * x / 1000 + rng.normal(0, 0.3, 300)
+    return pd.DataFrame({'area': x, 'price': y, 'property_type': group})
+
+
+def test_fits_match_linregress(frame):
+    fits = fit_groups(frame, 'area', 'price', 'property_type')
+    for group, rows in frame.groupby('property_type'):
+        expected = stats.linregress(rows['area'], rows['price'])
+        fit = fits.loc[group]
+        assert fit['n'] == len(rows)
+        assert fit['slope'] == pytest.approx(expected.slope, rel=1e-9)
+        assert fit['intercept'] == pytest.approx(expected.intercept, rel=1e-9)
+        assert fit['r2'] == pytest.approx(expected.rvalue ** 2, rel=1e-9)
+
+
+def test_band_matches_statsmodels_confidence_interval(frame):
+    sm = pytest.importorskip('statsmodels.api')
+    rows = frame[frame['property_type'] == 'house']
+    bands = Trendlines(frame, 'area', 'price', 'property_type').bands
+    band = bands[bands['group'] == 'house']
+    model = sm.OLS(rows['price'], sm.add_constant(rows['area'])).fit()
+    expected = model.get_prediction(sm.add_constant(band['x'].to_numpy())).summary_frame(alpha=0.05)
+    np.testing.assert_allclose(band['y'], expected['mean'], rtol=1e-9)
+    np.testing.assert_allclose(band['low'], expected['mean_ci_lower'], rtol=1e-9)
+    np.testing.assert_allclose(band['high'], expected['mean_ci_upper'], rtol=1e-9)
+
+
+def test_two_point_group_has_a_line_but_no_band():
+    frame = pd.DataFrame({'area': [1.0, 2.0], 'price': [1.0, 3.0]})
+    bands = confidence_bands(fit_groups(frame, 'area', 'price', None), points=3)
+    np.testing.assert_allclose(bands['y'], [1.0, 2.0, 3.0])
+    assert bands['low'].isna().all() and bands['high'].isna().all()
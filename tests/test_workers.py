@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from real_estate import documents, workers
+
+
+def test_results_arrive_in_completion_order_with_their_index():
+    delays = [0.3, 0.05, 0.15]
+
+    def work(delay):
+        time.sleep(delay)
+        return delay
+
+    tasks = list(workers.as_completed(work, delays, max_workers=3))
+    assert [task.index for task in tasks] == [1, 2, 0]
+    assert all(task.result == delays[task.index] and task.error is None for task in tasks)
+
+
+def test_summaries_keep_document_order():
+    chunks = [f"part {i}" for i in range(8)]
+
+    def summarize(chunk):
+        time.sleep(0.01 * (8 - int(chunk.split()[1])))  # later parts finish first
+        return chunk.upper()
+
+    assert documents.summarize_all(chunks, summarize, max_workers=4) == [c.upper() for c in chunks]
+
+
+def test_one_failing_file_does_not_affect_the_others():
+    def analyze(name):
+        if name == 'corrupt.pdf':
+            raise ValueError("EOF marker not found")
+        return f"analysis of {name}"
+
+    tasks = {task.index: task for task in workers.as_completed(analyze, ['a.txt', 'corrupt.pdf', 'b.csv'])}
+    assert isinstance(tasks[1].error, ValueError)
+    assert [tasks[i].result for i in (0, 2)] == ['analysis of a.txt', 'analysis of b.csv']
+
+
+def test_timed_out_task_is_reported_and_cancelled():
+    stopped = threading.Event()
+
+    def analyze(seconds):
+        started = time.perf_counter()
+        while time.perf_counter() - started < seconds:
+            if workers.cancelled():
+                stopped.set()
+                return 'partial'
+            time.sleep(0.01)
+        return 'done'
+
+    started = time.perf_counter()
+    tasks = {task.index: task for task in workers.as_completed(analyze, [0.05, 5], timeout=0.3)}
+    assert time.perf_counter() - started < 2
+    assert tasks[0].result == 'done'
+    assert isinstance(tasks[1].error, TimeoutError) and tasks[1].result is None
+    assert stopped.wait(1)
+
+
+def test_chunk_tasks_are_cancelled_with_their_file():
+    seen = []
+
+    def summarize(chunk):
+        deadline = time.perf_counter() + 2
+        while not workers.cancelled() and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        seen.append(workers.cancelled())
+        return chunk
+
+    def analyze(text):
+        return documents.summarize_all(text.split(), summarize, max_workers=2)
+
+    started = time.perf_counter()
+    tasks = list(workers.as_completed(analyze, ["one two three four"], timeout=0.1))
+    assert isinstance(tasks[0].error, TimeoutError)
+    while len(seen) < 4 and time.perf_counter() - started < 3:
+        time.sleep(0.01)
+    assert seen == [True] * 4
+    assert time.perf_counter() - started < 1.5
+    assert not workers.cancelled()
+
+
+@pytest.mark.parametrize('max_workers', [1, 4])
+def test_every_item_is_reported_once(max_workers):
+    tasks = list(workers.as_completed(lambda x: x * 2, range(10), max_workers=max_workers))
+    assert sorted(task.index for task in tasks) == list(range(10))